@@ -0,0 +1,45 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from smartersoft import SmarterSoft
+from smartersoft.smartfades import SmartFade1248
+
+class NullEndpoint():
+    """
+    Endpoint that accepts every write and reads back empty status
+    responses, so only the library itself is measured.
+    """
+    def write(self, data, timeout=None):
+        return len(data)
+
+    def read(self, size, timeout=None):
+        return bytes(size)
+
+@pytest.fixture
+def smartfade():
+    sf = SmartFade1248()
+    sf.usbDataIn = NullEndpoint()
+    sf.usbDataOut = NullEndpoint()
+    return sf
+
+@pytest.fixture
+def smartersoft():
+    sf = SmarterSoft(series="1248", emulate=True)
+    sf.SmartFade.usbDataIn = NullEndpoint()
+    sf.SmartFade.usbDataOut = NullEndpoint()
+    return sf
@@ -0,0 +1,77 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import time
+
+import numpy as np
+
+from smartersoft import SmarterSoft
+from smartersoft.audio import SoundAnalyzer, SoundToLight
+
+def test_analyze_block(benchmark):
+    analyzer = SoundAnalyzer(44100, 1024, bands=8)
+    rng = np.random.default_rng(0)
+    noise = rng.standard_normal(1024).astype(np.float32)
+    # A 1 kHz tone, which falls in the fifth of 8 bands from 40 Hz to 16 kHz
+    tone = np.sin(2 * np.pi * 1000 * np.arange(1024) / 44100).astype(np.float32)
+
+    # Levels are scaled against each band's peak, here set by the noise
+    levels, _ = analyzer.process(noise * 0.01)
+    assert np.allclose(levels, 1.0)
+    levels, _ = analyzer.process(tone * 0.001)
+    assert np.argmax(levels) == 4 and levels.max() < 1.0
+
+    # A steady sound has no onsets, a sudden loud one is a beat
+    beats = SoundAnalyzer(44100, 1024, bands=8)
+    assert not any(beats.process(noise * 0.01)[1] for _ in range(10))
+    assert beats.process(noise)[1]
+
+    levels, _ = benchmark(analyzer.process, noise)
+    assert len(levels) == analyzer.bands
+
+    # A block must be analysed well within the time it takes to play
+    if not benchmark.disabled:
+        assert benchmark.stats.stats.mean < analyzer.blockTime / 10
+
+def test_live_lag():
+    sf = SmarterSoft(series="1248", emulate=True)
+    engine = SoundToLight(sf, range(8), maxLatency=0.1)
+    block = np.zeros(1024, np.float32)
+
+    # The input stalls for 0.3s and then delivers its backlog at once
+    def blocks():
+        yield 44100, None
+        yield 44100, block
+        time.sleep(0.3)
+        for _ in range(20):
+            yield 44100, block
+
+    engine.run(blocks(), realtime=False)
+    assert engine.dropped > 0
+    assert engine.blocks + engine.dropped == 21
+    assert engine.maxLatencySeen < 0.1 + 0.05
+
+def test_process_block(benchmark, smartersoft):
+    engine = SoundToLight(smartersoft, range(8), beatBumps=(24, 25))
+    engine.analyzer = SoundAnalyzer(44100, 1024, bands=8)
+    blocks = np.random.default_rng(0).standard_normal((64, 1024)).astype(np.float32)
+    step = [0]
+
+    def process():
+        step[0] += 1
+        return engine.process(blocks[step[0] % len(blocks)])
+
+    benchmark(process)
@@ -0,0 +1,97 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import socket
+import time
+
+from smartersoft import SmarterSoft
+from smartersoft.bridge import DmxBridge, pack_artdmx, pack_sacn, SACN_PREVIEW, SACN_TERMINATED
+
+def loopback_bridge(**kwargs):
+    sf = SmarterSoft(series="1248", emulate=True)
+    bridge = DmxBridge(sf, host="127.0.0.1", artnetPort=0, sacnPort=0, multicast=False, **kwargs)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    return sf, bridge, sender
+
+def receive(bridge, count):
+    accepted = 0
+    deadline = time.monotonic() + 2
+    while accepted < count and time.monotonic() < deadline:
+        accepted += bridge.receive(0.1)
+    return accepted
+
+def test_changed_channels():
+    sf, bridge, sender = loopback_bridge(startChannel=11, numFaders=24)
+    with bridge, sender:
+        artnet = bridge.address["artnet"]
+
+        universe = bytearray(512)
+        universe[10:13] = (255, 128, 64)
+        sender.sendto(pack_artdmx(0, universe), artnet)
+        assert receive(bridge, 1) == 1
+        # The first frame sends every mapped fader
+        assert bridge.flush() == 24
+        assert sf.faderLevels[:4] == [255, 128, 64, 0]
+
+        universe[11] = 1
+        sender.sendto(pack_artdmx(0, universe), artnet)
+        assert receive(bridge, 1) == 1
+        assert bridge.flush() == 1
+        assert sf.faderLevels[1] == 1
+
+        # Nothing changed, nothing is sent
+        sender.sendto(pack_artdmx(0, universe), artnet)
+        assert receive(bridge, 1) == 1
+        assert bridge.flush() == 0
+
+def test_ignored_packets():
+    sf, bridge, sender = loopback_bridge(artnetUniverse=2, sacnUniverse=3)
+    with bridge, sender:
+        artnet, sacn = bridge.address["artnet"], bridge.address["sacn"]
+        levels = bytes([200] * 48)
+
+        sender.sendto(pack_artdmx(1, levels), artnet)
+        sender.sendto(pack_sacn(1, levels), sacn)
+        sender.sendto(pack_sacn(3, levels, options=SACN_PREVIEW), sacn)
+        sender.sendto(pack_sacn(3, levels, options=SACN_TERMINATED), sacn)
+        sender.sendto(b"not a dmx packet", artnet)
+        time.sleep(0.1)
+        assert bridge.receive(0.1) == 0
+        assert bridge.flush() == 0
+
+        sender.sendto(pack_sacn(3, levels), sacn)
+        assert receive(bridge, 1) == 1
+        bridge.flush()
+        assert sf.faderLevels == [200] * 48
+
+def test_rate_limited():
+    sf, bridge, sender = loopback_bridge(rate=10)
+    with bridge, sender:
+        artnet = bridge.address["artnet"]
+        bridge.start()
+
+        start = time.monotonic()
+        for level in range(100):
+            sender.sendto(pack_artdmx(0, [level] * 48), artnet)
+            time.sleep(0.002)
+        time.sleep(0.15)
+        elapsed = time.monotonic() - start
+        bridge.stop()
+
+        # A hundred packets collapse into a frame every 0.1s at most
+        assert bridge.packets == 100
+        assert bridge.frames <= elapsed * 10 + 1
+        assert sf.faderLevels == [99] * 48
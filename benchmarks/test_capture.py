@@ -0,0 +1,84 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import struct
+
+from smartersoft.capture import CaptureDecoder, CaptureStats
+from smartersoft.drivers import control_requests, send_requests
+
+def usbmon(eventType, transferType, endpoint, data, time=0.0):
+    header = struct.pack("<QcBBBHccqiiII8s", 0, eventType, transferType, endpoint, 5, 1, b"-", b"=",
+        int(time), int(time % 1 * 1e6), 0, len(data), len(data), bytes(8))
+    return header + bytes(16) + data
+
+def packets(count):
+    # Device descriptor for a 1248, then a stream of fader moves and polls
+    descriptor = bytes([18, 1]) + bytes(6) + struct.pack("<HH", 0x14d5, 0x0200) + bytes(6)
+    yield usbmon(b"C", 2, 0x80, descriptor)
+
+    request = send_requests.SendRequest(command=0x01, pktSize=7).pack()
+    poll = send_requests.SendRequest(command=0x00, pktSize=0).pack()
+    response = send_requests.SendRequest(command=0x04, pktSize=7).pack()
+    for i in range(count):
+        control = control_requests.ControlInterface(command=0x14, index=i % 24, state=i % 256)
+        control.SendHeader.seqNum = i
+        yield usbmon(b"S", 3, 0x04, request, i / 100)
+        yield usbmon(b"S", 3, 0x04, control.pack(), i / 100)
+        yield usbmon(b"S", 3, 0x04, poll, i / 100)
+        yield usbmon(b"C", 3, 0x83, response, i / 100)
+        yield usbmon(b"C", 3, 0x83, bytes([0, 0, 0, 0x14, 0x01, 0x31, 1]), i / 100)
+
+def pcap(count):
+    buf = io.BytesIO()
+    buf.write(struct.pack("<IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 65535, 220))
+    for packet in packets(count):
+        buf.write(struct.pack("<IIII", 0, 0, len(packet), len(packet)) + packet)
+    buf.seek(0)
+    return buf
+
+def pcapng(count):
+    buf = io.BytesIO()
+    buf.write(struct.pack("<IIIHHqI", 0x0a0d0d0a, 28, 0x1a2b3c4d, 1, 0, -1, 28))
+    buf.write(struct.pack("<IIHHII", 1, 20, 220, 0, 65535, 20))
+    for packet in packets(count):
+        padded = packet + bytes(-len(packet) % 4)
+        length = 32 + len(padded)
+        buf.write(struct.pack("<IIIIIII", 6, length, 0, 0, 0, len(packet), len(packet)) + padded + struct.pack("<I", length))
+    buf.seek(0)
+    return buf
+
+def test_decode_formats():
+    for capture in (pcap(3), pcapng(3)):
+        messages = list(CaptureDecoder().decode(capture))
+        controls = [message for message in messages if message.kind == "ControlInterface"]
+        events = [message for message in messages if message.kind == "Event"]
+
+        assert [message.fields["name"] for message in controls] == ["fader 0", "fader 1", "fader 2"]
+        assert [message.fields["seqNum"] for message in controls] == [0, 1, 2]
+        assert events[0].fields["controls"] == "play:1"
+
+def test_decode_stats(benchmark):
+    def decode():
+        stats = CaptureStats()
+        for message in CaptureDecoder().decode(pcap(1000)):
+            stats.add(message)
+        return stats
+
+    stats = benchmark(decode)
+    assert stats.kinds["ControlInterface"] == 1000
+    assert stats.polls == 1000
+    assert stats.seqGaps == 0
@@ -0,0 +1,37 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from smartersoft.__main__ import main
+
+def test_set_memory(capsys):
+    # Without --page the memory is set on whichever page is showing
+    main(["--emulate", "--series", "1248", "set", "memory", "3", "200"])
+    main(["--emulate", "--series", "1248", "set", "memory_bump", "3", "255"])
+    main(["--emulate", "--series", "1248", "set", "memory", "3", "200", "--page", "1"])
+
+    with pytest.raises(SystemExit) as exit:
+        main(["--emulate", "--series", "1248", "set", "memory", "3", "200", "--page", "99"])
+    assert exit.value.code == 2
+    assert "memory page number that does not exist" in capsys.readouterr().err
+
+def test_go(capsys):
+    main(["--emulate", "--series", "1248", "go", "--step", "2", "--rate", "128"])
+
+    with pytest.raises(SystemExit):
+        main(["--emulate", "--series", "1248", "go", "--step", "-1"])
+    assert "negative number of steps" in capsys.readouterr().err
@@ -0,0 +1,36 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+def test_find_fader_page(benchmark, smartfade):
+    def find():
+        for faderNum in range(smartfade.numFaders):
+            smartfade.find_fader_page(faderNum)
+
+    benchmark(find)
+    assert smartfade.find_fader_page(30) == ["25-48", 6]
+
+def test_set_fader(benchmark, smartfade):
+    benchmark(smartfade.set_fader, 12, 128)
+
+def test_set_bump(benchmark, smartfade):
+    benchmark(smartfade.set_bump, 12, 1)
+
+def test_click_button(benchmark, smartfade):
+    benchmark(smartfade.click_button, "blackout")
+
+def test_set_fader_preallocated(benchmark, smartfade):
+    smartfade.preallocate()
+    benchmark(smartfade.set_fader, 12, 128)
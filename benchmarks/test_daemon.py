@@ -0,0 +1,76 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import subprocess
+import sys
+
+from smartersoft import SmarterSoft
+from smartersoft.daemon import ConsoleDaemon, SharedFrame
+
+def frame_name(test):
+    return f"smartersoft-test-{test}-{os.getpid()}"
+
+def test_dirty_marks():
+    with SharedFrame(frame_name("dirty"), 48, create=True) as frame:
+        frame.set_fader(3, 255)
+        frame.set_faders(bytes([10, 20]), start=30)
+        frame.set_fader_bump(5, 255)
+        assert frame.written == 3
+
+        assert frame.take_dirty(frame.levels, frame.dirtyLevels) == {3: 255, 30: 10, 31: 20}
+        assert frame.take_dirty(frame.bumps, frame.dirtyBumps) == {5: 255}
+        assert bytes(frame.dirtyLevels) == bytes(bytes(48))
+        assert frame.take_dirty(frame.levels, frame.dirtyLevels) == {}
+
+def test_daemon_tick():
+    sf = SmarterSoft(series="1248", emulate=True)
+    emulator = sf.SmartFade.usbEmulator
+
+    with ConsoleDaemon(sf, frame_name("tick")) as daemon:
+        client = SharedFrame.attach(daemon.frame.name)
+        client.set_faders(bytes(48))
+        assert daemon.tick() == 48
+
+        # Only what a client changed is sent, on the page already showing
+        commands = emulator.commands
+        client.set_fader(30, 128)
+        client.set_fader(31, 0)
+        assert daemon.tick() == 1
+        assert emulator.commands == commands + 1
+        assert sf.faderLevels[30] == 128
+        assert client.applied == 2
+
+        assert daemon.tick() == 0
+        client.close()
+
+def test_attach_leaves_frame():
+    name = frame_name("attach")
+    with SharedFrame(name, 48, create=True) as frame:
+        frame.set_fader(0, 42)
+
+        client = SharedFrame.attach(name)
+        assert client.numFaders == 48 and client.levels[0] == 42
+        client.close()
+
+        # A client process exiting must not remove the frame either
+        subprocess.run([sys.executable, "-c",
+            f"from smartersoft.daemon import SharedFrame; SharedFrame.attach({name!r}).set_fader(1, 7)"],
+            check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        again = SharedFrame.attach(name)
+        assert again.levels[1] == 7
+        again.close()
@@ -0,0 +1,58 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from smartersoft.drivers.control_requests import ControlInterface
+from smartersoft.drivers.send_requests import SendRequest
+from smartersoft.drivers.settings_requests import SettingsInterface
+
+def test_control_pack(benchmark):
+    control = ControlInterface(command=0x14, index=0x0017, state=255)
+    # Skip the sequence number, other tests send with the same header
+    assert benchmark(control.pack)[2:] == bytes.fromhex("0014 0017 ff")
+
+def test_control_unpack(benchmark):
+    control = ControlInterface()
+    benchmark(control.unpack, bytes.fromhex("0203 0014 0147 01"))
+    assert (control.command, control.index, control.state) == (0x14, 0x0147, 1)
+
+def test_control_calc_size(benchmark):
+    assert benchmark(ControlInterface().calc_size) == 7
+
+def test_control_encode(benchmark):
+    # Building a fresh request, as every SmartFadeControl call does
+    def encode():
+        return ControlInterface(command=0x14, index=0x0100, state=1).pack()
+
+    assert benchmark(encode)[2:] == bytes.fromhex("0014 0100 01")
+
+def test_send_request_pack(benchmark):
+    request = SendRequest(command=0x01, pktSize=7)
+    assert benchmark(request.pack) == bytes.fromhex("0100 0700 0000 0000 0000 0000")
+
+def test_send_request_unpack(benchmark):
+    request = SendRequest()
+    benchmark(request.unpack, bytes.fromhex("0400 0000 0000 0000 0000 0000"))
+    assert (request.command, request.pktSize) == (0x04, 0)
+
+def test_settings_pack(benchmark):
+    settings = SettingsInterface()
+    assert benchmark(settings.pack)[2:] == bytes.fromhex("0029 0064 5a3c 0003 0000 0001 7f00 0100 3200 3200 00")
+
+def test_control_pack_into(benchmark):
+    control = ControlInterface(command=0x14, index=0x0017, state=255)
+    buf = bytearray(control.calc_size())
+    benchmark(control.pack_into, buf)
+    assert buf[2:] == bytes.fromhex("0014 0017 ff")
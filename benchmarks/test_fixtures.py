@@ -0,0 +1,71 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from smartersoft.fixtures import Fixture, Patch, hsv_to_rgb
+
+def rgbw_patch(smartersoft):
+    return Patch(smartersoft, [Fixture(f"LED {i}", i * 4, "RGBW") for i in range(12)])
+
+def test_render(benchmark, smartersoft):
+    patch = rgbw_patch(smartersoft)
+    colors = hsv_to_rgb(np.stack((np.linspace(0, 1, 12), np.ones(12), np.ones(12)), axis=-1))
+
+    faders, levels = benchmark(patch.render, colors, 0.75)
+    assert len(faders) == len(levels) == smartersoft.SmartFade.numFaders
+
+def test_mapping(smartersoft):
+    patch = Patch(smartersoft, [
+        Fixture("RGB", 0, "RGB"),
+        Fixture("RGBW", 3, "RGBW"),
+        Fixture("DRGB", 7, "DRGB"),
+        Fixture("Dimmer", 11, "D")])
+    levels = lambda faders, values: dict(zip(faders.tolist(), values.tolist()))
+
+    # Red sets only the R fader
+    red = levels(*patch.render((1, 0, 0)))
+    assert [red[fader] for fader in (0, 1, 2)] == [255, 0, 0]
+    assert [red[fader] for fader in (3, 4, 5, 6)] == [255, 0, 0, 0]
+
+    # White comes out of RGB into the W channel
+    pink = levels(*patch.render((1, 0.6, 0.6)))
+    assert [pink[fader] for fader in (0, 1, 2)] == [255, 153, 153]
+    assert [pink[fader] for fader in (3, 4, 5, 6)] == [102, 0, 0, 153]
+
+    # Dimmers scale colour, unless the fixture has its own dimmer channel
+    dimmed = levels(*patch.render((1, 0.6, 0.6), 0.5))
+    assert [dimmed[fader] for fader in (0, 1, 2)] == [128, 76, 76]
+    assert [dimmed[fader] for fader in (3, 4, 5, 6)] == [51, 0, 0, 76]
+    assert [dimmed[fader] for fader in (7, 8, 9, 10)] == [128, 255, 153, 153]
+    assert dimmed[11] == 128
+
+    # Only changed faders are sent
+    assert patch.apply((1, 0, 0)) == 12
+    assert smartersoft.faderLevels[:4] == [255, 0, 0, 255]
+    assert patch.apply((1, 0, 0)) == 0
+
+def test_apply_chase(benchmark, smartersoft):
+    patch = rgbw_patch(smartersoft)
+    hues = np.linspace(0, 1, 12, endpoint=False)
+    step = [0]
+
+    def chase():
+        step[0] += 1
+        hsv = np.stack(((hues + step[0] / 100) % 1, np.ones(12), np.ones(12)), axis=-1)
+        return patch.apply(hsv_to_rgb(hsv))
+
+    benchmark(chase)
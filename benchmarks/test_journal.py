@@ -0,0 +1,102 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from smartersoft import SmarterSoft
+
+def test_resume(tmp_path):
+    path = tmp_path / "state.journal"
+
+    sf = SmarterSoft(series="1248", emulate=True)
+    assert not sf.attach_journal(path)
+    sf.set_faders(list(range(48)))
+    sf.set_fader_bumps({30: 255})
+    sf.click_button("blackout")
+    sf.set_master_fader(200)
+
+    # A restart without closing, as after a crash
+    resumed = SmarterSoft(series="1248", emulate=True)
+    assert resumed.attach_journal(path)
+    assert resumed.faderLevels == sf.faderLevels
+    assert resumed.bumpStates == sf.bumpStates
+    assert resumed.faderPage == "25-48"
+    assert resumed.toggleStates["blackout"]
+    assert resumed.masterLevel == 200
+    assert resumed.set_faders(list(range(1, 49))) == 48
+    assert resumed.set_faders(list(range(1, 49))) == 0
+
+    # A torn write falls back to the slot before it
+    journal = resumed.journal
+    offset = 16 + (journal.seq % 2) * journal._slotSize
+    journal._mm[offset + 20] ^= 0xff
+
+    again = SmarterSoft(series="1248", emulate=True)
+    assert again.attach_journal(path)
+    assert again.journal.seq == journal.seq - 1
+    assert again.faderLevels == resumed.faderLevels
+
+    # A crash while sending leaves nothing trusted
+    again.journal.begin()
+    interrupted = SmarterSoft(series="1248", emulate=True)
+    assert not interrupted.attach_journal(path)
+
+def test_set_faders_journaled(benchmark, smartersoft, tmp_path):
+    smartersoft.attach_journal(tmp_path / "state.journal")
+    frames = iter(([i % 256] * 48 for i in range(1000000)))
+
+    benchmark(lambda: smartersoft.set_faders(next(frames)))
+
+class FailingEndpoint():
+    """
+    Emulator endpoint that raises once a number of writes have been made.
+    """
+    def __init__(self, endpoint, writes):
+        self.endpoint = endpoint
+        self.writes = writes
+
+    def write(self, data, timeout=None):
+        self.writes -= 1
+        if self.writes < 0:
+            raise OSError("Attempted to write to a disconnected console")
+        return self.endpoint.write(data, timeout)
+
+def test_failed_send(tmp_path):
+    sf = SmarterSoft(series="1248", emulate=True)
+    sf.attach_journal(tmp_path / "state.journal")
+    sf.set_fader(0, 10)
+    journal = sf.journal
+    writes = journal.writes
+
+    # Fails on the third fader
+    endpoint = sf.SmartFade.usbDataOut
+    sf.SmartFade.usbDataOut = FailingEndpoint(endpoint, 4)
+    try:
+        sf.set_faders({0: 1, 1: 2, 2: 3, 3: 4})
+    except OSError:
+        pass
+    else:
+        assert False, "The send should have failed"
+
+    assert journal.pending
+    assert journal.depth == 0
+    assert journal.writes == writes
+    interrupted = SmarterSoft(series="1248", emulate=True)
+    assert not interrupted.attach_journal(tmp_path / "state.journal")
+
+    # The next change that goes through is trusted again
+    sf.SmartFade.usbDataOut = endpoint
+    sf.set_faders({0: 1, 1: 2, 2: 3, 3: 4})
+    assert not journal.pending
+    assert journal.writes == writes + 1
@@ -0,0 +1,71 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from smartersoft import SmarterSoft
+from smartersoft.merge import MergeEngine
+
+def test_merge_rules():
+    sf = SmarterSoft(series="1248", emulate=True)
+    engine = MergeEngine(sf)
+    effects = engine.add_source("effects")
+    network = engine.add_source("network", timeout=1)
+    manual = engine.add_source("manual", priority=1)
+
+    effects.set({0: 100, 1: 200, 2: 50})
+    network.set({0: 150, 1: 100})
+    engine.set_mode([2, 3], ltp=True)
+    network.set({2: 10, 3: 80})
+    manual.set({4: 30})
+
+    merged = engine.merge().tolist()
+    assert merged[:5] == [150, 200, 10, 80, 30]
+
+    # Resending the same level does not take an LTP fader back
+    effects.set({2: 50})
+    assert engine.merge()[2] == 10
+    effects.set({2: 60})
+    assert engine.merge()[2] == 60
+
+    # Higher priority wins outright, timed out sources drop out
+    manual.set({0: 5})
+    merged = engine.merge(now=engine._seen[network.row] + 2).tolist()
+    assert merged[:4] == [5, 200, 60, -1]
+
+    # The first frame also sends every idle fader
+    assert engine.apply() == sf.SmartFade.numFaders
+    assert sf.faderLevels[:6] == [5, 200, 60, 80, 30, 0]
+    assert engine.apply() == 0
+
+    effects.set({1: 255})
+    assert engine.apply() == 1
+
+def test_merge_apply(benchmark, smartersoft):
+    engine = MergeEngine(smartersoft)
+    engine.set_mode(range(24, 48), ltp=True)
+    sources = [engine.add_source(f"source {i}", priority=i % 2, timeout=5) for i in range(8)]
+
+    rng = np.random.default_rng(1)
+    frames = iter(rng.integers(0, 256, (100000, 48)).tolist())
+    step = [0]
+
+    def frame():
+        step[0] += 1
+        sources[step[0] % len(sources)].set(next(frames))
+        return engine.apply()
+
+    benchmark(frame)
@@ -0,0 +1,61 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from smartersoft import SmarterSoft
+from smartersoft.outputs import OutputMonitor
+
+def test_output_history():
+    sf = SmarterSoft(series="1248", emulate=True)
+    monitor = OutputMonitor(sf, capacity=8)
+
+    for level in range(10):
+        sf.set_faders({0: level, 30: 255 - level})
+        assert monitor.poll()
+
+    times, levels = monitor.latest()
+    assert levels[0] == 9 and levels[30] == 246
+
+    times, frames = monitor.history()
+    assert len(frames) == 8
+    assert frames[:, 0].tolist() == list(range(2, 10))
+    assert np.all(np.diff(times) >= 0)
+
+    times, frames = monitor.window(start=times[4])
+    assert frames[:, 0].tolist() == [6, 7, 8, 9]
+
+    sf.set_master_fader(0)
+    monitor.poll()
+    assert monitor.drift(sf.faderLevels) == {0: (9, 0), 30: (246, 0)}
+
+def test_downsample():
+    sf = SmarterSoft(series="1248", emulate=True)
+    monitor = OutputMonitor(sf, capacity=16, channels=2)
+    monitor.times[:] = np.arange(16) * 0.1
+    monitor.frames[:, 0] = np.arange(16)
+    monitor.count = 16
+
+    starts, frames = monitor.downsample(0.4, how="max")
+    assert frames[:, 0].tolist() == [3, 7, 11, 15]
+    starts, frames = monitor.downsample(0.4)
+    assert frames[:, 0].tolist() == [2, 6, 10, 14]
+
+def test_poll(benchmark):
+    sf = SmarterSoft(series="1248", emulate=True)
+    monitor = OutputMonitor(sf)
+
+    assert benchmark(monitor.poll)
@@ -0,0 +1,34 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from smartersoft import SmarterSoft
+from smartersoft.planner import LevelPlanner
+
+def test_crossfade_needs_known_faders():
+    sf = SmarterSoft(series="1248", emulate=True)
+    planner = LevelPlanner(sf)
+    a = [255] * 4 + [0] * 44
+    b = [0] * 4 + [255] * 4 + [0] * 40
+    planner.prepare_crossfade(a, b)
+    target = [128] * 4 + [64] * 4 + [0] * 40
+
+    # Fader levels are unknown straight after connecting
+    assert planner.plan(target)[0] == "faders"
+
+    sf.set_faders([0] * 48)
+    route, commands = planner.plan(target)
+    assert route == "crossfade"
+    assert commands == [("set_crossfader", (128, 64))]
@@ -0,0 +1,80 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from smartersoft import SmarterSoft
+from smartersoft.drivers import control_requests
+from smartersoft.playback import Playback
+
+def clicks(emulator, index):
+    return sum(1 for packet in emulator.packets if packet[4:7] == bytes((index >> 8, index & 0xff, 1)))
+
+def test_steps():
+    sf = SmarterSoft(series="1248", emulate=True)
+    emulator = sf.SmartFade.usbEmulator
+    mappings = sf.SmartFade.controlMappings
+    playback = Playback(sf, length=4)
+
+    playback.go()
+    assert playback.position == 1 and playback.running
+    assert clicks(emulator, mappings["play"]) == 1
+
+    # Jumps are to absolute steps, wrapping forwards
+    assert playback.jump_to(3) == 2
+    assert playback.jump_to(0) == 1
+    assert playback.position == 0
+    assert clicks(emulator, mappings["next"]) == 3
+
+    with pytest.raises(IndexError):
+        playback.jump_to(4)
+    with pytest.raises(IndexError):
+        Playback(sf).jump_to(-1)
+
+    playback.pause()
+    assert not playback.running
+
+def test_console_presses():
+    sf = SmarterSoft(series="1248", emulate=True)
+    mappings = sf.SmartFade.controlMappings
+    playback = Playback(sf, length=4)
+
+    def press(name, state=1):
+        return control_requests.ControlInterface(command=0x14, index=mappings[name], state=state).pack()
+
+    # Releases are ignored, only presses move playback
+    playback.update([press("play") + press("play", 0), press("next"), press("stack")])
+    assert playback.position == 2 and playback.running and playback.stackMode
+
+    sf.SmartFade.usbEmulator.add_event(press("pause"))
+    playback.poll()
+    assert not playback.running
+
+def test_rate_leaves_crossfader():
+    sf = SmarterSoft(series="1248", emulate=True)
+    emulator = sf.SmartFade.usbEmulator
+    playback = Playback(sf)
+    sf.set_crossfader(0, 0)
+
+    playback.set_rate(200)
+    playback.crossfade(64)
+    assert (playback.rate, playback.crossfadeLevel) == (200, 64)
+    assert emulator.controls[sf.SmartFade.faderMappings["crossfader_a"]] == 64
+
+    # The crossfader is no longer known to be where it was set
+    assert sf.crossfaderLevels == [None, None]
+    sf.set_crossfader(0, 0)
+    assert emulator.controls[sf.SmartFade.faderMappings["crossfader_a"]] == 0
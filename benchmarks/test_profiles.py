@@ -0,0 +1,51 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from smartersoft import SmarterSoft
+from smartersoft.profiles import ConsoleProfile, ProfileCache
+
+def payloads(emulator, start):
+    # Without the sequence number, which varies
+    return [packet[2:] for packet in emulator.packets[start:]]
+
+def test_apply_profile(tmp_path):
+    sf = SmarterSoft(series="1248", emulate=True)
+    emulator = sf.SmartFade.usbEmulator
+    cache = ProfileCache(tmp_path)
+
+    profile = ConsoleProfile(labels={0: ["test1", "test2", "test3"], 5: "Front\nWash"}, dmxSpeed=0)
+    assert sf.apply_profile(profile, cache) == 3
+
+    # Captured from the SmartFade software in test.py
+    sent = payloads(emulator, 0)
+    assert sent[0] == bytes.fromhex("0029 0064 5a3c 0000 0000 0001 7f00 0100 3200 3200 00")
+    assert sent[1] == bytes.fromhex(
+        "0009 0003 0600 7400 6500 7300 7400 3100 0000 7400 6500 7300 7400 3200 0000 7400 6500 7300 7400 3300 00")
+
+    # Unchanged, nothing is sent
+    count = emulator.commands
+    assert sf.apply_profile(ConsoleProfile.from_dict(profile.to_dict()), cache) == 0
+    assert emulator.commands == count
+
+    # Only the changed label is sent
+    changed = ConsoleProfile(labels={0: ["test1", "test2", "test3"], 5: "Back\nWash"}, dmxSpeed=0)
+    assert sf.apply_profile(changed, cache) == 1
+    assert emulator.commands == count + 1
+    assert payloads(emulator, count) == [
+        bytes.fromhex("0009 0503 06") + "Back\0\0Wash\0\0\0\0\0\0\0\0".encode("utf-16-be")]
+
+    assert sf.apply_profile(changed, cache, force=True) == 3
+    assert emulator.commands == count + 4
@@ -0,0 +1,82 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+
+from smartersoft import SmarterSoft
+from smartersoft.runner import ShowRunner
+
+def write(path, source, mtime):
+    path.write_text(source)
+    os.utime(path, ns=(mtime, mtime))
+
+def test_reload(tmp_path):
+    script = tmp_path / "show.py"
+    write(script, "def frame(sf, t):\n    return [10] * 4\n", 1)
+
+    sf = SmarterSoft(series="1248", emulate=True)
+    runner = ShowRunner(sf, script)
+    runner.frame(0)
+    assert sf.faderLevels[:4] == [10] * 4
+
+    # Same size and second as before, only the nanoseconds differ
+    write(script, "def frame(sf, t):\n    return [20] * 4\n", 2)
+    assert runner.check()
+    runner.frame(0)
+    assert sf.faderLevels[:4] == [20] * 4
+
+    # Broken edits keep the running script
+    write(script, "def frame(sf, t)\n", 3)
+    assert not runner.check()
+    runner.frame(0)
+    assert runner.errors == 0
+
+def test_reload_helpers(tmp_path):
+    script = tmp_path / "show.py"
+    helper = tmp_path / "show_levels.py"
+    write(helper, "LEVEL = 10\n", 1)
+    write(script, "import show_levels\ndef frame(sf, t):\n    return [show_levels.LEVEL] * 4\n", 1)
+
+    sf = SmarterSoft(series="1248", emulate=True)
+    runner = ShowRunner(sf, script)
+    runner.frame(0)
+    assert sf.faderLevels[:4] == [10] * 4
+
+    # A broken script leaves its helpers untouched as well
+    write(helper, "LEVEL = 20\n", 2)
+    write(script, "import show_levels\ndef frame(sf, t)\n", 2)
+    assert not runner.check()
+    runner.frame(0)
+    assert sf.faderLevels[:4] == [10] * 4
+
+    # Both are swapped in together by the next frame
+    write(script, "import show_levels\ndef frame(sf, t):\n    return [show_levels.LEVEL + 1] * 4\n", 3)
+    assert runner.check()
+    runner.frame(0)
+    assert sf.faderLevels[:4] == [21] * 4
+
+    # Edits to the helper alone are picked up too
+    write(helper, "LEVEL = 30\n", 4)
+    assert runner.check()
+    runner.frame(0)
+    assert sf.faderLevels[:4] == [31] * 4
+
+def test_check(benchmark, tmp_path):
+    script = tmp_path / "show.py"
+    script.write_text("def frame(sf, t):\n    return None\n")
+
+    runner = ShowRunner(SmarterSoft(series="1248", emulate=True), script)
+    assert not benchmark(runner.check)
@@ -0,0 +1,52 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from smartersoft import SmarterSoft
+from smartersoft.scenes import SceneLibrary
+
+looks = {
+    "warm": [255 if i % 4 == 0 else 40 for i in range(48)],
+    "cold": [255 if i % 4 == 2 else 0 for i in range(48)],
+}
+
+def test_recall_matches_set_faders():
+    replayed = SmarterSoft(series="1248", emulate=True)
+    direct = SmarterSoft(series="1248", emulate=True)
+
+    library = SceneLibrary(replayed)
+    for name, levels in looks.items():
+        library.store(name, levels)
+
+    for name in ("warm", "cold", "warm", "cold", "warm"):
+        library.recall(name)
+        direct.set_faders(looks[name])
+
+    assert library.hits == 2
+    assert replayed.SmartFade.usbEmulator.packets == direct.SmartFade.usbEmulator.packets
+    assert replayed.faderLevels == direct.faderLevels
+    assert replayed.faderPage == direct.faderPage
+
+def test_recall(benchmark, smartersoft):
+    library = SceneLibrary(smartersoft)
+    for name, levels in looks.items():
+        library.store(name, levels)
+
+    names = iter(("warm", "cold") * 100000)
+    benchmark(lambda: library.recall(next(names)))
+
+def test_set_faders_switch(benchmark, smartersoft):
+    frames = iter((looks["warm"], looks["cold"]) * 100000)
+    benchmark(lambda: smartersoft.set_faders(next(frames)))
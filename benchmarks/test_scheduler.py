@@ -0,0 +1,66 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import time
+
+from smartersoft import SmarterSoft
+from smartersoft.scheduler import CueScheduler
+
+def test_latency_estimate():
+    sf = SmarterSoft(series="1248", emulate=True)
+    smartfade = sf.SmartFade
+    assert smartfade.latency == 0
+
+    smartfade.measure_latency()
+    sf.set_fader(0, 255)
+    assert smartfade.latency == smartfade.sendLatency + smartfade.statusRoundTrip / 2 > 0
+
+def test_lead_feedback():
+    sf = SmarterSoft(series="1248", emulate=True)
+    scheduler = CueScheduler(sf, gain=0.5)
+
+    # Landing 10ms late pulls the next cue 5ms earlier
+    residual = scheduler.dispatch(time.monotonic() - 0.01, sf.set_fader, (0, 255))
+    assert residual >= 0.01
+    assert scheduler.lead >= 0.005
+    assert scheduler.late == 1
+
+    scheduler.at(time.monotonic() + 60, sf.set_fader, 1, 255)
+    scheduler.at(time.monotonic() - 1, sf.set_fader, 2, 255)
+    assert scheduler.run_pending() > time.monotonic()
+    assert sf.faderLevels[1:3] == [None, 255]
+
+def test_cue_errors():
+    sf = SmarterSoft(series="1248", emulate=True)
+    scheduler = CueScheduler(sf)
+
+    # A failing cue is counted and the ones after it still run
+    scheduler.at(time.monotonic() - 2, sf.set_fader, 0, 300)
+    scheduler.at(time.monotonic() - 1, sf.set_fader, 1, 255)
+    assert scheduler.run_pending() is None
+    assert scheduler.errors == 1
+    assert scheduler.dispatched == 1
+    assert sf.faderLevels[:2] == [None, 255]
+
+def test_run_pending(benchmark, smartersoft):
+    scheduler = CueScheduler(smartersoft)
+    levels = iter(range(10000000))
+
+    def cue():
+        scheduler.at(0, smartersoft.set_fader, 0, next(levels) % 256)
+        scheduler.run_pending()
+
+    benchmark(cue)
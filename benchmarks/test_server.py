@@ -0,0 +1,125 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import json
+import struct
+
+from smartersoft import SmarterSoft
+from smartersoft.server import RemoteServer
+
+class Writer():
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+def read_frames(server, data):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        writer = Writer()
+        frames = []
+        try:
+            async for frame in server._ws_frames(reader, writer):
+                frames.append(frame)
+        except asyncio.IncompleteReadError:
+            pass
+        return frames, writer.data
+    return asyncio.run(read())
+
+def test_press_and_release_kept():
+    sf = SmarterSoft(series="1248", emulate=True)
+    server = RemoteServer(sf, oscPort=None, wsPort=None)
+    server.submit("set_fader", [3, 10])
+    server.submit("press_button", ["blackout"])
+    server.submit("release_button", ["blackout"])
+    server.submit("set_fader_bump", [5, 255])
+    server.submit("set_fader_bump", [5, 0])
+    server.submit("set_fader", [3, 20])
+
+    assert [(method, args) for method, args, _ in server._pending.values()] == [
+        ("set_fader", [3, 20]), ("press_button", ["blackout"]), ("release_button", ["blackout"]),
+        ("set_fader_bump", [5, 255]), ("set_fader_bump", [5, 0])]
+
+def test_apply_in_order():
+    sf = SmarterSoft(series="1248", emulate=True)
+    server = RemoteServer(sf, oscPort=None, wsPort=None, pollEvents=False)
+    emulator = sf.SmartFade.usbEmulator
+
+    batch = [
+        ("set_fader", [0, 10], None), ("set_fader", [1, 20], None),
+        ("click_button", ["blackout"], None),
+        ("set_fader_bump", [2, 255], None), ("set_fader_bump", [2, 0], None),
+        ("set_fader", [0, 30], None), ("set_fader", [99, 1], "client")]
+    applied, errors, _ = server._apply(batch)
+
+    assert applied == [(method, args) for method, args, _ in batch[:-1]]
+    assert errors == [("client", "set_fader", "Attempted to access a fader number that does not exist")]
+    assert sf.faderLevels[:2] == [30, 20]
+
+    # The bump flashed rather than collapsing into its release
+    bump = sf.SmartFade.faderMappings["bumps"][2].to_bytes(2, "big")
+    assert [packet[-1] for packet in emulator.packets if packet[4:6] == bump] == [255, 0]
+
+def test_ws_bad_messages():
+    sf = SmarterSoft(series="1248", emulate=True)
+    server = RemoteServer(sf, oscPort=None, wsPort=None)
+
+    def frame(text):
+        payload = text.encode()
+        return bytes((0x81, 0x80 | len(payload))) + bytes(4) + payload
+
+    async def connect():
+        reader = asyncio.StreamReader()
+        reader.feed_data(
+            b"GET / HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n"
+            + frame('[1, {"method": "set_fader", "args": 5}]')
+            + frame('"hello"')
+            + frame('{"method": "set_fader", "args": [3, 255]}'))
+        reader.feed_eof()
+        writer = Writer()
+        await server._ws_client(reader, writer)
+        return writer.data
+
+    sent = asyncio.run(connect())
+    errors = [json.loads(part[part.index(b"{"):]) for part in sent.split(b"\x81")[1:]]
+    assert [error["method"] for error in errors] == ["parse", "set_fader", "parse"]
+    assert list(server._pending.values()) == [("set_fader", [3, 255], server._pending[("fader", 3)][2])]
+
+def test_ws_frames():
+    sf = SmarterSoft(series="1248", emulate=True)
+    server = RemoteServer(sf, oscPort=None, wsPort=None)
+
+    mask = bytes((1, 2, 3, 4))
+    payload = b'{"method": "subscribe"}'
+    masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    frames, _ = read_frames(server, bytes((0x81, 0x80 | len(payload))) + mask + masked)
+    assert frames == [(0x1, payload.decode())]
+
+    # An oversized length is refused before anything is buffered
+    frames, sent = read_frames(server, bytes((0x82, 0x7f)) + struct.pack(">Q", 1 << 62))
+    assert frames == []
+    assert sent == bytes((0x88, 2)) + struct.pack(">H", 1009)
@@ -0,0 +1,52 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import gc
+
+from smartersoft import SmarterSoft
+
+def test_show_mode_restores_gc():
+    sf = SmarterSoft(series="1248", emulate=True)
+    threshold = gc.get_threshold()
+    gc.set_threshold(1000, 20, 20)
+    assert gc.isenabled() and gc.get_freeze_count() == 0
+
+    try:
+        with sf.show_mode() as show:
+            assert not gc.isenabled()
+            assert gc.get_freeze_count() > 0
+
+            gc.collect(0)
+            kept = [[] for _ in range(1000)]
+
+        assert gc.isenabled()
+        assert gc.get_threshold() == (1000, 20, 20)
+        assert gc.get_freeze_count() == 0
+
+        assert show.report["gc_collections"] == 1
+        assert show.report["gc_generations"] == [0]
+        assert show.report["gc_objects"] > 0
+        assert show.report["allocated_blocks"] > 0
+        assert len(kept) == 1000
+
+        # A GC that was already disabled stays disabled
+        gc.disable()
+        with sf.show_mode():
+            pass
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+        gc.set_threshold(*threshold)
@@ -0,0 +1,58 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+def test_set_fader(benchmark, smartersoft):
+    benchmark(smartersoft.set_fader, 30, 128)
+    assert smartersoft.faderLevels[30] == 128
+
+def test_set_fader_change_page(benchmark, smartersoft):
+    benchmark(smartersoft.set_fader, 30, 128, change_page=True)
+    assert smartersoft.faderPage == "25-48"
+
+def test_set_fader_invalid(benchmark, smartersoft):
+    def invalid():
+        try:
+            smartersoft.set_fader(12, 256)
+        except ValueError:
+            pass
+        else:
+            pytest.fail("set_fader accepted an invalid level")
+
+    benchmark(invalid)
+
+def test_set_fader_bump(benchmark, smartersoft):
+    benchmark(smartersoft.set_fader_bump, 30, 1)
+
+def test_set_memory(benchmark, smartersoft):
+    benchmark(smartersoft.set_memory, 3, 128, memPage=2, change_page=True)
+
+def test_set_faders_frame(benchmark, smartersoft):
+    frames = [[level] * smartersoft.SmartFade.numFaders for level in (0, 255)]
+
+    def send():
+        # Alternate frames so every fader changes every time
+        frames.reverse()
+        return smartersoft.set_faders(frames[0])
+
+    assert benchmark(send) == smartersoft.SmartFade.numFaders
+
+def test_set_faders_unchanged(benchmark, smartersoft):
+    frame = [128] * smartersoft.SmartFade.numFaders
+    smartersoft.set_faders(frame)
+
+    assert benchmark(smartersoft.set_faders, frame) == 0
@@ -0,0 +1,75 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import struct
+import threading
+
+from smartersoft import SmarterSoft
+from smartersoft.smartfades import SmartFade1248
+
+def send_from_threads(sf, threads, count):
+    def send(thread):
+        # Half the threads pack into their own preallocated messages
+        if thread % 2:
+            sf.preallocate()
+        for state in range(count):
+            sf.send_control(thread, state)
+            if state % 50 == 0:
+                sf.read_status()
+
+    workers = [threading.Thread(target=send, args=(thread,)) for thread in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+def test_threaded_sends_in_order(benchmark):
+    sf = SmartFade1248()
+    sf.attach_emulator()
+    emulator = sf.usbEmulator
+
+    benchmark.pedantic(send_from_threads, args=(sf, 4, 200), rounds=1)
+
+    # Sequence numbers reached the console in order, with none missed
+    seqNums = [struct.unpack_from("<H", packet)[0] for packet in emulator.packets]
+    assert seqNums == list(range(800))
+    assert sf.usbSeqNum == 800
+    assert emulator.commands == 800
+
+    # Each thread's controls arrived in the order it sent them
+    for thread in range(4):
+        states = [packet[-1] for packet in emulator.packets
+                  if struct.unpack_from(">H", packet, 4)[0] == thread]
+        assert states == list(range(200))
+
+def test_threaded_pages():
+    sf = SmarterSoft(series="1248", emulate=True)
+    emulator = sf.SmartFade.usbEmulator
+
+    # Faders on different pages, so every set changes page first
+    def send(faderNum):
+        for level in range(1, 256):
+            sf.set_faders({faderNum: level})
+
+    workers = [threading.Thread(target=send, args=(faderNum,)) for faderNum in (0, 30)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sf.faderLevels[0] == sf.faderLevels[30] == 255
+    outputs = [index for index, level in enumerate(emulator.faders) if level]
+    assert outputs == [0, 30]
@@ -0,0 +1,123 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from smartersoft import SmarterSoft
+from smartersoft.timecode import (Cue, CueTimeline, LtcDecoder, MtcDecoder, TimecodeChase,
+    parse_timecode, timecode_to_seconds)
+
+def ltc_bits(hours, minutes, seconds, frames):
+    bits = [0] * 80
+    for start, value, length in (
+            (0, frames % 10, 4), (8, frames // 10, 2), (16, seconds % 10, 4), (24, seconds // 10, 3),
+            (32, minutes % 10, 4), (40, minutes // 10, 3), (48, hours % 10, 4), (56, hours // 10, 2)):
+        for i in range(length):
+            bits[start + i] = (value >> i) & 1
+    bits[64:] = [int(bit) for bit in "0011111111111101"]
+    return bits
+
+def ltc_audio(start, count, fps=25, sampleRate=48000):
+    # Biphase mark coding, a transition every bit and mid-bit for a 1
+    period = sampleRate / (fps * 80)
+    samples = []
+    level = 1.0
+    position = 0.0
+    for frameNum in range(start, start + count):
+        totalSeconds, frames = divmod(frameNum, fps)
+        for bit in ltc_bits(totalSeconds // 3600, totalSeconds // 60 % 60, totalSeconds % 60, frames):
+            for half in range(2):
+                position += period / 2
+                samples += [level * 0.5] * (round(position) - len(samples))
+                if half == 0 or bit:
+                    level = -level
+    return np.array(samples, dtype=np.float32)
+
+def test_ltc_decode():
+    audio = ltc_audio(25 * 3600, 10)
+    decoder = LtcDecoder(48000)
+    frames = []
+    for offset in range(0, len(audio), 1024):
+        frames += [seconds for seconds, _ in decoder.process(audio[offset:offset + 1024])]
+
+    # The last frame ends on its final half bit, only seen at the next edge
+    assert len(frames) == 9
+    assert np.allclose(np.diff(frames), 1 / 25)
+    assert abs(frames[-1] - (3600 + 9 / 25)) < 1e-9
+
+def test_mtc_decode():
+    decoder = MtcDecoder()
+
+    # 01:02:03:04 at 25fps, as quarter frames then a full frame
+    values = [4, 0, 3, 0, 2, 0, 1, 0b0010]
+    quarter = bytes(byte for piece, value in enumerate(values) for byte in (0xf1, piece << 4 | value))
+    times = decoder.feed(quarter + bytes([0xf8, 0xf0, 0x7f, 0x7f, 0x01, 0x01, 0x21, 2, 3, 4, 0xf7]))
+
+    expected = timecode_to_seconds(1, 2, 3, 4, 25)
+    assert decoder.fps == 25
+    assert times == [expected + 7 / 100, expected]
+
+def test_drop_frame():
+    assert parse_timecode("00:10:00;00", 30) == 17982 * 1001 / 30000
+
+def make_timeline(smartfade, count):
+    cues = [Cue(i, {i % smartfade.numFaders: 255, (i + 1) % smartfade.numFaders: 0},
+        {(i % 2, 0): i % 256}, fade=0.5) for i in range(count)]
+    return CueTimeline(cues, smartfade.numFaders, smartfade.numMems, smartfade.numMemPages)
+
+def test_chase_jumps():
+    sf = SmarterSoft(series="1248", emulate=True)
+    chase = TimecodeChase(sf, make_timeline(sf.SmartFade, 100))
+
+    chase.locate(50.75)
+    assert chase.cue == 50
+    assert sf.faderLevels[2] == 255 and sf.faderLevels[3] == 0
+
+    # Half way through the fade from cue 9 to 10
+    chase.locate(10.25)
+    assert chase.cue == 10
+    assert sf.faderLevels[10] == 128
+
+    assert chase.locate(10.25) == 0
+
+def test_chase_rewind():
+    sf = SmarterSoft(series="1248", emulate=True)
+    cues = [Cue(10, {0: 255}, {(1, 2): 200}), Cue(20, {1: 128})]
+    timeline = CueTimeline(cues, 48, sf.SmartFade.numMems, sf.SmartFade.numMemPages)
+    chase = TimecodeChase(sf, timeline)
+
+    chase.locate(25)
+    assert sf.faderLevels[:3] == [255, 128, None]
+
+    # Back before fader 1's cue, and then before any cue
+    chase.locate(15)
+    assert sf.faderLevels[:3] == [255, 0, None]
+    chase.locate(5)
+    assert chase.cue == -1
+    assert sf.faderLevels[:3] == [0, 0, None]
+    assert chase._memories[sf.SmartFade.numMems + 2] == 0
+
+    # Without a default, uncued levels are left where they were
+    chase = TimecodeChase(sf, timeline, default=None)
+    chase.locate(25)
+    chase.locate(5)
+    assert sf.faderLevels[:2] == [255, 128]
+
+def test_timeline_seek(benchmark, smartersoft):
+    timeline = make_timeline(smartersoft.SmartFade, 10000)
+    times = iter(np.random.default_rng(1).uniform(0, 10000, 1000000).tolist())
+
+    benchmark(lambda: timeline.state(next(times)))
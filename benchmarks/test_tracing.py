@@ -0,0 +1,52 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+
+from smartersoft import SmarterSoft, tracing
+
+def test_trace_file(tmp_path):
+    sf = SmarterSoft(series="1248", emulate=True)
+    path = tmp_path / "trace.json"
+
+    with tracing.Tracer() as tracer:
+        sf.set_faders({0: 255, 1: 128})
+    sf.set_fader(2, 255)
+    tracer.dump(path)
+
+    events = json.loads(path.read_text())["traceEvents"]
+    names = [event["name"] for event in events]
+    assert names.count("SmarterSoft.set_faders") == 1
+    # A page click, press and release, then the two faders
+    assert names.count("write payload") == 4
+    assert "SmarterSoft.set_fader" not in names
+
+    # Sends are nested inside the call that made them
+    outer = events[names.index("SmarterSoft.set_faders")]
+    for event in events:
+        assert event["ph"] == "X" and event["pid"] == outer["pid"]
+        assert outer["ts"] <= event["ts"] and event["ts"] + event["dur"] <= outer["ts"] + outer["dur"] + 0.001
+
+def test_sampling():
+    sf = SmarterSoft(series="1248", emulate=True)
+
+    with tracing.Tracer(sampleEvery=4) as tracer:
+        for level in range(8):
+            sf.set_fader(0, level)
+
+    names = [event["name"] for event in tracer.events()]
+    assert names.count("SmarterSoft.set_fader") == 2
+    assert names.count("write payload") == 2
@@ -0,0 +1,345 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Command line interface, run with python -m smartersoft.
+"""
+
+import argparse
+import sys
+import time
+
+from .smartersoft import SmarterSoft
+
+def connect(args):
+    """
+    Connects to the SmartFade selected by the common arguments.
+    """
+    sf = SmarterSoft(series=args.series, index=args.index, emulate=args.emulate)
+    if sf.SmartFade is None:
+        sys.exit(1)
+    if args.journal:
+        sf.attach_journal(args.journal)
+    return sf
+
+def set_control(args):
+    with connect(args) as sf:
+        if args.control == "fader":
+            sf.set_fader(args.num, args.value, change_page=True)
+        elif args.control == "bump":
+            sf.set_fader_bump(args.num, args.value, change_page=True)
+        elif args.control == "memory":
+            sf.set_memory(args.num, args.value, memPage=args.page, change_page=args.page is not None)
+        elif args.control == "memory_bump":
+            sf.set_memory_bump(args.num, args.value, memPage=args.page, change_page=args.page is not None)
+
+def button(args):
+    with connect(args) as sf:
+        sf.click_button(args.name)
+
+def fade(args):
+    with connect(args) as sf:
+        steps = max(1, round(args.time * args.rate))
+        start = time.monotonic()
+
+        for step in range(steps + 1):
+            level = round(args.start + (args.to - args.start) * step / steps)
+            sf.set_faders({faderNum: level for faderNum in args.faders})
+
+            delay = start + step / args.rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+def page(args):
+    with connect(args) as sf:
+        if args.kind == "fader":
+            sf.goto_fader_page(args.num)
+        else:
+            sf.goto_memory_page(args.num)
+
+def go(args):
+    from .playback import Playback
+
+    with connect(args) as sf:
+        playback = Playback(sf)
+        if args.rate is not None:
+            playback.set_rate(args.rate)
+        if args.step is not None:
+            if args.step < 0:
+                raise ValueError("Attempted to skip a negative number of steps")
+            for _ in range(args.step):
+                playback.next()
+        playback.go()
+
+def decode(args):
+    from .capture import CaptureDecoder, CaptureStats
+
+    device = tuple(int(part) for part in args.device.split(".")) if args.device else None
+    decoder = CaptureDecoder(device=device, series=args.series)
+    stats = CaptureStats()
+
+    with open(args.capture, "rb") as f:
+        for message in decoder.decode(f):
+            if args.stats:
+                stats.add(message)
+            elif not args.kind or message.kind in args.kind:
+                print(message)
+
+    if args.stats:
+        print("\n".join(stats.report()))
+
+def monitor(args):
+    with connect(args) as sf:
+        usb = sf.SmartFade
+        lastTime = time.monotonic()
+        last = (usb.cmdCount, usb.byteCount, usb.writeTime)
+
+        try:
+            while True:
+                for event in usb.poll_events():
+                    print(f"{time.strftime('%H:%M:%S')} event {event.hex(' ')}")
+
+                now = time.monotonic()
+                if now - lastTime >= args.interval:
+                    cmds = usb.cmdCount - last[0]
+                    writeTime = usb.writeTime - last[2]
+                    print(f"{time.strftime('%H:%M:%S')} "
+                        f"{cmds / (now - lastTime):.1f} cmd/s "
+                        f"{(usb.byteCount - last[1]) / (now - lastTime):.0f} B/s "
+                        f"{writeTime / cmds * 1000 if cmds else 0:.3f} ms/cmd "
+                        f"{usb.latency * 1000:.3f} ms latency")
+                    lastTime = now
+                    last = (usb.cmdCount, usb.byteCount, usb.writeTime)
+
+                time.sleep(args.poll)
+        except KeyboardInterrupt:
+            pass
+
+def outputs(args):
+    from .outputs import OutputMonitor
+
+    with connect(args) as sf:
+        monitor = OutputMonitor(sf, channels=args.channels, rate=args.rate).start()
+        try:
+            while True:
+                time.sleep(args.interval)
+                times, frames = monitor.downsample(args.interval, start=-args.interval, how="max")
+                if len(frames):
+                    levels = " ".join(f"{level:3d}" for level in frames[-1].tolist())
+                    print(f"{time.strftime('%H:%M:%S')} {levels}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            monitor.stop()
+
+def bench(args):
+    from .bench import measure_startup, measure_controls
+
+    sf, startup = measure_startup(args.series, args.index, args.emulate)
+    if sf.SmartFade is None:
+        sys.exit(1)
+
+    with sf:
+        result = measure_controls(sf, args.seconds)
+
+    print(f"startup:     {startup * 1000:.1f} ms")
+    print(f"controls:    {result['controls']} in {args.seconds} s")
+    print(f"sustained:   {result['controls_per_sec']:.0f} controls/s, {result['commands_per_sec']:.0f} usb commands/s")
+    print(f"latency:     p50 {result['p50_ms']:.3f} ms, p90 {result['p90_ms']:.3f} ms, "
+        f"p99 {result['p99_ms']:.3f} ms, max {result['max_ms']:.3f} ms")
+
+def audio(args):
+    from .audio import SoundToLight, wav_blocks, pcm_blocks
+
+    if args.input == "-":
+        blocks = pcm_blocks(sys.stdin.buffer, args.block, args.sample_rate, args.sample_width, args.channels)
+    else:
+        blocks = wav_blocks(args.input, args.block)
+
+    with connect(args) as sf:
+        engine = SoundToLight(sf, range(args.fader, args.fader + args.bands), args.bumps,
+            maxLatency=args.max_latency, bands=args.bands)
+        try:
+            engine.run(blocks, realtime=args.input != "-")
+        except KeyboardInterrupt:
+            pass
+
+    print(f"{engine.blocks} blocks, {engine.beats} beats, {engine.dropped} dropped, "
+        f"worst latency {engine.maxLatencySeen * 1000:.1f} ms")
+
+def timecode(args):
+    from .audio import wav_blocks, pcm_blocks
+    from .timecode import CueTimeline, TimecodeChase
+
+    with connect(args) as sf:
+        chase = TimecodeChase(sf, CueTimeline.load(args.cues, sf.SmartFade))
+        try:
+            if args.mtc:
+                with (open(args.mtc, "rb") if args.mtc != "-" else sys.stdin.buffer) as stream:
+                    chase.run_mtc(stream)
+            elif args.ltc == "-":
+                blocks = pcm_blocks(sys.stdin.buffer, 256, args.sample_rate, args.sample_width, args.channels)
+                chase.run_ltc(blocks, args.fps, realtime=False)
+            else:
+                chase.run_ltc(wav_blocks(args.ltc, 256), args.fps)
+        except KeyboardInterrupt:
+            pass
+
+    print(f"{chase.locates} locates, {chase.sent} faders and memories sent")
+
+def run(args):
+    from .runner import ShowRunner
+
+    with connect(args) as sf:
+        runner = ShowRunner(sf, args.script, rate=args.rate)
+        runner.run()
+
+    print(f"{runner.frames} frames, {runner.reloads} reloads, {runner.errors} errors")
+
+def serve(args):
+    from .server import RemoteServer
+
+    with connect(args) as sf:
+        RemoteServer(sf, host=args.host, oscPort=args.osc_port, wsPort=args.ws_port,
+            rate=args.rate, pollEvents=not args.no_events).run()
+
+def daemon(args):
+    from .daemon import ConsoleDaemon
+
+    with connect(args) as sf, ConsoleDaemon(sf, name=args.name, rate=args.rate) as d:
+        print(f"Publishing shared frame {args.name}")
+        d.run()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="smartersoft", description="SmartFade control from the command line.")
+    parser.add_argument("--series", default=None, help="only connect to this SmartFade series, e.g. 1248")
+    parser.add_argument("--index", type=int, default=0, help="connect to the n'th SmartFade of the series")
+    parser.add_argument("--emulate", action="store_true", help="use the built-in emulator instead of a console")
+    parser.add_argument("--journal", metavar="FILE", default=None, help="keep console state in a crash-safe journal and resume from it")
+    parser.add_argument("--trace", metavar="FILE", default=None, help="write a Chrome trace of the command pipeline")
+    parser.add_argument("--trace-sample", type=int, default=1, metavar="N", help="only trace every N'th call")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("set", help="set a fader, bump or memory")
+    p.add_argument("control", choices=("fader", "bump", "memory", "memory_bump"))
+    p.add_argument("num", type=int, help="fader or memory number, from 0")
+    p.add_argument("value", type=int, help="level or bump state 0-255")
+    p.add_argument("--page", type=int, default=None, help="memory page to change to")
+    p.set_defaults(func=set_control)
+
+    p = subparsers.add_parser("button", help="click a named button")
+    p.add_argument("name")
+    p.set_defaults(func=button)
+
+    p = subparsers.add_parser("fade", help="fade faders from the host")
+    p.add_argument("faders", type=int, nargs="+", help="fader numbers, from 0")
+    p.add_argument("--to", type=int, required=True, help="final level 0-255")
+    p.add_argument("--from", dest="start", type=int, default=0, help="starting level 0-255")
+    p.add_argument("--time", type=float, default=3, help="fade time in seconds")
+    p.add_argument("--rate", type=float, default=30, help="steps per second")
+    p.set_defaults(func=fade)
+
+    p = subparsers.add_parser("page", help="change fader or memory page")
+    p.add_argument("kind", choices=("fader", "memory"))
+    p.add_argument("num", type=int, help="fader number to show the page of, or memory page")
+    p.set_defaults(func=page)
+
+    p = subparsers.add_parser("go", help="play the next step of the consoles own sequence")
+    p.add_argument("--step", type=int, help="steps to skip with next before playing the step after them")
+    p.add_argument("--rate", type=int, help="playback rate 0-255 to set first")
+    p.set_defaults(func=go)
+
+    p = subparsers.add_parser("decode", help="decode SmartFade traffic from a usbmon pcap/pcapng capture")
+    p.add_argument("capture")
+    p.add_argument("--stats", action="store_true", help="print statistics instead of every message")
+    p.add_argument("--device", help="only decode this bus.device, e.g. 3.12")
+    p.add_argument("--kind", nargs="*", help="only print these kinds, e.g. ControlInterface Event")
+    p.set_defaults(func=decode)
+
+    p = subparsers.add_parser("monitor", help="tail console events and send path metrics")
+    p.add_argument("--interval", type=float, default=1, help="seconds between metric lines")
+    p.add_argument("--poll", type=float, default=0.02, help="seconds between event polls")
+    p.set_defaults(func=monitor)
+
+    p = subparsers.add_parser("outputs", help="read back the console's output levels")
+    p.add_argument("--rate", type=float, default=20, help="detailed status polls per second")
+    p.add_argument("--interval", type=float, default=1, help="seconds between printed lines, each the highest levels seen")
+    p.add_argument("--channels", type=int, default=None, help="output channels to show, one per fader by default")
+    p.set_defaults(func=outputs)
+
+    p = subparsers.add_parser("bench", help="measure startup, sustained rate and latency")
+    p.add_argument("--seconds", type=float, default=5)
+    p.set_defaults(func=bench)
+
+    p = subparsers.add_parser("serve", help="serve OSC and WebSocket remote control")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--osc-port", type=int, default=8000)
+    p.add_argument("--ws-port", type=int, default=8001)
+    p.add_argument("--rate", type=float, default=30, help="frames sent to the console per second")
+    p.add_argument("--no-events", action="store_true", help="do not poll the console for events")
+    p.set_defaults(func=serve)
+
+    p = subparsers.add_parser("audio", help="sound to light from a WAV file or raw PCM on stdin")
+    p.add_argument("input", help="WAV file, or - for raw little-endian PCM on stdin")
+    p.add_argument("--block", type=int, default=1024, help="samples per FFT block")
+    p.add_argument("--bands", type=int, default=8)
+    p.add_argument("--fader", type=int, default=0, help="fader for the lowest band, the rest follow")
+    p.add_argument("--bumps", type=int, nargs="*", default=[], help="fader bumps to flash on beats")
+    p.add_argument("--max-latency", type=float, default=0.1, help="seconds behind before blocks are dropped")
+    p.add_argument("--sample-rate", type=int, default=44100, help="raw PCM sample rate")
+    p.add_argument("--sample-width", type=int, default=2, help="raw PCM bytes per sample")
+    p.add_argument("--channels", type=int, default=1, help="raw PCM channels")
+    p.set_defaults(func=audio)
+
+    p = subparsers.add_parser("timecode", help="chase a cue timeline from LTC or MTC")
+    p.add_argument("cues", help="JSON cue timeline")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ltc", help="WAV file, or - for raw little-endian PCM on stdin")
+    source.add_argument("--mtc", help="raw MIDI device or file, or - for stdin")
+    p.add_argument("--fps", type=int, help="LTC frame rate, estimated if not given")
+    p.add_argument("--sample-rate", type=int, default=48000, help="raw PCM sample rate")
+    p.add_argument("--sample-width", type=int, default=2, help="raw PCM bytes per sample")
+    p.add_argument("--channels", type=int, default=1, help="raw PCM channels")
+    p.set_defaults(func=timecode)
+
+    p = subparsers.add_parser("run", help="run a show script, reloading it whenever it is edited")
+    p.add_argument("script", help="Python file with a frame(sf, t) function")
+    p.add_argument("--rate", type=float, default=40, help="frames per second")
+    p.set_defaults(func=run)
+
+    p = subparsers.add_parser("daemon", help="own the console and publish a shared memory frame")
+    p.add_argument("--name", default="smartersoft", help="shared memory block name")
+    p.add_argument("--rate", type=float, default=40, help="ticks per second")
+    p.set_defaults(func=daemon)
+
+    args = parser.parse_args(argv)
+
+    tracer = None
+    if args.trace:
+        from .tracing import Tracer
+        tracer = Tracer(sampleEvery=args.trace_sample).start()
+
+    try:
+        args.func(args)
+    except (IndexError, KeyError, ValueError) as e:
+        parser.exit(2, f"{parser.prog}: error: {str(e)}\n")
+    finally:
+        if tracer is not None:
+            tracer.stop()
+            tracer.dump(args.trace)
+
+if __name__ == "__main__":
+    main()
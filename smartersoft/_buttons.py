@@ -18,6 +18,11 @@
 Any functions that control a physical button.
 """
 
+from . import tracing
+from .journal import journaled
+
+@tracing.traced("SmarterSoft.set_fader_bump")
+@journaled
 def set_fader_bump(self, faderNum, state, change_page=False):
     """
     Sets the bump for a given fader.
@@ -32,13 +37,59 @@ def set_fader_bump(self, faderNum, state, change_page=False):
     if not 0 <= state <= 255:
         raise ValueError("Attempted to set a fader bump to a value outside its range")
 
+    pageName, relFaderNum = self.SmartFade.find_fader_page(faderNum)
+
     if change_page:
-        faderNum = self.goto_fader_page(faderNum)
-    else:
-        _, faderNum = self.SmartFade.find_fader_page(faderNum)
-        
-    self.SmartFade.set_bump(faderNum, state)
-    
+        self.goto_fader_page(faderNum)
+    elif self.faderPage not in (None, pageName):
+        # Without changing page the bump lands on the page being shown
+        faderNum = self.SmartFade.page_offset(self.faderPage) + relFaderNum
+
+    self.SmartFade.set_bump(relFaderNum, state)
+    self.bumpStates[faderNum] = state
+
+@tracing.traced("SmarterSoft.set_fader_bumps")
+@journaled
+def set_fader_bumps(self, states):
+    """
+    Sets many fader bumps at once, changing pages as needed.
+    States is either a sequence of states starting at fader 0 (None to skip
+    a bump), or a dictionary of fader number to state.
+
+    Only states that differ from the last ones sent are sent.
+    Returns the number of bumps sent.
+
+    NOTE: Changing page releases any active bumps, so only the bumps on
+    the last page switched to stay active.
+    """
+    items = states.items() if isinstance(states, dict) else enumerate(states)
+
+    pages = {}
+    for faderNum, state in items:
+        if not 0 <= faderNum < self.SmartFade.numFaders:
+            raise IndexError("Attempted to access a fader number that does not exist")
+        if state is None or self.bumpStates[faderNum] == state:
+            continue
+        if not 0 <= state <= 255:
+            raise ValueError("Attempted to set a fader bump to a value outside its range")
+
+        pageName, relFaderNum = self.SmartFade.find_fader_page(faderNum)
+        pages.setdefault(pageName, []).append((faderNum, relFaderNum, int(state)))
+
+    sent = 0
+    for pageName in sorted(pages, key=lambda page: page != self.faderPage):
+        if pageName != self.faderPage:
+            self.goto_fader_page(self.SmartFade.page_offset(pageName))
+
+        for faderNum, relFaderNum, state in pages[pageName]:
+            self.SmartFade.set_bump(relFaderNum, state)
+            self.bumpStates[faderNum] = state
+            sent += 1
+
+    return sent
+
+@tracing.traced("SmarterSoft.set_memory_bump")
+@journaled
 def set_memory_bump(self, memNum, state, memPage=None, change_page=False):
     """
     Sets the state of a given memory or sequence bump on a memory page.
@@ -52,7 +103,7 @@ def set_memory_bump(self, memNum, state, memPage=None, change_page=False):
         raise IndexError("Attempted to access a memory bump number that does not exist")
     if not 0 <= state <= 255:
         raise ValueError("Attempted to set a memory bump to a value outside its range")
-    if not 0 <= memPage < self.SmartFade.numMemPages and change_page == True:
+    if change_page == True and not 0 <= memPage < self.SmartFade.numMemPages:
         raise IndexError("Attempted to access a memory page number that does not exist")
 
     if change_page:
@@ -60,6 +111,8 @@ def set_memory_bump(self, memNum, state, memPage=None, change_page=False):
 
     self.SmartFade.set_bump(memNum, state)
 
+@tracing.traced("SmarterSoft.goto_fader_page", "page")
+@journaled
 def goto_fader_page(self, faderNum):
     """
     Switches to the correct page for the fader.
@@ -72,9 +125,15 @@ def goto_fader_page(self, faderNum):
     pageName, relFaderNum = self.SmartFade.find_fader_page(faderNum)
     
     self.SmartFade.click_button(pageName)
-    
+
+    # Changing page releases any active bumps
+    self.faderPage = pageName
+    self.bumpStates = [0] * self.SmartFade.numFaders
+
     return relFaderNum
 
+@tracing.traced("SmarterSoft.goto_memory_page", "page")
+@journaled
 def goto_memory_page(self, memPage):
     """
     Switches to the given memory page by pressing and holding the
@@ -89,3 +148,42 @@ def goto_memory_page(self, memPage):
     self.SmartFade.set_bump(memPage, False)
     self.SmartFade.release_button("memories")
 
+@tracing.traced("SmarterSoft.press_button")
+@journaled
+def press_button(self, btnName):
+    """
+    Presses and holds a named button, e.g. "blackout" or "memories".
+    """
+    if btnName not in self.SmartFade.controlMappings:
+        raise KeyError(f"Attempted to press a button that does not exist: {btnName}")
+
+    self.SmartFade.press_button(btnName)
+
+    # Toggle buttons flip on each press
+    if btnName in self.toggleStates and self.toggleStates[btnName] is not None:
+        self.toggleStates[btnName] = not self.toggleStates[btnName]
+
+@tracing.traced("SmarterSoft.release_button")
+@journaled
+def release_button(self, btnName):
+    """
+    Releases a named button.
+    """
+    if btnName not in self.SmartFade.controlMappings:
+        raise KeyError(f"Attempted to release a button that does not exist: {btnName}")
+
+    self.SmartFade.release_button(btnName)
+
+    # Page buttons change page on release
+    if any(page[1] == btnName for page in self.SmartFade.faderPages):
+        self.faderPage = btnName
+        self.bumpStates = [0] * self.SmartFade.numFaders
+
+@tracing.traced("SmarterSoft.click_button")
+@journaled
+def click_button(self, btnName):
+    """
+    Presses then releases a named button.
+    """
+    self.press_button(btnName)
+    self.release_button(btnName)
@@ -19,6 +19,11 @@ Contains anything that is used to control faders,
 crossfaders, master, bump, etc.
 """
 
+from . import tracing
+from .journal import journaled
+
+@tracing.traced("SmarterSoft.set_fader")
+@journaled
 def set_fader(self, faderNum, level, change_page=False):
     """
     Sets a given fader to a level between 0-255.
@@ -29,13 +34,95 @@ def set_fader(self, faderNum, level, change_page=False):
     if not 0 <= level <= 255:
         raise ValueError("Attempted to set a fader to a value outside its range")
 
+    pageName, relFaderNum = self.SmartFade.find_fader_page(faderNum)
+
     if change_page:
-        faderNum = self.goto_fader_page(faderNum)
-    else:
-        _, faderNum = self.SmartFade.find_fader_page(faderNum)
-        
-    self.SmartFade.set_fader(faderNum, level)
+        self.goto_fader_page(faderNum)
+    elif self.faderPage not in (None, pageName):
+        # Without changing page the level lands on the page being shown
+        faderNum = self.SmartFade.page_offset(self.faderPage) + relFaderNum
+
+    self.SmartFade.set_fader(relFaderNum, level)
+    self.faderLevels[faderNum] = level
+
+@tracing.traced("SmarterSoft.set_faders")
+@journaled
+def set_faders(self, levels):
+    """
+    Sets many faders at once, changing pages as needed.
+    Levels is either a sequence of levels starting at fader 0 (None to skip
+    a fader), or a dictionary of fader number to level.
+
+    Only levels that differ from the last ones sent are sent, and changes on
+    the page being shown go first, so each page is switched to at most once.
+    Returns the number of faders sent.
+    """
+    items = levels.items() if isinstance(levels, dict) else enumerate(levels)
+
+    pages = {}
+    for faderNum, level in items:
+        if not 0 <= faderNum < self.SmartFade.numFaders:
+            raise IndexError("Attempted to access a fader number that does not exist")
+        if level is None or self.faderLevels[faderNum] == level:
+            continue
+        if not 0 <= level <= 255:
+            raise ValueError("Attempted to set a fader to a value outside its range")
+
+        pageName, relFaderNum = self.SmartFade.find_fader_page(faderNum)
+        pages.setdefault(pageName, []).append((faderNum, relFaderNum, int(level)))
+
+    sent = 0
+    for pageName in sorted(pages, key=lambda page: page != self.faderPage):
+        if pageName != self.faderPage:
+            self.goto_fader_page(self.SmartFade.page_offset(pageName))
+
+        for faderNum, relFaderNum, level in pages[pageName]:
+            self.SmartFade.set_fader(relFaderNum, level)
+            self.faderLevels[faderNum] = level
+            sent += 1
+
+    return sent
+
+@tracing.traced("SmarterSoft.set_master_fader")
+@journaled
+def set_master_fader(self, level):
+    """
+    Sets the master fader to a level between 0-255, scaling every output.
+    """
+    if not 0 <= level <= 255:
+        raise ValueError("Attempted to set the master fader to a value outside its range")
+
+    self.SmartFade.set_mapped_fader("master_fader", level)
+    self.masterLevel = level
+
+@tracing.traced("SmarterSoft.set_bump_fader")
+@journaled
+def set_bump_fader(self, level):
+    """
+    Sets the bump fader, the level bumps flash to, between 0-255.
+    """
+    if not 0 <= level <= 255:
+        raise ValueError("Attempted to set the bump fader to a value outside its range")
+
+    self.SmartFade.set_mapped_fader("bump_fader", level)
+
+@tracing.traced("SmarterSoft.set_crossfader")
+@journaled
+def set_crossfader(self, a=None, b=None):
+    """
+    Sets the A and/or B crossfader positions between 0-255.
+    """
+    for name, level in (("crossfader_a", a), ("crossfader_b", b)):
+        if level is None:
+            continue
+        if not 0 <= level <= 255:
+            raise ValueError("Attempted to set a crossfader to a value outside its range")
+
+        self.SmartFade.set_mapped_fader(name, level)
+        self.crossfaderLevels[name == "crossfader_b"] = level
 
+@tracing.traced("SmarterSoft.set_memory")
+@journaled
 def set_memory(self, memNum, level, memPage=None, change_page=False):
     """
     Sets a given memory or sequence on a memory page to a level between 0-255.
@@ -45,7 +132,7 @@ def set_memory(self, memNum, level, memPage=None, change_page=False):
         raise IndexError("Attempted to access a memory fader number that does not exist")
     if not 0 <= level <= 255:
         raise ValueError("Attempted to set a memory fader to a value outside its range")
-    if not 0 <= memPage < self.SmartFade.numMemPages and change_page == True:
+    if change_page == True and not 0 <= memPage < self.SmartFade.numMemPages:
         raise IndexError("Attempted to access a memory page number that does not exist")
 
     if change_page:
@@ -0,0 +1,63 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Any functions that change console settings or fader labels.
+"""
+
+from .profiles import ProfileCache
+
+def apply_profile(self, profile, cache=None, force=False):
+    """
+    Applies a ConsoleProfile, only sending the settings block and fader
+    labels that changed since the last profile applied to this console.
+    Enable force to resend everything, e.g. after the console was reset.
+    Returns the number of commands sent.
+    """
+    for faderNum in profile.labels:
+        if not 0 <= faderNum < self.SmartFade.numFaders:
+            raise IndexError("Attempted to label a fader number that does not exist")
+
+    if cache is None:
+        cache = ProfileCache()
+
+    serial = self.SmartFade.serial or f"{self.SmartFade.series}-unknown"
+    last = None if force else cache.get(serial)
+
+    settingsChanged, labelsChanged = profile.diff(last)
+
+    if settingsChanged:
+        self.SmartFade.set_settings(**profile.settings)
+    for faderNum in labelsChanged:
+        self.SmartFade.set_fader_label(faderNum, profile.labels.get(faderNum, ()))
+
+    cache.put(serial, profile)
+
+    return int(settingsChanged) + len(labelsChanged)
+
+def set_fader_label(self, faderNum, lines):
+    """
+    Sets the text shown for a fader, up-to 3 lines of 6 characters.
+    Lines may be a list, or a string split by newlines.
+    """
+    if not 0 <= faderNum < self.SmartFade.numFaders:
+        raise IndexError("Attempted to label a fader number that does not exist")
+    if isinstance(lines, str):
+        lines = lines.split("\n")
+    if len(lines) > 3 or any(len(line) > 6 for line in lines):
+        raise ValueError("Attempted to set a fader label longer than 3 lines of 6 characters")
+
+    self.SmartFade.set_fader_label(faderNum, lines)
@@ -0,0 +1,250 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Sound to light, band energies and beat onsets from a streaming FFT
+mapped onto faders and bumps.
+"""
+
+import time
+import wave
+
+import numpy as np
+
+def _to_float(data, sampleWidth, channels):
+    """
+    Converts raw little-endian PCM to a mono float block (-1 to 1).
+    """
+    if sampleWidth == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sampleWidth == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768
+    elif sampleWidth == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | raw[:, 1].astype(np.int32) << 8 | raw[:, 2].astype(np.int32) << 16)
+        samples = ((ints ^ 0x800000) - 0x800000).astype(np.float32) / 8388608
+    elif sampleWidth == 4:
+        samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported sample width of {sampleWidth} bytes")
+
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+def wav_blocks(path, blockSize=1024):
+    """
+    Yields mono float blocks of blockSize samples from a WAV file.
+    The sample rate is available from the generator's first value, a
+    (sampleRate, None) tuple, then (sampleRate, block) for each block.
+    """
+    with wave.open(path, "rb") as wav:
+        sampleRate = wav.getframerate()
+        yield sampleRate, None
+
+        while True:
+            data = wav.readframes(blockSize)
+            if len(data) < blockSize * wav.getsampwidth() * wav.getnchannels():
+                return
+            yield sampleRate, _to_float(data, wav.getsampwidth(), wav.getnchannels())
+
+def pcm_blocks(stream, blockSize=1024, sampleRate=44100, sampleWidth=2, channels=1):
+    """
+    Yields mono float blocks of blockSize samples from a binary stream
+    of raw little-endian PCM, e.g. sys.stdin.buffer, in the same form
+    as wav_blocks.
+    """
+    yield sampleRate, None
+
+    buf = bytearray(blockSize * sampleWidth * channels)
+    view = memoryview(buf)
+    while True:
+        filled = 0
+        while filled < len(buf):
+            read = stream.readinto(view[filled:])
+            if not read:
+                return
+            filled += read
+        yield sampleRate, _to_float(buf, sampleWidth, channels)
+
+class SoundAnalyzer():
+    """
+    Streaming FFT analysis of fixed size blocks.
+
+    Band energies are summed over log spaced frequency bands and scaled
+    0-1 against a slowly decaying peak, so quiet and loud tracks both use
+    the whole range. Beats are onsets in the spectral flux that rise above
+    the recent mean by threshold standard deviations.
+    """
+    def __init__(self, sampleRate, blockSize=1024, bands=8, fmin=40, fmax=16000,
+            threshold=1.5, history=1.0, refractory=0.1, decay=0.999):
+        self.sampleRate = sampleRate
+        self.blockSize = blockSize
+        self.threshold = threshold
+        self.decay = decay
+
+        self.blockTime = blockSize / sampleRate
+        self.refractoryBlocks = max(1, round(refractory / self.blockTime))
+
+        self._window = np.hanning(blockSize).astype(np.float32)
+
+        # Bin edges for each band, merged where bands are narrower than a bin
+        freqs = np.fft.rfftfreq(blockSize, 1 / sampleRate)
+        edges = np.geomspace(fmin, min(fmax, sampleRate / 2), bands + 1)
+        starts = np.unique(np.clip(np.searchsorted(freqs, edges[:-1]), 1, len(freqs) - 1))
+        self.bands = len(starts)
+        self._starts = starts
+        self._stop = min(np.searchsorted(freqs, edges[-1]), len(freqs))
+
+        self._peaks = np.full(self.bands, 1e-6)
+        self._lastSpectrum = None
+        self._flux = np.zeros(max(2, round(history / self.blockTime)))
+        self._fluxIndex = 0
+        self._sinceBeat = self.refractoryBlocks
+
+    def process(self, block):
+        """
+        Analyses one block of samples.
+        Returns an array of band levels (0-1) and whether a beat started.
+        """
+        spectrum = np.abs(np.fft.rfft(block * self._window))[:self._stop]
+
+        energies = np.add.reduceat(spectrum, self._starts)
+        self._peaks = np.maximum(self._peaks * self.decay, energies)
+        levels = energies / self._peaks
+
+        # Spectral flux, how much louder the spectrum got since last block
+        logSpectrum = np.log1p(spectrum)
+        if self._lastSpectrum is None:
+            flux = 0.0
+        else:
+            flux = float(np.maximum(logSpectrum - self._lastSpectrum, 0).sum())
+        self._lastSpectrum = logSpectrum
+
+        history = self._flux
+        beat = (
+            self._sinceBeat >= self.refractoryBlocks
+            and flux > history.mean() + self.threshold * history.std()
+            and flux > 0)
+        history[self._fluxIndex] = flux
+        self._fluxIndex = (self._fluxIndex + 1) % len(history)
+
+        self._sinceBeat = 0 if beat else self._sinceBeat + 1
+        return levels, beat
+
+class SoundToLight():
+    """
+    Drives faders from band levels and bumps from beats.
+
+    bandFaders:
+        Fader number for each band, lowest band first.
+
+    beatBumps:
+        Fader bumps to flash on beats, each beat moves to the next.
+        A bump is held for bumpHold seconds.
+
+    Blocks are processed as they arrive, and when reading a file as fast as
+    it would play. Lag is measured against the audio clock, the samples
+    consumed so far against the time since the first block. When
+    processing falls behind by more than maxLatency seconds, blocks are
+    dropped to catch up, so commands never trail the audio by more than
+    that.
+    """
+    def __init__(self, smartersoft, bandFaders, beatBumps=(), bumpHold=0.1, maxLatency=0.1, **analyzerArgs):
+        self.smartersoft = smartersoft
+        self.bandFaders = list(bandFaders)
+        self.beatBumps = list(beatBumps)
+        self.bumpHold = bumpHold
+        self.maxLatency = maxLatency
+        self.analyzerArgs = analyzerArgs
+        self.analyzer = None
+
+        self._bump = 0
+        self._bumpOff = None
+
+        self.blocks = 0
+        self.dropped = 0
+        self.beats = 0
+        self.maxProcessTime = 0.0
+        self.maxLatencySeen = 0.0
+
+    def process(self, block, now=None):
+        """
+        Analyses a block and sends the resulting levels and bumps.
+        """
+        levels, beat = self.analyzer.process(block)
+
+        frame = {
+            faderNum: int(level * 255 + 0.5)
+            for faderNum, level in zip(self.bandFaders, levels.tolist())}
+        self.smartersoft.set_faders(frame)
+
+        now = time.monotonic() if now is None else now
+        bumps = {}
+        if self._bumpOff is not None and now >= self._bumpOff[1]:
+            bumps[self._bumpOff[0]] = 0
+            self._bumpOff = None
+        if beat:
+            self.beats += 1
+            if self.beatBumps:
+                if self._bumpOff is not None:
+                    bumps[self._bumpOff[0]] = 0
+                faderNum = self.beatBumps[self._bump % len(self.beatBumps)]
+                self._bump += 1
+                bumps[faderNum] = 255
+                self._bumpOff = (faderNum, now + self.bumpHold)
+        if bumps:
+            self.smartersoft.set_fader_bumps(bumps)
+
+        self.blocks += 1
+        return levels, beat
+
+    def run(self, blocks, realtime=True):
+        """
+        Processes blocks from wav_blocks or pcm_blocks until they run out.
+        With realtime enabled blocks are paced to the audio clock, as
+        when playing a file alongside the show. Otherwise the audio clock
+        starts as the first block arrives, as for live input, and blocks
+        arriving ahead of it are processed straight away.
+        """
+        sampleRate, _ = next(blocks)
+
+        start = time.monotonic() if realtime else None
+        samples = 0
+        for _, block in blocks:
+            analyzer = self.analyzer
+            if analyzer is None or analyzer.sampleRate != sampleRate or analyzer.blockSize != len(block):
+                analyzer = self.analyzer = SoundAnalyzer(sampleRate, len(block), **self.analyzerArgs)
+
+            # The block is complete once its last sample has played
+            now = time.monotonic()
+            samples += len(block)
+            if start is None:
+                start = now - samples / sampleRate
+            due = start + samples / sampleRate
+            if realtime and due > now:
+                time.sleep(due - now)
+                now = time.monotonic()
+
+            if now - due > self.maxLatency:
+                self.dropped += 1
+                continue
+
+            self.process(block, now)
+
+            done = time.monotonic()
+            self.maxProcessTime = max(self.maxProcessTime, done - now)
+            self.maxLatencySeen = max(self.maxLatencySeen, done - due)
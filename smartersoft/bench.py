@@ -0,0 +1,79 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measurements used to qualify a console and computer before a show.
+"""
+
+import time
+
+from .smartersoft import SmarterSoft
+
+def percentile(sortedValues, fraction):
+    """
+    Returns the value at the given fraction (0-1) of a sorted list.
+    """
+    if not sortedValues:
+        return 0.0
+    return sortedValues[min(len(sortedValues) - 1, int(fraction * len(sortedValues)))]
+
+def measure_startup(series=None, index=0, emulate=False):
+    """
+    Times finding, claiming and connecting to a SmartFade.
+    Returns the connected SmarterSoft and the time taken in seconds.
+    """
+    start = time.perf_counter()
+    sf = SmarterSoft(series=series, index=index, emulate=emulate)
+    return sf, time.perf_counter() - start
+
+def measure_controls(sf, seconds=5, faders=None):
+    """
+    Sends fader levels as fast as possible for the given time, cycling
+    through faders so every command is a real change.
+    Returns a dictionary of controls/sec, usb commands/sec (including page
+    changes) and latency percentiles in milliseconds.
+    """
+    if faders is None:
+        faders = list(range(sf.SmartFade.numFaders))
+
+    latencies = []
+    level = 0
+    cmdCount = sf.SmartFade.cmdCount
+    end = time.perf_counter() + seconds
+    start = time.perf_counter()
+
+    while True:
+        for faderNum in faders:
+            t = time.perf_counter()
+            sf.set_faders({faderNum: level})
+            latencies.append(time.perf_counter() - t)
+        level = (level + 1) % 256
+
+        if time.perf_counter() >= end:
+            break
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    return {
+        "controls": len(latencies),
+        "controls_per_sec": len(latencies) / elapsed,
+        "commands_per_sec": (sf.SmartFade.cmdCount - cmdCount) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000
+    }
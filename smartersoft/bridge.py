@@ -0,0 +1,305 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Art-Net and sACN (E1.31) input, mapping a DMX universe onto a SmartFades
+faders and bumps.
+"""
+
+import select
+import socket
+import struct
+import threading
+import time
+
+ARTNET_PORT = 6454
+SACN_PORT = 5568
+
+ARTNET_ID = b"Art-Net\0"
+ARTNET_OP_DMX = 0x5000
+SACN_ID = b"ASC-E1.17\0\0\0"
+
+# ID, OpCode, ProtVer, Sequence, Physical, Port-Address (SubUni + Net)
+_artDmxHeader = struct.Struct("<8sHHBBH")
+_artDmxLength = struct.Struct(">H")
+ARTNET_DATA = 18
+
+# Root vector, framing vector, options and universe, DMP property count
+_sacnRootVector = struct.Struct(">I")
+_sacnFramingVector = struct.Struct(">I")
+_sacnUniverse = struct.Struct(">BH")
+_sacnCount = struct.Struct(">HB")
+SACN_DATA = 126
+SACN_PREVIEW = 0x80
+SACN_TERMINATED = 0x40
+
+def pack_artdmx(universe, data, sequence=0):
+    """
+    Builds an ArtDmx packet, e.g. for a local sender.
+    """
+    data = bytes(data)
+    if len(data) % 2:
+        data += b"\0"
+
+    return (_artDmxHeader.pack(ARTNET_ID, ARTNET_OP_DMX, 0x0e00, sequence, 0, universe)
+        + _artDmxLength.pack(len(data)) + data)
+
+def pack_sacn(universe, data, sequence=0, priority=100, options=0, cid=bytes(16), sourceName="SmarterSoft"):
+    """
+    Builds an E1.31 data packet, e.g. for a local sender.
+    """
+    data = bytes(data)
+    dmpLength = 10 + 1 + len(data)
+    framingLength = 77 + dmpLength
+    rootLength = 22 + framingLength
+
+    return b"".join((
+        struct.pack(">HH12s", 0x0010, 0x0000, SACN_ID),
+        struct.pack(">HI16s", 0x7000 | rootLength, 0x00000004, cid),
+        struct.pack(">HI64sBHBBH", 0x7000 | framingLength, 0x00000002,
+            sourceName.encode("utf-8")[:63], priority, 0, sequence, options, universe),
+        struct.pack(">HBBHHHB", 0x7000 | dmpLength, 0x02, 0xa1, 0x0000, 0x0001, len(data) + 1, 0x00),
+        data))
+
+class DmxBridge():
+    """
+    Listens for Art-Net ArtDmx and/or sACN packets and forwards a range of
+    channels to a SmarterSoft's faders, and optionally bumps.
+
+    Packets are received into a single preallocated buffer and parsed in
+    place. Incoming levels only update a pending frame, which is sent at
+    most rate times a second, so a fast sender is collapsed into what the
+    console can keep up with. Only channels that changed since the last
+    sent frame are forwarded.
+
+    startChannel and bumpChannel are 1-based DMX addresses. A bump is
+    pressed while its channel is at or above bumpThreshold.
+    """
+    def __init__(self, smartersoft, artnetUniverse=0, sacnUniverse=1, startChannel=1,
+            numFaders=None, bumpChannel=None, bumpThreshold=128, rate=30,
+            artnet=True, sacn=True, host="0.0.0.0", artnetPort=ARTNET_PORT, sacnPort=SACN_PORT,
+            multicast=True):
+        self.smartersoft = smartersoft
+
+        if numFaders is None:
+            numFaders = smartersoft.SmartFade.numFaders
+        if not 0 < numFaders <= smartersoft.SmartFade.numFaders:
+            raise ValueError("Attempted to map more faders than the console has")
+        for channel in (startChannel, bumpChannel):
+            if channel is not None and not 1 <= channel <= 513 - numFaders:
+                raise ValueError("Mapped channels must fit within a universe")
+
+        self.artnetUniverse = artnetUniverse
+        self.sacnUniverse = sacnUniverse
+        self.numFaders = numFaders
+        self.bumpThreshold = bumpThreshold
+        self.interval = 1 / rate
+
+        # Every packet is received into the same buffer, with views of where
+        # the mapped channels sit for each protocol.
+        self._buf = bytearray(638)
+        self._view = memoryview(self._buf)
+        self._faderSlices = self._slices(startChannel - 1)
+        self._bumpSlices = self._slices(bumpChannel - 1) if bumpChannel is not None else None
+
+        self.levels = bytearray(numFaders)
+        self.bumps = bytearray(numFaders)
+        self._sentLevels = bytearray(numFaders)
+        self._sentBumps = bytearray(numFaders)
+        self._dirty = False
+        self._firstFrame = True
+
+        self.packets = 0
+        self.frames = 0
+        self.channelsSent = 0
+
+        self.sockets = {}
+        if artnet:
+            self.sockets[self._bind(host, artnetPort)] = self._parse_artnet
+        if sacn:
+            sock = self._bind(host, sacnPort)
+            if multicast:
+                self._join_sacn(sock)
+            self.sockets[sock] = self._parse_sacn
+
+        self.running = False
+        self._thread = None
+
+    def _slices(self, offset):
+        return (
+            self._view[ARTNET_DATA + offset:ARTNET_DATA + offset + self.numFaders],
+            self._view[SACN_DATA + offset:SACN_DATA + offset + self.numFaders],
+            offset)
+
+    def _bind(self, host, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.setblocking(False)
+        return sock
+
+    def _join_sacn(self, sock):
+        # sACN universes are multicast to 239.255.<hi>.<lo>
+        group = bytes((239, 255, self.sacnUniverse >> 8, self.sacnUniverse & 0xff))
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, group + bytes(4))
+        except OSError as e:
+            print(f"Could not join sACN multicast group for universe {self.sacnUniverse}: {str(e)}")
+
+    @property
+    def address(self):
+        """
+        Returns a dictionary of protocol name to bound (host, port).
+        """
+        return {
+            "artnet" if parse == self._parse_artnet else "sacn": sock.getsockname()
+            for sock, parse in self.sockets.items()}
+
+    def _copy(self, slices, which, length, target):
+        # Copy the mapped channels from the receive buffer, clamped to the
+        # channels actually present in the packet.
+        available = length - slices[2]
+        if available >= self.numFaders:
+            target[:] = slices[which]
+        elif available > 0:
+            target[:available] = slices[which][:available]
+
+    def _parse_artnet(self, size):
+        if size < ARTNET_DATA:
+            return False
+
+        ident, opcode, _, _, _, universe = _artDmxHeader.unpack_from(self._buf)
+        if ident != ARTNET_ID or opcode != ARTNET_OP_DMX or universe != self.artnetUniverse:
+            return False
+
+        length = min(_artDmxLength.unpack_from(self._buf, 16)[0], size - ARTNET_DATA)
+        self._copy(self._faderSlices, 0, length, self.levels)
+        if self._bumpSlices:
+            self._copy(self._bumpSlices, 0, length, self.bumps)
+
+        return True
+
+    def _parse_sacn(self, size):
+        if size < SACN_DATA or not self._buf.startswith(SACN_ID, 4):
+            return False
+        if _sacnRootVector.unpack_from(self._buf, 18)[0] != 0x00000004:
+            return False
+        if _sacnFramingVector.unpack_from(self._buf, 40)[0] != 0x00000002:
+            return False
+
+        options, universe = _sacnUniverse.unpack_from(self._buf, 112)
+        if universe != self.sacnUniverse or options & (SACN_PREVIEW | SACN_TERMINATED):
+            return False
+
+        count, startCode = _sacnCount.unpack_from(self._buf, 123)
+        if startCode != 0:
+            return False
+
+        length = min(count - 1, size - SACN_DATA)
+        self._copy(self._faderSlices, 1, length, self.levels)
+        if self._bumpSlices:
+            self._copy(self._bumpSlices, 1, length, self.bumps)
+
+        return True
+
+    def receive(self, timeout=0):
+        """
+        Waits up-to timeout seconds for packets, and parses every packet
+        that is waiting. Returns the number of packets accepted.
+        """
+        readable, _, _ = select.select(list(self.sockets), [], [], timeout)
+
+        accepted = 0
+        for sock in readable:
+            parse = self.sockets[sock]
+            while True:
+                try:
+                    size = sock.recv_into(self._buf)
+                except (BlockingIOError, InterruptedError):
+                    break
+
+                if parse(size):
+                    accepted += 1
+
+        self.packets += accepted
+        self._dirty = self._dirty or accepted > 0
+        return accepted
+
+    def flush(self):
+        """
+        Sends any mapped channels that changed since the last flush.
+        Returns the number of faders and bumps sent.
+        """
+        if not self._dirty:
+            return 0
+        self._dirty = False
+
+        levels = {
+            i: level for i, level in enumerate(self.levels)
+            if level != self._sentLevels[i] or self._firstFrame}
+        sent = self.smartersoft.set_faders(levels)
+        self._sentLevels[:] = self.levels
+
+        if self._bumpSlices:
+            bumps = {
+                i: int(level >= self.bumpThreshold) for i, level in enumerate(self.bumps)
+                if (level >= self.bumpThreshold) != (self._sentBumps[i] >= self.bumpThreshold) or self._firstFrame}
+            sent += self.smartersoft.set_fader_bumps(bumps)
+            self._sentBumps[:] = self.bumps
+
+        self._firstFrame = False
+        self.frames += 1
+        self.channelsSent += sent
+        return sent
+
+    def run(self):
+        """
+        Receives and forwards packets until stop is called.
+        """
+        self.running = True
+        nextFlush = time.monotonic()
+
+        while self.running:
+            self.receive(max(0, nextFlush - time.monotonic()))
+
+            now = time.monotonic()
+            if now >= nextFlush:
+                self.flush()
+                nextFlush = max(nextFlush + self.interval, now)
+
+    def start(self):
+        """
+        Runs the bridge on a background thread.
+        """
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        for sock in self.sockets:
+            sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ctx_type, ctx_value, ctx_traceback):
+        self.close()
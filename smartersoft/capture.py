@@ -0,0 +1,369 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Offline decoding of SmartFade traffic from usbmon captures, in pcap or
+pcapng format, as saved by Wireshark or tcpdump -i usbmonX.
+
+Files are streamed through one reused buffer, so memory use does not
+grow with the size of the capture.
+"""
+
+import struct
+
+from .drivers import control_requests, settings_requests, send_requests
+from .smartfades import SmartFade
+
+# Linux usbmon link types, and the size of their per packet header
+usbmonHeaders = {189: 48, 220: 64}
+
+# usbmon packet header, up to and including len_cap
+usbmonHeader = struct.Struct("<QcBBBHccqiiII")
+
+# Payload classes by their command byte
+payloadCommands = {
+    0x14: control_requests.ControlInterface,
+    0x29: settings_requests.SettingsInterface,
+    0x09: settings_requests.FaderDescription,
+}
+
+class CaptureReader():
+    """
+    Iterates over the packets in a pcap or pcapng file object, yielding
+    (linktype, data) for each. data is a memoryview into a reused buffer,
+    only valid until the next packet is read.
+    """
+    def __init__(self, file):
+        self.file = file
+        self._buf = bytearray(65536)
+
+    def _read(self, size):
+        if size > len(self._buf):
+            self._buf = bytearray(size)
+
+        view = memoryview(self._buf)[:size]
+        if self.file.readinto(view) != size:
+            return None
+        return view
+
+    def __iter__(self):
+        magic = self._read(4)
+        if magic is None:
+            return
+
+        if bytes(magic) == b"\x0a\x0d\x0d\x0a":
+            yield from self._pcapng()
+        else:
+            yield from self._pcap(bytes(magic))
+
+    def _pcap(self, magic):
+        if magic in (b"\xd4\xc3\xb2\xa1", b"\x4d\x3c\xb2\xa1"):
+            order = "<"
+        elif magic in (b"\xa1\xb2\xc3\xd4", b"\xa1\xb2\x3c\x4d"):
+            order = ">"
+        else:
+            raise ValueError("Attempted to read a file that is not a pcap or pcapng capture")
+
+        header = self._read(20)
+        if header is None:
+            return
+        linktype = struct.unpack_from(order + "I", header, 16)[0] & 0xffff
+
+        record = struct.Struct(order + "IIII")
+        while True:
+            header = self._read(record.size)
+            if header is None:
+                return
+
+            _, _, capLen, _ = record.unpack(header)
+            data = self._read(capLen)
+            if data is None:
+                return
+            yield linktype, data
+
+    def _pcapng(self):
+        order = "<"
+        linktypes = []
+
+        # The section header magic has already been read
+        blockType = 0x0a0d0d0a
+        while True:
+            if blockType == 0x0a0d0d0a:
+                head = self._read(8)
+                if head is None:
+                    return
+                order = "<" if bytes(head[4:8]) == b"\x4d\x3c\x2b\x1a" else ">"
+                length = struct.unpack_from(order + "I", head)[0]
+                body = self._read(length - 12)
+                linktypes = []
+            else:
+                head = self._read(4)
+                if head is None:
+                    return
+                length = struct.unpack_from(order + "I", head)[0]
+                body = self._read(length - 8)
+
+            if body is None:
+                return
+
+            if blockType == 1:
+                # Interface description
+                linktypes.append(struct.unpack_from(order + "H", body)[0])
+            elif blockType == 6:
+                # Enhanced packet
+                interface, _, _, capLen, _ = struct.unpack_from(order + "IIIII", body)
+                yield linktypes[interface], body[20:20 + capLen]
+            elif blockType == 3:
+                # Simple packet, always on the first interface
+                origLen = struct.unpack_from(order + "I", body)[0]
+                yield linktypes[0], body[4:4 + min(origLen, len(body) - 8)]
+
+            head = self._read(4)
+            if head is None:
+                return
+            blockType = struct.unpack(order + "I", head)[0]
+
+class Message():
+    """
+    A decoded message to or from a SmartFade.
+
+    direction is "out" for host to console and "in" for console to host.
+    kind is the class name of the decoded structure, "Event" for console
+    events, or "raw" if it could not be decoded. fields holds the decoded
+    values, with the nested SendHeader flattened into seqNum.
+    """
+    def __init__(self, time, device, direction, kind, fields, data):
+        self.time = time
+        self.device = device
+        self.direction = direction
+        self.kind = kind
+        self.fields = fields
+        self.data = data
+
+    def __str__(self):
+        fields = " ".join(f"{name}={value}" for name, value in self.fields.items())
+        return f"{self.time:17.6f} {self.device[0]}.{self.device[1]:<3} {self.direction:<3} {self.kind:<17} {fields}"
+
+class CaptureDecoder():
+    """
+    Picks SmartFade bulk traffic (endpoint 0x04 out and 0x83 in) out of
+    usbmon captures and decodes it into Messages.
+
+    Devices are identified from their descriptors when the capture includes
+    the device being enumerated, which also selects the right control names
+    for the series. Without them, every device's traffic on those endpoints
+    is decoded unless device is given as a (bus, device number) pair.
+    """
+    def __init__(self, device=None, series=None):
+        self.device = device
+        self.series = series
+
+        self.devices = {}
+        self._pending = {}
+        self._names = {}
+
+        self._structures = {command: (cls(), cls().calc_size()) for command, cls in payloadCommands.items()}
+        self._request = send_requests.SendRequest()
+        self._requestSize = self._request.calc_size()
+        self._control = control_requests.ControlInterface()
+        self._controlSize = self._control.calc_size()
+
+    def _smartfade(self, idProduct=None):
+        for smartfade in SmartFade().smartfades:
+            if smartfade.idProduct == idProduct or (idProduct is None and smartfade.series in (self.series, None)):
+                return smartfade
+        return SmartFade().smartfades[0]
+
+    def decode(self, file):
+        """
+        Decodes an open capture file, yielding Messages in capture order.
+        """
+        for linktype, data in CaptureReader(file):
+            headerSize = usbmonHeaders.get(linktype)
+            if headerSize is None or len(data) < headerSize:
+                continue
+
+            (_, eventType, transferType, endpoint, devNum, busNum, _, _,
+                seconds, micros, _, _, capLen) = usbmonHeader.unpack_from(data)
+            device = (busNum, devNum)
+            time = seconds + micros / 1e6
+            data = data[headerSize:headerSize + capLen]
+
+            if transferType == 2 and eventType == b"C" and endpoint == 0x80:
+                self._descriptor(device, data)
+                continue
+
+            if transferType != 3 or not data:
+                continue
+            if eventType == b"S" and endpoint == 0x04:
+                direction = "out"
+            elif eventType == b"C" and endpoint == 0x83:
+                direction = "in"
+            else:
+                continue
+
+            if self.device is not None:
+                if device != tuple(self.device):
+                    continue
+            elif device in self.devices and self.devices[device][0] != SmartFade.idVendor:
+                continue
+
+            yield from self._transfer(time, device, direction, data)
+
+    def _descriptor(self, device, data):
+        # Device descriptors are 18 bytes, with type 1
+        if len(data) >= 18 and data[0] == 18 and data[1] == 1:
+            idVendor, idProduct = struct.unpack_from("<HH", data, 8)
+            self.devices[device] = (idVendor, idProduct)
+            self._names.pop(device, None)
+
+    def _control_names(self, device):
+        names = self._names.get(device)
+        if names is None:
+            idProduct = self.devices.get(device, (None, None))[1]
+            names = self._names[device] = self._smartfade(idProduct)().control_names()
+        return names
+
+    def _transfer(self, time, device, direction, data):
+        key = device + (direction,)
+        requestSize = self._requestSize
+
+        while data:
+            pending = self._pending.pop(key, 0)
+            if pending:
+                yield self._payload(time, device, direction, bytes(data[:pending]))
+                data = data[pending:]
+                continue
+
+            if len(data) < requestSize:
+                yield Message(time, device, direction, "raw", {"data": bytes(data).hex()}, bytes(data))
+                return
+
+            self._request.unpack_from(data)
+            fields = {"command": self._request.command, "pktSize": self._request.pktSize}
+            yield Message(time, device, direction, "SendRequest", fields, bytes(data[:requestSize]))
+
+            if self._request.pktSize:
+                self._pending[key] = self._request.pktSize
+            data = data[requestSize:]
+
+    def _payload(self, time, device, direction, data):
+        if direction == "in":
+            return self._events(time, device, data)
+
+        structure, size = self._structures.get(data[3] if len(data) > 3 else None, (None, None))
+        if size != len(data):
+            return Message(time, device, direction, "raw", {"data": data.hex()}, data)
+
+        structure.unpack_from(data)
+        fields = {"seqNum": structure.SendHeader.seqNum}
+        for field in structure._fields_:
+            if not field[0].startswith("_") and field[0] != "SendHeader":
+                fields[field[0]] = getattr(structure, field[0])
+
+        if "text" in fields:
+            text = fields["text"].decode("utf-16-be")
+            fields["text"] = "/".join(text[i:i + 6].rstrip("\0") for i in range(0, 36, 6))
+        if structure.command == 0x14:
+            fields["name"] = self._control_names(device).get(structure.index, hex(structure.index))
+
+        return Message(time, device, direction, structure.__class__.__name__, fields, data)
+
+    def _events(self, time, device, data):
+        size = self._controlSize
+        if len(data) % size:
+            return Message(time, device, "in", "raw", {"data": data.hex()}, data)
+
+        names = self._control_names(device)
+        controls = []
+        for offset in range(0, len(data), size):
+            self._control.unpack_from(data, offset)
+            if self._control.command != 0x14:
+                return Message(time, device, "in", "raw", {"data": data.hex()}, data)
+            controls.append(f"{names.get(self._control.index, hex(self._control.index))}:{self._control.state}")
+
+        return Message(time, device, "in", "Event", {"controls": ",".join(controls)}, data)
+
+class CaptureStats():
+    """
+    Running statistics over decoded Messages, kept in constant memory.
+    """
+    def __init__(self):
+        self.first = None
+        self.last = None
+
+        self.messages = 0
+        self.bytesOut = 0
+        self.bytesIn = 0
+        self.polls = 0
+        self.events = 0
+        self.seqGaps = 0
+
+        self.kinds = {}
+        self.controls = {}
+
+        self._lastSeq = {}
+
+    def add(self, message):
+        if self.first is None:
+            self.first = message.time
+        self.last = message.time
+
+        self.messages += 1
+        self.kinds[message.kind] = self.kinds.get(message.kind, 0) + 1
+
+        if message.direction == "out":
+            self.bytesOut += len(message.data)
+        else:
+            self.bytesIn += len(message.data)
+
+        if message.kind == "SendRequest" and message.direction == "out" and message.fields["command"] != 1:
+            self.polls += 1
+        elif message.kind == "Event":
+            self.events += 1
+        elif message.kind == "ControlInterface":
+            name = message.fields["name"]
+            self.controls[name] = self.controls.get(name, 0) + 1
+
+        seqNum = message.fields.get("seqNum")
+        if seqNum is not None:
+            last = self._lastSeq.get(message.device)
+            if last is not None and seqNum != (last + 1) % 65536:
+                self.seqGaps += 1
+            self._lastSeq[message.device] = seqNum
+
+    def report(self):
+        """
+        Returns the statistics as printable lines.
+        """
+        duration = (self.last - self.first) if self.messages else 0
+
+        lines = [
+            f"messages     {self.messages} over {duration:.3f}s",
+            f"bytes        {self.bytesOut} out, {self.bytesIn} in",
+            f"status polls {self.polls}, events {self.events}",
+            f"seq gaps     {self.seqGaps}",
+        ]
+        if duration:
+            commands = self.kinds.get("ControlInterface", 0)
+            lines.append(f"controls/s   {commands / duration:.1f}")
+
+        lines.append("kinds:")
+        lines += [f"  {kind:<17} {count}" for kind, count in sorted(self.kinds.items(), key=lambda item: -item[1])]
+        lines.append("controls:")
+        lines += [f"  {name:<17} {count}" for name, count in sorted(self.controls.items(), key=lambda item: -item[1])]
+
+        return lines
@@ -0,0 +1,241 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Shared memory frame, letting many processes drive the one
+process that has claimed the console.
+"""
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+class SharedFrame():
+    """
+    Fader levels and bump states in a named shared memory block.
+
+    Layout:
+        header:     magic "SFSM", numFaders, daemon pid, written, applied
+        levels:     numFaders bytes
+        bumps:      numFaders bytes
+        dirty:      numFaders bytes for levels, then numFaders for bumps
+
+    Writers store the value and then mark it dirty, the daemon clears the
+    mark before reading the value, so nothing is lost without any locking.
+    Dirty marks are a byte per fader rather than a bit, so writers in
+    different processes never read-modify-write each others marks.
+
+    written is bumped by writers after each change and applied by the
+    daemon after each tick that sent changes. Both only hint at activity,
+    the daemon scans the dirty marks every tick.
+    """
+    magic = b"SFSM"
+    header = struct.Struct("<4sHxxIII")
+
+    def __init__(self, name, numFaders=None, create=False):
+        if create:
+            size = self.header.size + 4 * numFaders
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.header.pack_into(self.shm.buf, 0, self.magic, numFaders, os.getpid(), 0, 0)
+        else:
+            # Attaching registers the block with this process's resource
+            # tracker, which would unlink it from under the daemon on exit.
+            if sys.version_info >= (3, 13):
+                self.shm = shared_memory.SharedMemory(name=name, track=False)
+            else:
+                self.shm = shared_memory.SharedMemory(name=name)
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+
+            magic, numFaders, _, _, _ = self.header.unpack_from(self.shm.buf)
+            if magic != self.magic:
+                self.shm.close()
+                raise ValueError(f"Shared memory {name} is not a SmarterSoft frame")
+
+        self.name = name
+        self.owner = create
+        self.numFaders = numFaders
+
+        # Views straight onto shared memory, e.g. numpy.frombuffer(frame.levels, numpy.uint8)
+        buf = self.shm.buf
+        start = self.header.size
+        self.levels = buf[start:start + numFaders]
+        self.bumps = buf[start + numFaders:start + 2 * numFaders]
+        self.dirtyLevels = buf[start + 2 * numFaders:start + 3 * numFaders]
+        self.dirtyBumps = buf[start + 3 * numFaders:start + 4 * numFaders]
+        self._counters = buf[12:self.header.size].cast("I")
+
+    @classmethod
+    def attach(cls, name="smartersoft"):
+        """
+        Attaches to a frame created by a running daemon.
+        """
+        return cls(name)
+
+    @property
+    def pid(self):
+        return self.header.unpack_from(self.shm.buf)[2]
+
+    @property
+    def written(self):
+        return self._counters[0]
+
+    @property
+    def applied(self):
+        return self._counters[1]
+
+    def set_fader(self, faderNum, level):
+        """
+        Sets a fader level, to be sent on the daemons next tick.
+        """
+        if not 0 <= faderNum < self.numFaders:
+            raise IndexError("Attempted to access a fader number that does not exist")
+        if not 0 <= level <= 255:
+            raise ValueError("Attempted to set a fader to a value outside its range")
+
+        self.levels[faderNum] = level
+        self.dirtyLevels[faderNum] = 1
+        self._counters[0] = (self._counters[0] + 1) & 0xffffffff
+
+    def set_faders(self, levels, start=0):
+        """
+        Sets a run of fader levels starting at the given fader number.
+        Levels can be any bytes-like object, e.g. a numpy uint8 array.
+        """
+        end = start + len(levels)
+        if not 0 <= start <= end <= self.numFaders:
+            raise IndexError("Attempted to access a fader number that does not exist")
+
+        self.levels[start:end] = levels
+        self.dirtyLevels[start:end] = b"\1" * (end - start)
+        self._counters[0] = (self._counters[0] + 1) & 0xffffffff
+
+    def set_fader_bump(self, faderNum, state):
+        """
+        Sets a fader bump state, to be sent on the daemons next tick.
+        """
+        if not 0 <= faderNum < self.numFaders:
+            raise IndexError("Attempted to access a fader number that does not exist")
+        if not 0 <= state <= 255:
+            raise ValueError("Attempted to set a fader bump to a value outside its range")
+
+        self.bumps[faderNum] = state
+        self.dirtyBumps[faderNum] = 1
+        self._counters[0] = (self._counters[0] + 1) & 0xffffffff
+
+    def take_dirty(self, values, dirty):
+        """
+        Clears the dirty marks and returns a dictionary of fader number to
+        value for everything that was marked. Used by the daemon.
+        """
+        changed = {}
+        marks = bytes(dirty)
+
+        i = marks.find(1)
+        while i != -1:
+            # Clear first, a write landing after this is picked up next tick
+            dirty[i] = 0
+            changed[i] = values[i]
+            i = marks.find(1, i + 1)
+
+        return changed
+
+    def close(self):
+        """
+        Detaches from the frame, the daemon also removes it.
+        """
+        for view in (self.levels, self.bumps, self.dirtyLevels, self.dirtyBumps, self._counters):
+            view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ctx_type, ctx_value, ctx_traceback):
+        self.close()
+
+class ConsoleDaemon():
+    """
+    Owns a SmarterSoft session and publishes a SharedFrame, sending
+    whatever clients changed at most rate times a second.
+    """
+    def __init__(self, smartersoft, name="smartersoft", rate=40):
+        self.smartersoft = smartersoft
+        self.interval = 1 / rate
+        self.frame = SharedFrame(name, smartersoft.SmartFade.numFaders, create=True)
+
+        # Start from what is already known to be on the console
+        for i, level in enumerate(smartersoft.faderLevels):
+            self.frame.levels[i] = level or 0
+        for i, state in enumerate(smartersoft.bumpStates):
+            self.frame.bumps[i] = state or 0
+
+        self.running = False
+        self.ticks = 0
+        self.sent = 0
+
+    def tick(self):
+        """
+        Sends any dirty levels and bumps. Returns the number sent.
+        """
+        frame = self.frame
+        levels = frame.take_dirty(frame.levels, frame.dirtyLevels)
+        bumps = frame.take_dirty(frame.bumps, frame.dirtyBumps)
+
+        self.ticks += 1
+        if not levels and not bumps:
+            return 0
+
+        sent = self.smartersoft.set_faders(levels) + self.smartersoft.set_fader_bumps(bumps)
+        frame._counters[1] = (frame._counters[1] + 1) & 0xffffffff
+        self.sent += sent
+        return sent
+
+    def run(self):
+        """
+        Ticks until stop is called or interrupted.
+        """
+        self.running = True
+        nextTick = time.monotonic()
+
+        try:
+            while self.running:
+                self.tick()
+
+                nextTick += self.interval
+                delay = nextTick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    nextTick = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.stop()
+        self.frame.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ctx_type, ctx_value, ctx_traceback):
+        self.close()
@@ -15,6 +15,7 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 import struct
+from .. import tracing
 
 class BaseStructure():
     """
@@ -37,12 +38,22 @@ class BaseStructure():
         """
         for field in self._fields_:
             if isinstance(field[1], (BaseStructure)):
-                setattr(self, field[0], field[1])
+                # Each message gets its own child structure, not the shared one in _fields_
+                setattr(self, field[0], field[1].copy())
             elif len(field) > 2:
                 setattr(self, field[0], field[2])
 
         self.add_attrs(**kwargs)
     
+    def copy(self):
+        """
+        Returns a copy of this structure, with copies of any child structures.
+        """
+        other = self.__class__.__new__(self.__class__)
+        for key, value in vars(self).items():
+            setattr(other, key, value.copy() if isinstance(value, BaseStructure) else value)
+        return other
+
     def add_attrs(self, **kwargs):
         """
         Takes given named arguments and adds them as attributes to the class.
@@ -93,6 +104,7 @@ class BaseStructure():
             return self.defaultByteOrder + formatString
 
 
+    @tracing.traced("BaseStructure.pack", "encode")
     def pack(self):
         """
         
@@ -106,6 +118,48 @@ class BaseStructure():
 
         return buf
 
+    def compiled(self):
+        """
+        Returns a list of (name, struct.Struct) for each field, with None
+        in place of the Struct for child structures. Built once per class.
+        """
+        cls = self.__class__
+        if "_compiled_" not in cls.__dict__:
+            cls._compiled_ = [
+                (field[0], None if isinstance(field[1], (BaseStructure)) else struct.Struct(self.add_missing_boc(field[1])))
+                for field in self._fields_]
+        return cls._compiled_
+
+    def pack_into(self, buf, offset=0):
+        """
+        Packs into an existing writable buffer at the given offset,
+        without building any intermediate bytes.
+        Returns the offset after the packed data.
+        """
+        for name, fieldStruct in self.compiled():
+            if fieldStruct is None:
+                offset = getattr(self, name).pack_into(buf, offset)
+            else:
+                fieldStruct.pack_into(buf, offset, getattr(self, name))
+                offset += fieldStruct.size
+
+        return offset
+
+    def unpack_from(self, buf, offset=0):
+        """
+        Unpacks from any buffer at the given offset, without the length
+        check or slicing of unpack.
+        Returns the offset after the unpacked data.
+        """
+        for name, fieldStruct in self.compiled():
+            if fieldStruct is None:
+                offset = getattr(self, name).unpack_from(buf, offset)
+            else:
+                setattr(self, name, fieldStruct.unpack_from(buf, offset)[0])
+                offset += fieldStruct.size
+
+        return offset
+
     def unpack(self, buf):
         """
         
@@ -116,7 +170,7 @@ class BaseStructure():
         for field in self._fields_:
             if isinstance(field[1], (BaseStructure)):
                 size = field[1].calc_size()
-                field[1].unpack(buf[:size])
+                getattr(self, field[0]).unpack(buf[:size])
             else:
                 size = struct.calcsize(field[1])
                 setattr(self, field[0], struct.unpack(self.add_missing_boc(field[1]), buf[:size])[0])
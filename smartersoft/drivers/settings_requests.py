@@ -0,0 +1,93 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from .base import BaseStructure
+from .send_requests import SendHeader
+
+class SettingsInterface(BaseStructure):
+    """
+    23 byte request containing the whole settings block.
+    The console only redraws most of these once the settings menu is opened.
+
+    buttonIntensity, displayBrightness, displayContrast:
+        Brightness/contrast levels (4-100, 4-100, ?-90).
+
+    crossfaderMode:
+        0: Upwards only
+        1: Both ways
+
+    dmxSpeed:
+        0: Slow, 1: Medium, 2: Fast, 3: Maximum
+
+    dmxInput:
+        0: Merge with output
+        1: On fader 01/01
+
+    dmxBackup:
+        0: Bump = Flash
+        1: Bump = Enable
+
+    midiChannel: MIDI channel 0-15 (shown as 1-16).
+    midiMusic, msc: MIDI music and MIDI show control enable.
+    mscId: MIDI show control device id 0-127.
+
+    upFade, downFade, waitTime:
+        Default times in tenths of a second.
+    """
+    _fields_ = [
+        ('SendHeader', SendHeader()),
+        ('_', 'B', 0),
+        ('command', 'B', 0x29),
+        ('__', 'B', 0),
+        ('buttonIntensity', 'B', 100),
+        ('displayBrightness', 'B', 90),
+        ('displayContrast', 'B', 60),
+        ('crossfaderMode', 'B', 0),
+        ('dmxSpeed', 'B', 3),
+        ('dmxInput', 'B', 0),
+        ('dmxBackup', 'B', 0),
+        ('midiChannel', 'B', 0),
+        ('midiMusic', 'B', 1),
+        ('mscId', 'B', 127),
+        ('msc', 'B', 0),
+        ('___', 'B', 1),
+        ('upFade', 'H', 50),
+        ('downFade', 'H', 50),
+        ('waitTime', 'H', 0)
+    ]
+
+class FaderDescription(BaseStructure):
+    """
+    43 byte request setting the text shown for a fader.
+
+    fader:
+        Absolute fader number.
+
+    numLines, lineLength:
+        Always 3 lines of 6 characters in captures.
+
+    text:
+        3 lines of 6 UTF-16 big-endian characters, null padded.
+    """
+    _fields_ = [
+        ('SendHeader', SendHeader()),
+        ('_', 'B', 0),
+        ('command', 'B', 0x09),
+        ('fader', 'B'),
+        ('numLines', 'B', 3),
+        ('lineLength', 'B', 6),
+        ('text', '36s', bytes(36))
+    ]
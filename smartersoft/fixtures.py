@@ -0,0 +1,190 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Fixtures patched across consecutive faders, with colour and intensity
+converted to fader levels for every fixture at once using NumPy.
+"""
+
+import functools
+
+import numpy as np
+
+# Channel roles a fixture mode can be made of, in the order they are
+# held in the per fixture channel matrix.
+roles = "RGBWD"
+
+def hsv_to_rgb(hsv):
+    """
+    Converts an (..., 3) array of hue, saturation, value (all 0-1)
+    to RGB (0-1).
+    """
+    hsv = np.asarray(hsv, dtype=np.float64)
+    h, s, v = hsv[..., 0] % 1.0 * 6, hsv[..., 1], hsv[..., 2]
+
+    i = np.floor(h).astype(np.int64) % 6
+    f = h - np.floor(h)
+    p = v * (1 - s)
+    q = v * (1 - s * f)
+    t = v * (1 - s * (1 - f))
+
+    # Pick each output channel from the sector the hue falls in
+    r = np.choose(i, (v, q, p, p, t, v))
+    g = np.choose(i, (t, v, v, q, p, p))
+    b = np.choose(i, (p, p, t, v, v, q))
+    return np.stack((r, g, b), axis=-1)
+
+def temperature_to_rgb(kelvin):
+    """
+    Approximates the RGB (0-1) colour of a white light at the given colour
+    temperatures (1000-40000K), using Tanner Helland's curve fit.
+    """
+    t = np.clip(np.asarray(kelvin, dtype=np.float64), 1000, 40000) / 100
+
+    r = np.where(t <= 66, 255, 329.698727446 * np.power(np.maximum(t - 60, 1e-9), -0.1332047592))
+    g = np.where(t <= 66,
+        99.4708025861 * np.log(t) - 161.1195681661,
+        288.1221695283 * np.power(np.maximum(t - 60, 1e-9), -0.0755148492))
+    b = np.where(t >= 66, 255, np.where(t <= 19, 0,
+        138.5177312231 * np.log(np.maximum(t - 10, 1e-9)) - 305.0447927307))
+
+    return np.clip(np.stack((r, g, b), axis=-1) / 255, 0, 1)
+
+@functools.lru_cache(maxsize=256)
+def temperature(kelvin):
+    """
+    Cached RGB tuple for a single colour temperature.
+    """
+    return tuple(temperature_to_rgb(kelvin).tolist())
+
+class Fixture():
+    """
+    A fixture occupying consecutive faders from fader (0-based).
+
+    mode:
+        Channel roles in fader order, R, G, B, W(hite) and D(immer).
+        e.g. "RGB", "RGBW", "DRGB" or "D" for a plain dimmer.
+        Fixtures without a dimmer channel have their colour scaled by the
+        dimmer instead. Fixtures with a white channel take the white
+        component out of their RGB.
+    """
+    def __init__(self, name, fader, mode="RGB"):
+        if not mode or any(role not in roles for role in mode) or len(set(mode)) != len(mode):
+            raise ValueError(f"Invalid fixture mode {mode}")
+
+        self.name = name
+        self.fader = fader
+        self.mode = mode
+
+    @property
+    def faders(self):
+        return range(self.fader, self.fader + len(self.mode))
+
+class Patch():
+    """
+    Fixtures patched onto a SmarterSoft's faders.
+
+    render converts colours and dimmers for every fixture into fader levels
+    in one pass, apply sends the result as a single frame through
+    set_faders, so only changed faders are sent. Named palettes are
+    rendered once and cached.
+    """
+    def __init__(self, smartersoft, fixtures=()):
+        self.smartersoft = smartersoft
+        self.numFaders = smartersoft.SmartFade.numFaders
+        self.fixtures = []
+        self.palettes = {}
+
+        for fixture in fixtures:
+            self.add(fixture)
+        self._build()
+
+    def add(self, fixture):
+        """
+        Patches a fixture, its faders must exist and be free.
+        """
+        used = {fader for patched in self.fixtures for fader in patched.faders}
+        if fixture.faders.start < 0 or fixture.faders.stop > self.numFaders:
+            raise IndexError(f"Fixture {fixture.name} is patched outside the faders")
+        if used.intersection(fixture.faders):
+            raise ValueError(f"Fixture {fixture.name} overlaps another fixture")
+
+        self.fixtures.append(fixture)
+        self._build()
+        self.palettes.clear()
+
+    def _build(self):
+        """
+        Precomputes where each patched fader gets its level from in the
+        flattened (fixture, role) channel matrix.
+        """
+        faders = []
+        sources = []
+        for i, fixture in enumerate(self.fixtures):
+            for fader, role in zip(fixture.faders, fixture.mode):
+                faders.append(fader)
+                sources.append(i * len(roles) + roles.index(role))
+
+        self._faders = np.array(faders, dtype=np.intp)
+        self._sources = np.array(sources, dtype=np.intp)
+        self._hasWhite = np.array(["W" in fixture.mode for fixture in self.fixtures], dtype=bool)
+        self._hasDimmer = np.array(["D" in fixture.mode for fixture in self.fixtures], dtype=bool)
+        self._channels = np.zeros((len(self.fixtures), len(roles)))
+
+    def render(self, colors, dimmers=1.0):
+        """
+        Converts colours and dimmers to fader levels.
+        colors is an RGB (0-1) triple for every fixture, or an (n, 3) array
+        with one per fixture. dimmers (0-1) is a scalar or one per fixture.
+        Returns the patched fader numbers and their uint8 levels.
+        """
+        count = len(self.fixtures)
+        rgb = np.clip(np.broadcast_to(np.asarray(colors, dtype=np.float64), (count, 3)), 0, 1)
+        dimmers = np.clip(np.broadcast_to(np.asarray(dimmers, dtype=np.float64), (count,)), 0, 1)
+
+        channels = self._channels
+        white = np.where(self._hasWhite, rgb.min(axis=1), 0)
+        scale = np.where(self._hasDimmer, 1, dimmers)
+
+        channels[:, :3] = (rgb - white[:, None]) * scale[:, None]
+        channels[:, 3] = white * scale
+        channels[:, 4] = dimmers
+
+        levels = np.rint(channels.ravel()[self._sources] * 255).astype(np.uint8)
+        return self._faders, levels
+
+    def apply(self, colors, dimmers=1.0):
+        """
+        Renders and sends colours and dimmers as one frame.
+        Returns the number of faders sent.
+        """
+        return self._send(*self.render(colors, dimmers))
+
+    def _send(self, faders, levels):
+        return self.smartersoft.set_faders(dict(zip(faders.tolist(), levels.tolist())))
+
+    def store_palette(self, name, colors, dimmers=1.0):
+        """
+        Renders and caches a palette under the given name.
+        """
+        self.palettes[name] = self.render(colors, dimmers)
+
+    def apply_palette(self, name):
+        """
+        Sends a cached palette as one frame.
+        Returns the number of faders sent.
+        """
+        return self._send(*self.palettes[name])
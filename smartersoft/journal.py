@@ -0,0 +1,208 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Crash-safe journal of a SmarterSoft's known console state, kept in a
+small memory-mapped file so a restarted process can carry on from it.
+"""
+
+import contextlib
+import functools
+import mmap
+import os
+import struct
+import zlib
+
+# magic, version, numFaders, numToggles, pending
+journalHeader = struct.Struct("<4sHHHB5x")
+journalMagic = b"SSJ1"
+journalVersion = 1
+pendingOffset = 10
+
+# seq, crc32
+slotHeader = struct.Struct("<QI")
+
+class StateJournal():
+    """
+    Fader levels, bumps, fader page, master, crossfader and button toggle
+    states, written in place after every change.
+
+    Two slots are written in turn, each with a sequence number and a
+    CRC32, so a write torn by a crash leaves the other slot to load. A
+    pending flag is set while a change is being sent, if a crash leaves it
+    set, anything that change touched may or may not have reached the
+    console, so nothing is trusted on load.
+
+    The mapping is flushed by the OS, which survives the process crashing.
+    Enable sync to also flush on every write, which survives power loss
+    but is much slower.
+    """
+    def __init__(self, path, smartfade, sync=False):
+        self.path = path
+        self.sync = sync
+
+        self.pages = [page[1] for page in smartfade.faderPages]
+        self.toggles = tuple(smartfade.toggleButtons)
+        self.numFaders = smartfade.numFaders
+
+        n, t = self.numFaders, len(self.toggles)
+        self._payload = struct.Struct(f"<4h{n}h{n}h{t}b")
+        self._slotSize = slotHeader.size + self._payload.size
+        size = journalHeader.size + 2 * self._slotSize
+
+        self.seq = 0
+        self.depth = 0
+        self.writes = 0
+        self.failed = False
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            header = os.pread(fd, journalHeader.size, 0)
+            if len(header) != journalHeader.size or journalHeader.unpack(header)[:4] != (journalMagic, journalVersion, n, t):
+                print(f"Starting a new state journal at {path}")
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, journalHeader.pack(journalMagic, journalVersion, n, t, 0), 0)
+
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _slot(self, index):
+        offset = journalHeader.size + index * self._slotSize
+        seq, crc = slotHeader.unpack_from(self._mm, offset)
+        body = self._mm[offset:offset + self._slotSize]
+        if zlib.crc32(body[:8] + body[slotHeader.size:]) != crc:
+            return None
+        return seq, offset
+
+    @property
+    def pending(self):
+        return bool(self._mm[pendingOffset])
+
+    def load(self):
+        """
+        Returns the last state written, as a dictionary of SmarterSoft
+        attribute names to values, or None if there is no usable state.
+        """
+        slots = [slot for slot in (self._slot(0), self._slot(1)) if slot is not None and slot[0]]
+        if not slots:
+            return None
+
+        self.seq, offset = max(slots)
+        if self.pending:
+            print("The state journal was interrupted part way through a change, ignoring it")
+            return None
+
+        values = [None if value < 0 else value for value in self._payload.unpack_from(self._mm, offset + slotHeader.size)]
+        n = self.numFaders
+        page, master, crossfaderA, crossfaderB = values[:4]
+
+        return {
+            "faderPage": None if page is None else self.pages[page],
+            "masterLevel": master,
+            "crossfaderLevels": [crossfaderA, crossfaderB],
+            "faderLevels": values[4:4 + n],
+            "bumpStates": values[4 + n:4 + 2 * n],
+            "toggleStates": {name: None if state is None else bool(state) for name, state in zip(self.toggles, values[4 + 2 * n:])},
+        }
+
+    def begin(self):
+        """
+        Marks a change as being sent, changes may nest.
+        """
+        if self.depth == 0:
+            self._mm[pendingOffset] = 1
+        self.depth += 1
+
+    def commit(self, smartersoft):
+        """
+        Ends a change, and once the outermost change ends, writes the
+        SmarterSoft's state into the older slot.
+        If any change within it failed, nothing is written and the pending
+        flag stays set.
+        """
+        self.depth -= 1
+        if self.depth:
+            return
+        if self.failed:
+            self.failed = False
+            return
+
+        sf = smartersoft
+        values = [
+            self.pages.index(sf.faderPage) if sf.faderPage is not None else -1,
+            sf.masterLevel, sf.crossfaderLevels[0], sf.crossfaderLevels[1]]
+        values += sf.faderLevels
+        values += sf.bumpStates
+        values += [sf.toggleStates.get(name) for name in self.toggles]
+
+        self.seq += 1
+        offset = journalHeader.size + (self.seq % 2) * self._slotSize
+        self._payload.pack_into(self._mm, offset + slotHeader.size, *[-1 if value is None else int(value) for value in values])
+        slotHeader.pack_into(self._mm, offset, self.seq, 0)
+
+        body = self._mm[offset:offset + self._slotSize]
+        struct.pack_into("<I", self._mm, offset + 8, zlib.crc32(body[:8] + body[slotHeader.size:]))
+
+        self._mm[pendingOffset] = 0
+        if self.sync:
+            self._mm.flush()
+        self.writes += 1
+
+    def abort(self):
+        """
+        Ends a change that failed part way through. What it sent is not
+        known, so the pending flag is left set until a later change
+        commits.
+        """
+        self.depth -= 1
+        self.failed = self.depth > 0
+
+    @contextlib.contextmanager
+    def change(self, smartersoft):
+        """
+        Marks the block as a change, committed if it finishes and aborted
+        if it raises.
+        """
+        self.begin()
+        try:
+            yield
+        except BaseException:
+            self.abort()
+            raise
+        self.commit(smartersoft)
+
+    def close(self):
+        self._mm.close()
+
+def journaled(func):
+    """
+    Decorator for SmarterSoft methods that change the console state.
+    Holds the SmarterSoft's lock for the call, so threads can't interleave
+    page changes and the fader sends relying on them, and writes the state
+    to its journal, if it has one, after each call that returns.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            journal = self.journal
+            if journal is None:
+                return func(self, *args, **kwargs)
+
+            with journal.change(self):
+                return func(self, *args, **kwargs)
+    return wrapper
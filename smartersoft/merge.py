@@ -0,0 +1,205 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Merges fader levels from many sources, HTP or LTP per fader, with
+priorities and source timeouts.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+class MergeSource():
+    """
+    One source of levels for a MergeEngine, made by add_source.
+    """
+    def __init__(self, engine, name, row):
+        self.engine = engine
+        self.name = name
+        self.row = row
+
+    def set(self, levels):
+        """
+        Sets this source's levels. Levels is either a sequence starting at
+        fader 0 (None to skip a fader), or a dictionary of fader number to
+        level, like set_faders. Also keeps the source alive.
+        """
+        self.engine._set(self.row, levels)
+
+    def release(self, faders=None):
+        """
+        Stops this source controlling the given faders, or all of them.
+        """
+        self.engine._release(self.row, faders)
+
+    def touch(self):
+        """
+        Keeps the source alive without changing any levels.
+        """
+        self.engine._seen[self.row] = time.monotonic()
+
+class MergeEngine():
+    """
+    Combines levels from any number of sources into one frame.
+
+    For each fader only the highest priority sources with a level for it
+    take part. HTP faders take the highest of their levels, LTP faders
+    the level most recently changed. A source with a timeout drops out
+    once it has not set or touched anything for that many seconds.
+
+    Faders no live source controls go to idle, or are left as they are
+    if idle is None. The merge is done for the whole bank at once, and
+    apply sends it through set_faders so only changes are sent.
+    """
+    def __init__(self, smartersoft, ltp=False, idle=0, rate=40):
+        self.smartersoft = smartersoft
+        self.numFaders = smartersoft.SmartFade.numFaders
+        self.idle = idle
+        self.interval = 1 / rate
+        self.running = False
+
+        self.sources = {}
+        self.frames = 0
+
+        self.ltp = np.full(self.numFaders, bool(ltp))
+
+        self._lock = threading.Lock()
+        self._levels = np.full((0, self.numFaders), -1, dtype=np.int16)
+        self._stamps = np.zeros((0, self.numFaders), dtype=np.int64)
+        self._priorities = np.zeros(0, dtype=np.int64)
+        self._timeouts = np.zeros(0)
+        self._seen = np.zeros(0)
+        self._stamp = 0
+        self._columns = np.arange(self.numFaders)
+        self._last = None
+
+    def add_source(self, name, priority=0, timeout=None):
+        """
+        Registers a source, higher priorities override lower ones.
+        Returns the MergeSource to set its levels through.
+        """
+        if name in self.sources:
+            raise ValueError(f"Merge source {name} already exists")
+
+        with self._lock:
+            row = len(self._priorities)
+            self._levels = np.vstack((self._levels, np.full(self.numFaders, -1, dtype=np.int16)))
+            self._stamps = np.vstack((self._stamps, np.zeros(self.numFaders, dtype=np.int64)))
+            self._priorities = np.append(self._priorities, priority)
+            self._timeouts = np.append(self._timeouts, np.inf if timeout is None else timeout)
+            self._seen = np.append(self._seen, time.monotonic())
+
+        source = self.sources[name] = MergeSource(self, name, row)
+        return source
+
+    def set_mode(self, faders, ltp):
+        """
+        Sets the given fader numbers to LTP, or back to HTP.
+        """
+        self.ltp[list(faders)] = ltp
+
+    def _set(self, row, levels):
+        items = levels.items() if isinstance(levels, dict) else enumerate(levels)
+        faders = []
+        values = []
+        for faderNum, level in items:
+            if level is None:
+                continue
+            if not 0 <= faderNum < self.numFaders:
+                raise IndexError("Attempted to access a fader number that does not exist")
+            if not 0 <= level <= 255:
+                raise ValueError("Attempted to set a fader to a value outside its range")
+            faders.append(faderNum)
+            values.append(level)
+
+        with self._lock:
+            current = self._levels[row]
+            changed = current[faders] != values
+            self._stamp += 1
+            self._stamps[row, np.array(faders, dtype=np.intp)[changed]] = self._stamp
+            current[faders] = values
+            self._seen[row] = time.monotonic()
+
+    def _release(self, row, faders):
+        with self._lock:
+            if faders is None:
+                self._levels[row] = -1
+            else:
+                self._levels[row, list(faders)] = -1
+
+    def merge(self, now=None):
+        """
+        Returns the merged levels, -1 for faders no live source controls.
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            levels = self._levels
+            alive = (now - self._seen) <= self._timeouts
+            valid = (levels >= 0) & alive[:, None]
+
+            # Only the top priority with a level for each fader takes part
+            priorities = np.where(valid, self._priorities[:, None], np.iinfo(np.int64).min)
+            taking = valid & (priorities == priorities.max(axis=0, initial=np.iinfo(np.int64).min))
+
+            htp = np.where(taking, levels, -1).max(axis=0, initial=-1)
+            if self.ltp.any() and len(levels):
+                latest = np.where(taking, self._stamps, -1).argmax(axis=0)
+                ltp = np.where(taking.any(axis=0), levels[latest, self._columns], -1)
+                return np.where(self.ltp, ltp, htp)
+
+            return htp
+
+    def apply(self, now=None):
+        """
+        Merges and sends the result. Returns the number of faders sent.
+        """
+        merged = self.merge(now)
+        self.frames += 1
+        if self._last is not None and np.array_equal(merged, self._last):
+            return 0
+        self._last = merged
+
+        if self.idle is not None:
+            frame = np.where(merged < 0, self.idle, merged).tolist()
+        else:
+            frame = [None if level < 0 else level for level in merged.tolist()]
+        return self.smartersoft.set_faders(frame)
+
+    def run(self):
+        """
+        Applies at the engine's rate until stop is called or interrupted.
+        """
+        self.running = True
+        nextFrame = time.monotonic()
+
+        try:
+            while self.running:
+                self.apply()
+
+                nextFrame += self.interval
+                delay = nextFrame - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    nextFrame = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,186 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Reads back the levels the console is outputting, into a ring buffer of
+timestamped frames.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+class OutputMonitor():
+    """
+    Polls the console's detailed status (SendRequest command 2) and keeps
+    the last capacity output frames in preallocated NumPy arrays.
+
+    The detailed status response is taken to hold one byte per output
+    channel starting at offset, channels bytes of it are kept, one per
+    fader by default. Responses too short to hold them are counted in
+    skipped and otherwise ignored.
+
+    Polling is safe alongside sends from other threads, each status
+    request and its response go out between whole messages.
+    """
+    def __init__(self, smartersoft, capacity=1024, channels=None, offset=0, rate=20):
+        self.smartersoft = smartersoft
+        self.capacity = capacity
+        self.channels = channels or smartersoft.SmartFade.numFaders
+        self.offset = offset
+        self.interval = 1 / rate
+        self.running = False
+
+        self.times = np.zeros(capacity)
+        self.frames = np.zeros((capacity, self.channels), dtype=np.uint8)
+
+        # Total frames written, the next slot is count % capacity
+        self.count = 0
+        self.skipped = 0
+
+        self._thread = None
+
+    def poll(self):
+        """
+        Reads one output frame from the console.
+        Returns True if it was stored.
+        """
+        data = self.smartersoft.SmartFade.read_status(0x02)
+        now = time.monotonic()
+
+        if len(data) < self.offset + self.channels:
+            self.skipped += 1
+            return False
+
+        slot = self.count % self.capacity
+        self.frames[slot] = np.frombuffer(data, dtype=np.uint8, count=self.channels, offset=self.offset)
+        self.times[slot] = now
+        self.count += 1
+        return True
+
+    def latest(self):
+        """
+        Returns the time and levels of the newest frame, or None.
+        """
+        if not self.count:
+            return None
+
+        slot = (self.count - 1) % self.capacity
+        return self.times[slot], self.frames[slot].copy()
+
+    def history(self, count=None):
+        """
+        Returns the times and frames of the last count frames (all kept
+        frames by default), oldest first.
+        """
+        kept = min(self.count, self.capacity)
+        count = kept if count is None else min(count, kept)
+
+        slots = np.arange(self.count - count, self.count) % self.capacity
+        return self.times[slots], self.frames[slots]
+
+    def window(self, start=None, end=None):
+        """
+        Returns the times and frames between two monotonic times, oldest first.
+        A negative start is taken as seconds before now.
+        """
+        times, frames = self.history()
+        if start is not None and start < 0:
+            start = time.monotonic() + start
+
+        lo = 0 if start is None else np.searchsorted(times, start, side="left")
+        hi = len(times) if end is None else np.searchsorted(times, end, side="right")
+        return times[lo:hi], frames[lo:hi]
+
+    def downsample(self, bucket, start=None, end=None, how="mean"):
+        """
+        Reduces a window to one frame per bucket seconds, with the mean,
+        max, min or last level in each bucket.
+        Returns the start time of each bucket and the reduced frames.
+        """
+        times, frames = self.window(start, end)
+        if not len(times):
+            return times, frames
+
+        buckets = np.floor((times - times[0]) / bucket).astype(np.int64)
+        starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+
+        if how == "mean":
+            sums = np.add.reduceat(frames.astype(np.uint32), starts)
+            sizes = np.diff(np.append(starts, len(times)))
+            reduced = np.rint(sums / sizes[:, None]).astype(np.uint8)
+        elif how == "max":
+            reduced = np.maximum.reduceat(frames, starts)
+        elif how == "min":
+            reduced = np.minimum.reduceat(frames, starts)
+        elif how == "last":
+            reduced = frames[np.append(starts[1:], len(times)) - 1]
+        else:
+            raise ValueError(f"Unknown downsampling {how}")
+
+        return times[0] + buckets[starts] * bucket, reduced
+
+    def drift(self, expected, tolerance=0):
+        """
+        Compares the newest frame against expected levels, e.g. a look or
+        faderLevels (None to skip a channel).
+        Returns a dictionary of channel to (expected, actual) for every
+        channel off by more than tolerance.
+        """
+        latest = self.latest()
+        if latest is None:
+            return {}
+
+        actual = latest[1].tolist()
+        return {
+            channel: (level, actual[channel])
+            for channel, level in enumerate(expected[:self.channels])
+            if level is not None and abs(actual[channel] - level) > tolerance}
+
+    def run(self):
+        """
+        Polls at the monitor's rate until stop is called or interrupted.
+        """
+        self.running = True
+        nextPoll = time.monotonic()
+
+        try:
+            while self.running:
+                self.poll()
+
+                nextPoll += self.interval
+                delay = nextPoll - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    nextPoll = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+
+    def start(self):
+        """
+        Polls on a background thread.
+        """
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,208 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Plans how to reach a set of output levels with the fewest commands,
+using the master fader and crossfader where possible.
+"""
+
+class LevelPlanner():
+    """
+    Reaches target output levels through a SmarterSoft with as few
+    commands as possible, counting how many were saved compared to
+    writing every changed fader.
+
+    Outputs are modelled as fader level * master / 255.
+
+    master:
+        The target is the current look uniformly scaled, so only the
+        master fader moves.
+
+    crossfade:
+        Two looks have been prepared on the crossfader with
+        prepare_crossfade, the faders themselves are all at zero, and the
+        target is a blend of the looks. Each output is the highest of
+        A * a / 255 and B * b / 255, scaled by the master, where a and b
+        are the crossfader positions.
+
+    faders:
+        Anything else, faders are rewritten and the master is brought back
+        to full if it was scaling the old look.
+    """
+    def __init__(self, smartersoft, tolerance=0):
+        self.smartersoft = smartersoft
+        self.tolerance = tolerance
+        self.crossfadeStates = None
+
+        self.commandsSent = 0
+        self.commandsSaved = 0
+        self.routes = {"master": 0, "crossfade": 0, "faders": 0}
+
+    def prepare_crossfade(self, a, b):
+        """
+        Records the looks loaded onto crossfader A and B on the console.
+        """
+        numFaders = self.smartersoft.SmartFade.numFaders
+        if len(a) != numFaders or len(b) != numFaders:
+            raise ValueError(f"Crossfade looks must have {numFaders} levels")
+
+        self.crossfadeStates = (list(a), list(b))
+
+    def _master(self):
+        master = self.smartersoft.masterLevel
+        return 255 if master is None else master
+
+    def _matches(self, outputs, target):
+        return all(abs(output - level) <= self.tolerance for output, level in zip(outputs, target))
+
+    def _candidates(self, estimate):
+        # Rounding means the exact level can be a step either side
+        estimate = round(estimate)
+        return [level for level in (estimate, estimate - 1, estimate + 1) if 0 <= level <= 255]
+
+    def outputs(self):
+        """
+        Returns the current modelled output levels, or None if any
+        fader level is unknown.
+        """
+        look = self.smartersoft.faderLevels
+        if None in look:
+            return None
+
+        master = self._master()
+        outputs = [round(level * master / 255) for level in look]
+
+        a, b = self.smartersoft.crossfaderLevels
+        if self.crossfadeStates is not None and a is not None and b is not None:
+            stateA, stateB = self.crossfadeStates
+            outputs = [
+                max(output, round(max(levelA * a, levelB * b) * master / 65025))
+                for output, levelA, levelB in zip(outputs, stateA, stateB)]
+
+        return outputs
+
+    def _plan_master(self, target):
+        look = self.smartersoft.faderLevels
+        if None in look:
+            return None
+
+        peak = max(range(len(look)), key=look.__getitem__)
+        if look[peak] == 0:
+            return None
+
+        for master in self._candidates(target[peak] * 255 / look[peak]):
+            if self._matches([round(level * master / 255) for level in look], target):
+                return master
+        return None
+
+    def _plan_crossfade(self, target):
+        if self.crossfadeStates is None or not all(level == 0 for level in self.smartersoft.faderLevels):
+            return None
+
+        stateA, stateB = self.crossfadeStates
+        master = self._master()
+        if master == 0:
+            return None
+
+        # Positions are found from the brightest fader only each look uses
+        estimates = []
+        for state, other in ((stateA, stateB), (stateB, stateA)):
+            only = [i for i in range(len(state)) if state[i] and not other[i]]
+            if not only:
+                return None
+            i = max(only, key=state.__getitem__)
+            estimates.append(target[i] * 65025 / (state[i] * master))
+
+        for a in self._candidates(estimates[0]):
+            for b in self._candidates(estimates[1]):
+                outputs = [
+                    round(max(levelA * a, levelB * b) * master / 65025)
+                    for levelA, levelB in zip(stateA, stateB)]
+                if self._matches(outputs, target):
+                    return a, b
+        return None
+
+    def plan(self, target):
+        """
+        Works out how to reach the target output levels.
+        Returns the route name and a list of (method name, args) commands.
+        """
+        sf = self.smartersoft
+        numFaders = sf.SmartFade.numFaders
+        if len(target) != numFaders:
+            raise ValueError(f"Target must have {numFaders} levels")
+        if not all(0 <= level <= 255 for level in target):
+            raise ValueError("Attempted to set a fader to a value outside its range")
+
+        master = self._plan_master(target)
+        if master is not None:
+            if master == sf.masterLevel:
+                return "master", []
+            return "master", [("set_master_fader", (master,))]
+
+        positions = self._plan_crossfade(target)
+        if positions is not None:
+            a, b = positions
+            current = sf.crossfaderLevels
+            return "crossfade", [("set_crossfader", (
+                a if a != current[0] else None,
+                b if b != current[1] else None))] if tuple(current) != positions else []
+
+        commands = []
+        if self._master() != 255:
+            commands.append(("set_master_fader", (255,)))
+        if self.crossfadeStates is not None and any(level != 0 for level in sf.crossfaderLevels):
+            commands.append(("set_crossfader", (0, 0)))
+        commands += [
+            ("set_fader", (i, level, True)) for i, level in enumerate(target)
+            if sf.faderLevels[i] != level]
+
+        return "faders", commands
+
+    def apply(self, target):
+        """
+        Sends the commands needed to reach the target output levels.
+        Returns the route taken.
+        """
+        sf = self.smartersoft
+        route, commands = self.plan(target)
+
+        # Compare with rewriting every fader whose output is changing
+        outputs = self.outputs()
+        if outputs is None:
+            naive = len(target)
+        else:
+            naive = sum(output != level for output, level in zip(outputs, target))
+
+        faders = {}
+        sent = 0
+        for method, args in commands:
+            if method == "set_fader":
+                faders[args[0]] = args[1]
+                continue
+
+            getattr(sf, method)(*args)
+            sent += 1 + (method == "set_crossfader" and None not in args)
+
+        if faders:
+            before = sf.SmartFade.cmdCount
+            sf.set_faders(faders)
+            sent += sf.SmartFade.cmdCount - before
+
+        self.routes[route] += 1
+        self.commandsSent += sent
+        self.commandsSaved += max(0, naive - sent)
+        return route
@@ -0,0 +1,153 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Drives the consoles own sequence/stack playback instead of streaming
+levels from the host.
+"""
+
+import contextlib
+
+class Playback():
+    """
+    Controls the consoles playback engine with its play, pause, next,
+    rate and stack buttons, and tracks where playback is.
+
+    The console runs the fades itself, so long crossfades cost nothing on
+    the host. Steps are counted from 0, and wrap after length steps when
+    the sequence length is known.
+
+    Position is tracked from the commands sent here and from console
+    events (physical presses on the desk), call poll regularly to keep up.
+
+    The rate and manual crossfades are sent on the crossfader, but are kept
+    here rather than as the SmarterSoft's crossfader levels, which are
+    forgotten instead so nothing takes them for a look's crossfade.
+    """
+    def __init__(self, smartersoft, length=None):
+        self.smartersoft = smartersoft
+        self.length = length
+
+        self.position = 0
+        self.running = False
+        self.stackMode = False
+        self.rate = None
+        self.crossfadeLevel = None
+
+    def _move_crossfader(self, level):
+        sf = self.smartersoft
+        with sf.lock, sf.journal.change(sf) if sf.journal is not None else contextlib.nullcontext():
+            sf.SmartFade.set_mapped_fader("crossfader_a", level)
+            sf.SmartFade.set_mapped_fader("crossfader_b", level)
+            sf.crossfaderLevels = [None, None]
+
+    def _advance(self, steps=1):
+        self.position += steps
+        if self.length:
+            self.position %= self.length
+
+    def go(self):
+        """
+        Plays the next step with its programmed fade.
+        """
+        self.smartersoft.click_button("play")
+        self._advance()
+        self.running = True
+
+    def pause(self):
+        """
+        Pauses the running fade, go resumes it.
+        """
+        self.smartersoft.click_button("pause")
+        self.running = False
+
+    def next(self):
+        """
+        Moves to the next step without playing it.
+        """
+        self.smartersoft.click_button("next")
+        self._advance()
+
+    def jump_to(self, step):
+        """
+        Moves forward to the given step, wrapping around if the sequence
+        length is known. Returns the number of steps moved.
+        """
+        if step < 0 or (self.length and step >= self.length):
+            raise IndexError("Attempted to jump to a step that does not exist")
+
+        steps = step - self.position
+        if self.length:
+            steps %= self.length
+        elif steps < 0:
+            raise IndexError("Can only jump backwards when the sequence length is known")
+
+        for _ in range(steps):
+            self.next()
+
+        return steps
+
+    def set_rate(self, rate):
+        """
+        Sets the playback rate (0-255) by holding rate and moving the crossfader.
+        """
+        if not 0 <= rate <= 255:
+            raise ValueError("Attempted to set the playback rate to a value outside its range")
+
+        self.smartersoft.press_button("rate")
+        self._move_crossfader(rate)
+        self.smartersoft.release_button("rate")
+        self.rate = rate
+
+    def toggle_stack(self):
+        """
+        Switches between sequence and stack playback.
+        """
+        self.smartersoft.click_button("stack")
+        self.stackMode = not self.stackMode
+
+    def crossfade(self, level):
+        """
+        Moves both crossfader halves together, for a manual crossfade.
+        """
+        if not 0 <= level <= 255:
+            raise ValueError("Attempted to set a crossfader to a value outside its range")
+
+        self._move_crossfader(level)
+        self.crossfadeLevel = level
+
+    def update(self, events):
+        """
+        Follows presses made on the console from raw event packets.
+        """
+        for name, state in self.smartersoft.SmartFade.decode_events(events):
+            if not state:
+                continue
+            if name == "play":
+                self._advance()
+                self.running = True
+            elif name == "pause":
+                self.running = False
+            elif name == "next":
+                self._advance()
+            elif name == "stack":
+                self.stackMode = not self.stackMode
+
+    def poll(self):
+        """
+        Reads new console events and follows any playback presses.
+        """
+        self.update(self.smartersoft.SmartFade.poll_events())
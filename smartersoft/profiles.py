@@ -0,0 +1,152 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Declarative console profiles, and a cache of the last profile
+applied to each console.
+"""
+
+import json
+import os
+import struct
+
+from .drivers.settings_requests import SettingsInterface
+
+class ConsoleProfile():
+    """
+    Describes the settings block and fader labels a console should have.
+
+    settings:
+        Any SettingsInterface field, e.g. buttonIntensity=60, dmxSpeed=3.
+        Settings that are not given keep their console defaults.
+
+    labels:
+        Dictionary of absolute fader number to up-to 3 lines of text.
+    """
+    # Largest value each setting can hold, from its struct format
+    settingLimits = {
+        field[0]: (1 << (8 * struct.calcsize(field[1]))) - 1
+        for field in SettingsInterface._fields_
+        if isinstance(field[1], str) and not field[0].startswith("_") and field[0] != "command"}
+    settingNames = tuple(settingLimits)
+
+    def __init__(self, labels=None, **settings):
+        for name, value in settings.items():
+            if name not in self.settingNames:
+                raise KeyError(f"Unknown console setting {name}")
+            if not 0 <= value <= self.settingLimits[name]:
+                raise ValueError(f"Console setting {name} is outside its range")
+
+        defaults = SettingsInterface()
+        self.settings = {name: getattr(defaults, name) for name in self.settingNames}
+        self.settings.update(settings)
+
+        self.labels = {}
+        for faderNum, lines in (labels or {}).items():
+            if isinstance(lines, str):
+                lines = lines.split("\n")
+            if len(lines) > 3 or any(len(line) > 6 for line in lines):
+                raise ValueError(f"Label for fader {faderNum} is longer than 3 lines of 6 characters")
+            self.labels[int(faderNum)] = tuple(lines)
+
+    def __eq__(self, other):
+        return isinstance(other, ConsoleProfile) and self.to_dict() == other.to_dict()
+
+    def diff(self, other):
+        """
+        Compares against a previously applied profile, which may be None.
+        Returns whether the settings block changed, and a sorted list of
+        fader numbers whose labels changed.
+        """
+        if other is None:
+            return True, sorted(self.labels)
+
+        faders = set(self.labels) | set(other.labels)
+        changed = [
+            faderNum for faderNum in sorted(faders)
+            if self.labels.get(faderNum, ()) != other.labels.get(faderNum, ())]
+
+        return self.settings != other.settings, changed
+
+    def to_dict(self):
+        return {
+            "settings": dict(self.settings),
+            "labels": {str(faderNum): list(lines) for faderNum, lines in self.labels.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(labels=data.get("labels"), **data.get("settings", {}))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a profile from a JSON file.
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        """
+        Writes the profile to a JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+class ProfileCache():
+    """
+    Stores the last profile applied to each console, keyed by serial number.
+    """
+    def __init__(self, path=None):
+        if path is None:
+            cacheHome = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            path = os.path.join(cacheHome, "smartersoft", "profiles")
+
+        self.path = path
+
+    def _file(self, serial):
+        # Serial numbers come from the device, keep them filesystem safe
+        name = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(serial))
+        return os.path.join(self.path, f"{name}.json")
+
+    def get(self, serial):
+        """
+        Returns the last profile applied to the console, or None.
+        """
+        try:
+            return ConsoleProfile.load(self._file(serial))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, serial, profile):
+        """
+        Records a profile as applied to the console.
+        """
+        os.makedirs(self.path, exist_ok=True)
+
+        # Write then rename, a half written cache would skip changes
+        tmp = self._file(serial) + ".tmp"
+        profile.save(tmp)
+        os.replace(tmp, self._file(serial))
+
+    def forget(self, serial):
+        """
+        Drops the cached profile, so the next apply sends everything.
+        """
+        try:
+            os.remove(self._file(serial))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,233 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Runs a show script against one open SmarterSoft, reloading the script
+whenever it is edited without reconnecting or losing state.
+"""
+
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+import time
+import traceback
+
+class ShowRunner():
+    """
+    Calls a show script's frame(sf, t) at a fixed rate, where t is seconds
+    since the runner started. If frame returns levels they are sent with
+    set_faders, the script can also use the SmarterSoft directly.
+
+    Optional script hooks:
+        setup(sf): called before the first frame of each load.
+        on_reload(previous): called on the new module with the old one,
+            to carry state across a reload.
+
+    The script and any modules it imports from its own directory are
+    watched. When any of them is edited, the script and those modules are
+    all loaded again as new modules on a watcher thread, and swapped in
+    together between frames, so frames keep coming while the new code
+    loads. If the new code fails to load the old code keeps running
+    untouched, and errors raised by frame are printed without stopping
+    the show.
+    """
+    def __init__(self, smartersoft, path, rate=40, checkInterval=0.25):
+        self.smartersoft = smartersoft
+        self.path = os.path.abspath(path)
+        self.directory = os.path.dirname(self.path)
+        self.name = os.path.splitext(os.path.basename(self.path))[0]
+        self.interval = 1 / rate
+        self.checkInterval = checkInterval
+        self.running = False
+
+        self.module = None
+        self.frames = 0
+        self.errors = 0
+        self.reloads = 0
+        self.lastReloadTime = 0.0
+
+        self._mtimes = {}
+        self._staged = None
+        self._setUp = None
+        self._lastError = None
+        self._watcher = None
+
+        if self.directory not in sys.path:
+            sys.path.insert(0, self.directory)
+
+        self.module = self._load()
+        self._mtimes = self._scan()
+
+    def _watched(self):
+        """
+        Returns the paths of the script and the modules it uses from its directory.
+        """
+        paths = {self.path: None}
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if path and name != self.name and os.path.dirname(os.path.abspath(path)) == self.directory:
+                paths[os.path.abspath(path)] = module
+        return paths
+
+    def _scan(self):
+        mtimes = {}
+        for path in self._watched():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    def _exec(self, name, path, helpers=None):
+        """
+        Executes a source file as a fresh module. Given helpers, a
+        dictionary of module names to paths, the module imports fresh
+        copies of those too, collected into helpers["modules"], instead of
+        the ones in sys.modules.
+        """
+        # Compiled from source every time, cached bytecode only records the
+        # source mtime to the second and can miss quick edits
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+
+        if helpers is not None:
+            def fresh_import(name, globals=None, locals=None, fromlist=(), level=0):
+                if level == 0 and name in helpers["paths"]:
+                    if name not in helpers["modules"]:
+                        self._exec(name, helpers["paths"][name], helpers)
+                    return helpers["modules"][name]
+                return builtins.__import__(name, globals, locals, fromlist, level)
+
+            module.__dict__["__builtins__"] = dict(vars(builtins), __import__=fresh_import)
+            if name in helpers["paths"]:
+                # Registered before running, so circular imports find it
+                helpers["modules"][name] = module
+
+        with open(path, "rb") as f:
+            exec(compile(f.read(), path, "exec"), module.__dict__)
+        return module
+
+    def _load(self, previous=None, helpers=None):
+        """
+        Executes the script as a fresh module, leaving any running one alone.
+        """
+        module = self._exec(self.name, self.path, helpers)
+
+        if not callable(getattr(module, "frame", None)):
+            raise AttributeError(f"Show script {self.path} has no frame(sf, t) function")
+
+        if previous is not None and hasattr(module, "on_reload"):
+            module.on_reload(previous)
+
+        return module
+
+    def check(self):
+        """
+        Reloads anything edited since the last check, to be swapped in by
+        the next frame. Returns True if a new script was loaded.
+        """
+        mtimes = self._scan()
+        changed = [path for path, mtime in mtimes.items() if self._mtimes.get(path) != mtime]
+        self._mtimes = mtimes
+        if not changed:
+            return False
+
+        start = time.perf_counter()
+        helpers = {"paths": {}, "modules": {}}
+        for path, module in self._watched().items():
+            if module is not None:
+                helpers["paths"][module.__name__] = path
+
+        staged = self._staged
+        try:
+            module = self._load(staged[0] if staged is not None else self.module, helpers)
+        except Exception:
+            print(f"Could not reload {self.path}, keeping the running script")
+            traceback.print_exc()
+            return False
+
+        # Swapping the reference is atomic, the next frame swaps in the new code
+        self._staged = (module, helpers["modules"])
+        self.reloads += 1
+        self.lastReloadTime = time.perf_counter() - start
+        print(f"Reloaded {self.name} in {self.lastReloadTime * 1000:.1f} ms")
+        return True
+
+    def frame(self, t):
+        """
+        Runs one frame of the current script.
+        """
+        staged = self._staged
+        if staged is not None:
+            self._staged = None
+            self.module, modules = staged
+            sys.modules.update(modules)
+
+        module = self.module
+        try:
+            # Setup runs here rather than on the watcher, so only this thread sends
+            if module is not self._setUp:
+                self._setUp = module
+                if hasattr(module, "setup"):
+                    module.setup(self.smartersoft)
+
+            levels = module.frame(self.smartersoft, t)
+            if levels is not None:
+                self.smartersoft.set_faders(levels)
+            self._lastError = None
+        except Exception as e:
+            self.errors += 1
+            # Only print an error once while it keeps happening
+            if repr(e) != self._lastError:
+                self._lastError = repr(e)
+                traceback.print_exc()
+
+        self.frames += 1
+
+    def _watch(self):
+        while self.running:
+            self.check()
+            time.sleep(self.checkInterval)
+
+    def run(self):
+        """
+        Runs frames until stop is called or interrupted, reloading the
+        script on a watcher thread.
+        """
+        self.running = True
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+        start = nextFrame = time.monotonic()
+        try:
+            while self.running:
+                self.frame(time.monotonic() - start)
+
+                nextFrame += self.interval
+                delay = nextFrame - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    nextFrame = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,188 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+A library of stored looks, switched between by replaying cached
+command streams instead of diffing and encoding every time.
+"""
+
+import contextlib
+from collections import OrderedDict
+
+import numpy as np
+
+from .drivers import control_requests, send_requests
+
+class SceneLibrary():
+    """
+    Stores looks as uint8 fader levels and recalls them by name.
+
+    The commands to get from one look to another (changed faders in page
+    order, with the page changes in between) are built the first time that
+    transition is used, and cached as ready to send bytes. Recalling a
+    cached transition only patches in sequence numbers and writes.
+
+    The cache holds at most maxBytes of streams, dropping the least
+    recently used transitions first.
+    """
+    def __init__(self, smartersoft, maxBytes=1 << 20):
+        self.smartersoft = smartersoft
+        self.maxBytes = maxBytes
+
+        self.scenes = {}
+        self.current = None
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lists = {}
+        self._cache = OrderedDict()
+        self._cacheBytes = 0
+
+        control = control_requests.ControlInterface(command=0x14, index=0, state=0)
+        self._pktSize = control.calc_size()
+        self._record = send_requests.SendRequest(command=0x01, pktSize=self._pktSize).pack() + control.pack()
+
+    @property
+    def cacheBytes(self):
+        """
+        Bytes of command streams currently cached.
+        """
+        return self._cacheBytes
+
+    def store(self, name, levels):
+        """
+        Stores a look under the given name, levels start at fader 0 and
+        any faders not given are stored as 0.
+        """
+        numFaders = self.smartersoft.SmartFade.numFaders
+        if len(levels) > numFaders:
+            raise IndexError("Attempted to store a scene with more faders than exist")
+
+        scene = np.zeros(numFaders, dtype=np.uint8)
+        values = np.asarray(levels)
+        if values.size and (values.min() < 0 or values.max() > 255):
+            raise ValueError("Attempted to store a scene with a level outside its range")
+        scene[:len(values)] = values
+
+        self.scenes[name] = scene
+        self._lists[name] = scene.tolist()
+
+        # Transitions to or from the old look are stale
+        for key in [key for key in self._cache if name in key[:2]]:
+            self._evict(key)
+        if self.current == name:
+            self.current = None
+
+    def remove(self, name):
+        """
+        Forgets a stored look and its cached transitions.
+        """
+        for key in [key for key in self._cache if name in key[:2]]:
+            self._evict(key)
+        del self.scenes[name]
+        del self._lists[name]
+        if self.current == name:
+            self.current = None
+
+    def recall(self, name):
+        """
+        Sends the named look. Returns the number of commands sent.
+
+        A cached stream is only replayed when the faders are still at the
+        last recalled look, otherwise the look is sent with set_faders.
+        """
+        sf = self.smartersoft
+        with sf.lock:
+            return self._recall(name)
+
+    def _recall(self, name):
+        sf = self.smartersoft
+        target = self._lists[name]
+
+        if self.current is None or sf.faderLevels != self._lists[self.current]:
+            self.current = name
+            return sf.set_faders(target)
+
+        key = (self.current, name, sf.faderPage)
+        entry = self._cache.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = self._build(*key)
+            self._add(key, entry)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        stream, endPage = entry
+        with sf.journal.change(sf) if sf.journal is not None else contextlib.nullcontext():
+            sent = sf.SmartFade.send_stream(stream, self._pktSize) if stream else 0
+
+            # Same shadow state set_faders would have left behind
+            if endPage != sf.faderPage:
+                sf.faderPage = endPage
+                sf.bumpStates = [0] * sf.SmartFade.numFaders
+            sf.faderLevels = list(target)
+            self.current = name
+
+        return sent
+
+    def _build(self, src, dst, page):
+        """
+        Builds the command stream from one look to another, starting on
+        the given fader page. Returns the stream and the page it ends on.
+        """
+        smartfade = self.smartersoft.SmartFade
+        controls = []
+
+        pages = {}
+        for faderNum in np.flatnonzero(self.scenes[src] != self.scenes[dst]).tolist():
+            pageName, relFaderNum = smartfade.find_fader_page(faderNum)
+            pages.setdefault(pageName, []).append((relFaderNum, int(self.scenes[dst][faderNum])))
+
+        for pageName in sorted(pages, key=lambda pageName: pageName != page):
+            if pageName != page:
+                # A page change is a click of the page button
+                index = smartfade.controlMappings[pageName]
+                controls += [(index, 1), (index, 0)]
+                page = pageName
+
+            controls += [(smartfade.faderMappings["faders"][relFaderNum], level) for relFaderNum, level in pages[pageName]]
+
+        stream = bytearray(self._record * len(controls))
+        control = control_requests.ControlInterface(command=0x14, index=0, state=0)
+        offset = len(self._record) - self._pktSize
+        for index, state in controls:
+            control.index = index
+            control.state = state
+            control.pack_into(stream, offset)
+            offset += len(self._record)
+
+        return stream, page
+
+    def _add(self, key, entry):
+        size = len(entry[0])
+        if size > self.maxBytes:
+            return
+
+        self._cache[key] = entry
+        self._cacheBytes += size
+        while self._cacheBytes > self.maxBytes:
+            self._evict(next(iter(self._cache)))
+
+    def _evict(self, key):
+        stream, _ = self._cache.pop(key)
+        self._cacheBytes -= len(stream)
@@ -0,0 +1,180 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Time-stamped commands, sent early by the estimated latency so they take
+effect on time.
+"""
+
+from collections import deque
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+from .bench import percentile
+
+class CueScheduler():
+    """
+    Runs calls at given times (on the time.monotonic clock), such as
+    set_faders or click_button for beat-synced cues.
+
+    Each call is made early by a lead time, starting from the SmartFade's
+    latency estimate. When a call returns, it is taken to land half a status
+    round trip later. How far that was from the target time (the residual)
+    feeds back into the lead, so the lead follows changes in USB load and
+    queue depth. Residuals are kept for reporting, and cues landing more
+    than tolerance seconds after their time are counted as late.
+
+    The last spinWindow seconds before a dispatch are spent busy waiting,
+    since sleeps can overshoot by a millisecond or more. Errors raised by
+    a cue are counted and printed without stopping the rest.
+    """
+    def __init__(self, smartersoft, gain=0.2, tolerance=0.001, spinWindow=0.002, history=1000):
+        self.smartersoft = smartersoft
+        self.gain = gain
+        self.tolerance = tolerance
+        self.spinWindow = spinWindow
+        self.running = False
+
+        self.lead = smartersoft.SmartFade.latency
+        self.dispatched = 0
+        self.late = 0
+        self.errors = 0
+        self.residuals = deque(maxlen=history)
+
+        self._queue = []
+        self._order = itertools.count()
+        self._wake = threading.Condition()
+        self._lastError = None
+
+    def at(self, when, func, *args, **kwargs):
+        """
+        Schedules func(*args, **kwargs) to take effect at the given time.
+        """
+        with self._wake:
+            heapq.heappush(self._queue, (when, next(self._order), func, args, kwargs))
+            self._wake.notify()
+
+    def after(self, delay, func, *args, **kwargs):
+        """
+        Schedules func to take effect delay seconds from now.
+        """
+        self.at(time.monotonic() + delay, func, *args, **kwargs)
+
+    def clear(self):
+        """
+        Drops every cue not yet dispatched.
+        """
+        with self._wake:
+            self._queue.clear()
+
+    def dispatch(self, when, func, args=(), kwargs=None):
+        """
+        Makes a call scheduled for the given time now, and feeds back how
+        far from that time it landed. Returns the residual in seconds, or
+        None if the call raised.
+        """
+        try:
+            func(*args, **(kwargs or {}))
+            self._lastError = None
+        except Exception as e:
+            self.errors += 1
+            # Only print an error once while it keeps happening
+            if repr(e) != self._lastError:
+                self._lastError = repr(e)
+                traceback.print_exc()
+            return None
+
+        smartfade = self.smartersoft.SmartFade
+        landed = time.monotonic() + (smartfade.statusRoundTrip or 0.0) / 2
+        residual = landed - when
+
+        self.lead = max(0.0, self.lead + self.gain * residual)
+        self.residuals.append(residual)
+        self.dispatched += 1
+        if residual > self.tolerance:
+            self.late += 1
+
+        return residual
+
+    def run_pending(self):
+        """
+        Dispatches every cue that is due by now plus the lead.
+        Returns the time the next cue is due to dispatch, or None.
+        """
+        while True:
+            with self._wake:
+                if not self._queue:
+                    return None
+                when = self._queue[0][0]
+                if when - self.lead > time.monotonic():
+                    return when - self.lead
+                when, _, func, args, kwargs = heapq.heappop(self._queue)
+
+            self.dispatch(when, func, args, kwargs)
+
+    def run(self):
+        """
+        Dispatches cues until stop is called or interrupted.
+        """
+        self.running = True
+        try:
+            while self.running:
+                due = self.run_pending()
+                wait = None if due is None else due - time.monotonic()
+
+                if wait is None or wait > self.spinWindow:
+                    with self._wake:
+                        # Wakes early for new cues, and just before the next is due
+                        self._wake.wait(None if wait is None else wait - self.spinWindow)
+                else:
+                    while time.monotonic() < due:
+                        pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+
+    def start(self):
+        """
+        Runs the scheduler on a background thread.
+        """
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._wake:
+            self.running = False
+            self._wake.notify()
+
+    def report(self):
+        """
+        Returns residual statistics in milliseconds.
+        """
+        residuals = sorted(abs(residual) for residual in self.residuals)
+        return {
+            "dispatched": self.dispatched,
+            "late": self.late,
+            "errors": self.errors,
+            "lead_ms": self.lead * 1000,
+            "latency_ms": self.smartersoft.SmartFade.latency * 1000,
+            "residual_p50_ms": percentile(residuals, 0.5) * 1000,
+            "residual_p99_ms": percentile(residuals, 0.99) * 1000,
+            "residual_max_ms": (residuals[-1] if residuals else 0.0) * 1000,
+        }
@@ -0,0 +1,516 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+asyncio OSC (UDP) and WebSocket remote control for a single SmarterSoft session.
+"""
+
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import struct
+
+import numpy as np
+import usb.core
+
+# Remote commands and the SmarterSoft method they call. Commands with the
+# same key in a frame are coalesced so only the last one is sent, commands
+# without one are all sent in the order they arrived. Bumps are never
+# coalesced, so a press and release in one frame still flash.
+commands = {
+    "set_fader":        lambda args: ("fader", args[0]),
+    "set_memory":       lambda args: ("memory", args[2] if len(args) > 2 else None, args[0]),
+    "set_fader_bump":   None,
+    "set_memory_bump":  None,
+    "goto_fader_page":  None,
+    "goto_memory_page": None,
+    "press_button":     None,
+    "release_button":   None,
+    "click_button":     None
+}
+
+# Arguments that are levels, floats from OSC controls are 0.0-1.0
+levelArgs = {"set_fader": 1, "set_memory": 1, "set_fader_bump": 1, "set_memory_bump": 1}
+
+def _osc_string(data, offset):
+    end = data.index(b"\0", offset)
+    return data[offset:end].decode("utf-8"), (end + 4) & ~3
+
+def parse_osc(data):
+    """
+    Parses an OSC packet or bundle.
+    Returns a list of (address, args) tuples.
+    """
+    data = bytes(data)
+    if data.startswith(b"#bundle\0"):
+        messages = []
+        offset = 16
+        while offset + 4 <= len(data):
+            size = struct.unpack_from(">i", data, offset)[0]
+            messages += parse_osc(data[offset + 4:offset + 4 + size])
+            offset += 4 + size
+        return messages
+
+    address, offset = _osc_string(data, 0)
+    if offset >= len(data):
+        return [(address, [])]
+    tags, offset = _osc_string(data, offset)
+
+    args = []
+    for tag in tags[1:]:
+        if tag == "i":
+            args.append(struct.unpack_from(">i", data, offset)[0])
+            offset += 4
+        elif tag == "f":
+            args.append(struct.unpack_from(">f", data, offset)[0])
+            offset += 4
+        elif tag == "s":
+            value, offset = _osc_string(data, offset)
+            args.append(value)
+        elif tag == "T":
+            args.append(True)
+        elif tag == "F":
+            args.append(False)
+        else:
+            raise ValueError(f"Unsupported OSC type tag {tag}")
+
+    return [(address, args)]
+
+def pack_osc(address, *args):
+    """
+    Builds an OSC message from ints, floats and strings.
+    """
+    def pad(b):
+        return b + b"\0" * (4 - len(b) % 4)
+
+    tags = ","
+    data = b""
+    for arg in args:
+        if isinstance(arg, bool):
+            tags += "T" if arg else "F"
+        elif isinstance(arg, int):
+            tags += "i"
+            data += struct.pack(">i", arg)
+        elif isinstance(arg, float):
+            tags += "f"
+            data += struct.pack(">f", arg)
+        else:
+            tags += "s"
+            data += pad(str(arg).encode("utf-8"))
+
+    return pad(address.encode("utf-8")) + pad(tags.encode("utf-8")) + data
+
+class RemoteServer():
+    """
+    Serves OSC over UDP and JSON over WebSocket, in front of one SmarterSoft.
+
+    OSC:        /<command> args...          e.g. /set_fader 3 255, /click_button "blackout"
+    WebSocket:  {"method": "<command>", "args": [...]}, or a list of them
+
+    Level arguments given as floats are taken as 0.0-1.0.
+    Send /subscribe or {"method": "subscribe"} to receive events, as
+    /event/<command> args... over OSC, or {"event": ..., "args": ...} over WebSocket.
+
+    Messages from every client are collected and coalesced, then sent to the
+    console once per frame from a single worker thread, so blocking USB
+    writes never stall the event loop.
+    """
+    wsGUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+    # Largest WebSocket message accepted, larger ones close the connection
+    wsMaxPayload = 1 << 16
+
+    def __init__(self, smartersoft, host="0.0.0.0", oscPort=8000, wsPort=8001, rate=30,
+            pollEvents=True, queueSize=256):
+        self.smartersoft = smartersoft
+        self.host = host
+        self.oscPort = oscPort
+        self.wsPort = wsPort
+        self.interval = 1 / rate
+        self.pollEvents = pollEvents
+        self.queueSize = queueSize
+
+        self._pending = {}
+        self._unique = itertools.count()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        self._oscTransport = None
+        self._wsServer = None
+        self._oscSubscribers = set()
+        self._wsSubscribers = {}
+
+        self.received = 0
+        self.applied = 0
+
+    ## Incoming commands
+    def submit(self, method, args, client=None):
+        """
+        Queues a command for the next frame, replacing any queued
+        command it supersedes.
+        """
+        if method not in commands:
+            raise KeyError(f"Unknown command {method}")
+
+        args = list(args)
+        if method in levelArgs and len(args) > levelArgs[method]:
+            level = args[levelArgs[method]]
+            if isinstance(level, float):
+                args[levelArgs[method]] = round(min(max(level, 0.0), 1.0) * 255)
+
+        key = commands[method](args) if commands[method] else None
+        if key is None:
+            key = (method, next(self._unique))
+
+        self._pending[key] = (method, args, client)
+        self.received += 1
+
+    def _apply(self, batch):
+        """
+        Sends a frame of commands to the console, runs on the worker thread.
+        Returns the applied commands, any errors and new console events.
+
+        Runs of set_fader or set_fader_bump commands are sent together with
+        set_faders or set_fader_bumps, where they come in the frame, so
+        commands still reach the console in the order they arrived.
+        """
+        bulkSends = {"set_fader": self.smartersoft.set_faders, "set_fader_bump": self.smartersoft.set_fader_bumps}
+        run = []
+        runNums = set()
+        applied = []
+        errors = []
+
+        def flush():
+            if not run:
+                return
+            method = run[0][0]
+            send = bulkSends[method]
+            try:
+                send({args[0]: args[1] for _, args, _ in run})
+                applied.extend((method, args) for _, args, _ in run)
+            except (IndexError, ValueError, TypeError):
+                # Something in the run was invalid, find out who sent it
+                for _, args, client in run:
+                    try:
+                        send({args[0]: args[1]})
+                        applied.append((method, args))
+                    except (IndexError, ValueError, TypeError, usb.core.USBError) as e:
+                        errors.append((client, method, str(e)))
+            except usb.core.USBError as e:
+                errors.extend((client, method, str(e)) for _, _, client in run)
+            run.clear()
+            runNums.clear()
+
+        for method, args, client in batch:
+            try:
+                if method in bulkSends and len(args) == 2:
+                    num = int(args[0])
+                    # A new kind of command, or a second state for the same
+                    # fader such as a bump release after its press
+                    if run and (run[0][0] != method or num in runNums):
+                        flush()
+                    run.append((method, [num, args[1]], client))
+                    runNums.add(num)
+                    continue
+
+                flush()
+                getattr(self.smartersoft, method)(*args)
+                applied.append((method, args))
+            except (IndexError, ValueError, KeyError, TypeError, usb.core.USBError) as e:
+                errors.append((client, method, str(e)))
+        flush()
+
+        events = []
+        if self.pollEvents:
+            try:
+                events = self.smartersoft.SmartFade.poll_events()
+            except usb.core.USBError as e:
+                print(f"Could not poll console events: {e}")
+
+        return applied, errors, events
+
+    async def _frames(self):
+        loop = asyncio.get_running_loop()
+        nextFrame = loop.time()
+
+        while True:
+            nextFrame += self.interval
+            await asyncio.sleep(max(0, nextFrame - loop.time()))
+
+            if not self._pending and not self.pollEvents:
+                continue
+
+            batch = list(self._pending.values())
+            self._pending.clear()
+
+            applied, errors, events = await loop.run_in_executor(self._executor, self._apply, batch)
+            self.applied += len(applied)
+
+            for method, args in applied:
+                self.publish(method, args)
+            for event in events:
+                self.publish("console", [event.hex()])
+            for client, method, error in errors:
+                if client is not None:
+                    client.send_error(method, error)
+
+            # Fall behind rather than burst to catch up
+            nextFrame = max(nextFrame, loop.time())
+
+    ## Outgoing events
+    def publish(self, event, args):
+        """
+        Sends an event to every subscribed client.
+        """
+        if self._oscSubscribers and self._oscTransport is not None:
+            packet = pack_osc(f"/event/{event}", *[arg for arg in args if arg is not None])
+            for addr in self._oscSubscribers:
+                self._oscTransport.sendto(packet, addr)
+
+        if self._wsSubscribers:
+            message = json.dumps({"event": event, "args": args})
+            for queue in self._wsSubscribers.values():
+                if queue.full():
+                    # Slow clients lose their oldest events instead of stalling everyone
+                    queue.get_nowait()
+                queue.put_nowait(message)
+
+    ## OSC
+    class _OSCProtocol(asyncio.DatagramProtocol):
+        def __init__(self, server):
+            self.server = server
+
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            client = _OSCClient(self.transport, addr)
+            try:
+                messages = parse_osc(data)
+            except (ValueError, UnicodeDecodeError, struct.error) as e:
+                client.send_error("parse", str(e))
+                return
+
+            for address, args in messages:
+                method = address.strip("/")
+                if method == "subscribe":
+                    self.server._oscSubscribers.add(addr)
+                elif method == "unsubscribe":
+                    self.server._oscSubscribers.discard(addr)
+                else:
+                    try:
+                        self.server.submit(method, args, client)
+                    except (KeyError, IndexError) as e:
+                        client.send_error(method, str(e))
+
+    ## WebSocket
+    async def _ws_client(self, reader, writer):
+        try:
+            if not await self._ws_handshake(reader, writer):
+                return
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            writer.close()
+            return
+
+        client = _WSClient(writer)
+        sender = None
+
+        try:
+            async for opcode, payload in self._ws_frames(reader, writer):
+                if opcode != 0x1:
+                    continue
+                try:
+                    messages = json.loads(payload)
+                except ValueError as e:
+                    client.send_error("parse", str(e))
+                    continue
+
+                if isinstance(messages, dict):
+                    messages = [messages]
+                if not isinstance(messages, list):
+                    client.send_error("parse", "Expected a message or a list of messages")
+                    continue
+
+                for message in messages:
+                    if not isinstance(message, dict):
+                        client.send_error("parse", "Expected a message object")
+                        continue
+
+                    method = message.get("method")
+                    if method == "subscribe" and sender is None:
+                        queue = asyncio.Queue(self.queueSize)
+                        self._wsSubscribers[client] = queue
+                        sender = asyncio.ensure_future(self._ws_sender(client, queue))
+                    elif method == "unsubscribe" and sender is not None:
+                        self._wsSubscribers.pop(client, None)
+                        sender.cancel()
+                        sender = None
+                    elif method not in ("subscribe", "unsubscribe"):
+                        args = message.get("args", [])
+                        if not isinstance(args, list):
+                            client.send_error(method, "Expected args to be a list")
+                            continue
+                        try:
+                            self.submit(method, args, client)
+                        except (KeyError, IndexError, TypeError) as e:
+                            client.send_error(method, str(e))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._wsSubscribers.pop(client, None)
+            if sender is not None:
+                sender.cancel()
+            writer.close()
+
+    async def _ws_sender(self, client, queue):
+        while True:
+            client.send(await queue.get())
+            await client.writer.drain()
+
+    async def _ws_handshake(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        headers = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        key = headers.get("sec-websocket-key")
+        if key is None or "websocket" not in headers.get("upgrade", "").lower():
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return False
+
+        accept = base64.b64encode(hashlib.sha1(key.encode() + self.wsGUID).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        await writer.drain()
+        return True
+
+    async def _ws_frames(self, reader, writer):
+        """
+        Yields (opcode, payload) for each complete message, answering
+        pings and closes along the way. Messages over wsMaxPayload bytes
+        are closed with 1009 (message too big).
+        """
+        message = b""
+        messageOpcode = None
+
+        while True:
+            first, second = await reader.readexactly(2)
+            fin = first & 0x80
+            opcode = first & 0x0f
+            length = second & 0x7f
+            if length == 126:
+                length = struct.unpack(">H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", await reader.readexactly(8))[0]
+
+            if len(message) + length > self.wsMaxPayload:
+                writer.write(_ws_frame(0x8, struct.pack(">H", 1009)))
+                await writer.drain()
+                return
+
+            mask = await reader.readexactly(4) if second & 0x80 else None
+            payload = await reader.readexactly(length)
+            if mask is not None:
+                # Unmask with one NumPy xor rather than byte by byte
+                payload = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(mask, np.uint8), length)).tobytes()
+
+            if opcode == 0x8:
+                writer.write(_ws_frame(0x8, payload[:2]))
+                await writer.drain()
+                return
+            elif opcode == 0x9:
+                writer.write(_ws_frame(0xa, payload))
+                continue
+            elif opcode == 0xa:
+                continue
+
+            if opcode != 0x0:
+                messageOpcode = opcode
+                message = b""
+            message += payload
+
+            if fin:
+                yield messageOpcode, message.decode("utf-8") if messageOpcode == 0x1 else message
+                message = b""
+
+    ## Running
+    async def serve(self):
+        """
+        Serves clients until cancelled.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.oscPort is not None:
+            self._oscTransport, _ = await loop.create_datagram_endpoint(
+                lambda: self._OSCProtocol(self), local_addr=(self.host, self.oscPort))
+            print(f"OSC listening on {self.host}:{self._oscTransport.get_extra_info('sockname')[1]}")
+        if self.wsPort is not None:
+            self._wsServer = await asyncio.start_server(self._ws_client, self.host, self.wsPort)
+            print(f"WebSocket listening on {self.host}:{self._wsServer.sockets[0].getsockname()[1]}")
+
+        try:
+            await self._frames()
+        finally:
+            if self._oscTransport is not None:
+                self._oscTransport.close()
+            if self._wsServer is not None:
+                self._wsServer.close()
+            self._executor.shutdown()
+
+    def run(self):
+        """
+        Serves clients until interrupted.
+        """
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+def _ws_frame(opcode, payload):
+    header = bytes((0x80 | opcode,))
+    if len(payload) < 126:
+        header += bytes((len(payload),))
+    elif len(payload) < 65536:
+        header += bytes((126,)) + struct.pack(">H", len(payload))
+    else:
+        header += bytes((127,)) + struct.pack(">Q", len(payload))
+    return header + payload
+
+class _OSCClient():
+    def __init__(self, transport, addr):
+        self.transport = transport
+        self.addr = addr
+
+    def send_error(self, method, error):
+        self.transport.sendto(pack_osc("/error", str(method), error), self.addr)
+
+class _WSClient():
+    def __init__(self, writer):
+        self.writer = writer
+
+    def send(self, message):
+        self.writer.write(_ws_frame(0x1, message.encode("utf-8")))
+
+    def send_error(self, method, error):
+        self.send(json.dumps({"error": error, "method": method}))
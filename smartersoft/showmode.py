@@ -0,0 +1,142 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Low jitter runtime profile for running a show.
+"""
+
+import gc
+import os
+import sys
+
+class ShowMode():
+    """
+    Context manager that prepares a SmarterSoft for a low jitter hot loop.
+
+    On entry the send path messages and buffers are preallocated, garbage
+    is collected, everything left is frozen out of future collections and
+    cyclic GC is disabled. Optionally the calling thread, the one sending
+    to the console, is given real-time (SCHED_FIFO) priority and pinned to
+    a CPU core, on Linux and with enough privileges.
+
+    On exit the GC is left as it was found. Objects frozen before entry
+    stay frozen, along with anything frozen on entry, as the GC can't
+    unfreeze only some of them.
+
+    Anything that still happens inside the loop is reported: collections
+    that ran anyway, and net growth in allocated memory blocks and GC
+    tracked objects.
+
+        with sf.show_mode(realtime=True, cpu=3) as show:
+            run_show()
+        print(show.report)
+    """
+    def __init__(self, smartersoft, realtime=False, priority=10, cpu=None):
+        self.smartersoft = smartersoft
+        self.realtime = realtime
+        self.priority = priority
+        self.cpu = cpu
+
+        self.report = {}
+        self._gcEvents = []
+
+        self._gcWasEnabled = None
+        self._gcThreshold = None
+        self._gcWasFrozen = None
+        self._oldScheduler = None
+        self._oldAffinity = None
+
+    def _gc_callback(self, phase, info):
+        if phase == "start":
+            self._gcEvents.append(info["generation"])
+
+    def _set_realtime(self):
+        if not hasattr(os, "sched_setscheduler"):
+            return "unsupported"
+
+        try:
+            self._oldScheduler = (os.sched_getscheduler(0), os.sched_getparam(0))
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            return "SCHED_FIFO"
+        except OSError as e:
+            self._oldScheduler = None
+            print(f"Could not set real-time priority: {str(e)}")
+            return "failed"
+
+    def _set_affinity(self):
+        if not hasattr(os, "sched_setaffinity"):
+            return "unsupported"
+
+        try:
+            self._oldAffinity = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {self.cpu})
+            return self.cpu
+        except OSError as e:
+            self._oldAffinity = None
+            print(f"Could not pin to CPU {self.cpu}: {str(e)}")
+            return "failed"
+
+    def __enter__(self):
+        self.smartersoft.SmartFade.preallocate()
+
+        self.report = {
+            "realtime": self._set_realtime() if self.realtime else None,
+            "cpu": self._set_affinity() if self.cpu is not None else None
+        }
+
+        # Collect now, then keep everything from setup out of any collection
+        self._gcWasEnabled = gc.isenabled()
+        self._gcThreshold = gc.get_threshold()
+        self._gcWasFrozen = gc.get_freeze_count() > 0
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+
+        self._gcEvents.clear()
+        gc.callbacks.append(self._gc_callback)
+
+        self._startBlocks = sys.getallocatedblocks()
+        self._startObjects = sum(gc.get_count())
+        return self
+
+    def __exit__(self, ctx_type, ctx_value, ctx_traceback):
+        blocks = sys.getallocatedblocks() - self._startBlocks
+        objects = sum(gc.get_count()) - self._startObjects
+
+        gc.callbacks.remove(self._gc_callback)
+        self.report.update({
+            "gc_collections": len(self._gcEvents),
+            "gc_generations": sorted(set(self._gcEvents)),
+            "allocated_blocks": blocks,
+            "gc_objects": objects
+        })
+
+        if not self._gcWasFrozen:
+            gc.unfreeze()
+        gc.set_threshold(*self._gcThreshold)
+        if self._gcWasEnabled:
+            gc.enable()
+
+        if self._oldScheduler is not None:
+            os.sched_setscheduler(0, self._oldScheduler[0], self._oldScheduler[1])
+        if self._oldAffinity is not None:
+            os.sched_setaffinity(0, self._oldAffinity)
+
+        if self.report["gc_collections"] or blocks > 0 or objects > 0:
+            print(f"Show mode: {self.report['gc_collections']} collection(s), "
+                f"{blocks} block(s) and {objects} object(s) still allocated in the hot loop")
+
+        return False
@@ -14,22 +14,33 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
+import threading
+
 from .smartfades import SmartFade
+from .showmode import ShowMode
+from .journal import StateJournal
 
 class SmarterSoft():
     """
     High level user class for interacting with a SmartFade.
     """
-    from ._buttons import set_fader_bump, set_memory_bump, goto_fader_page, goto_memory_page
-    from ._faders import set_fader, set_memory
+    from ._buttons import set_fader_bump, set_fader_bumps, set_memory_bump, goto_fader_page, goto_memory_page
+    from ._buttons import press_button, release_button, click_button
+    from ._faders import set_fader, set_faders, set_memory, set_master_fader, set_bump_fader, set_crossfader
+    from ._settings import apply_profile, set_fader_label
 
-    def __init__(self, series=None, index=0):
+    def __init__(self, series=None, index=0, emulate=False):
         """
         Finds a connected SmartFade.
         Optionally specify the series name to only select certain SmartFades.
         Or optionally the index to connect to the n'th of the same series.
+        Enable emulate to use a built-in emulator instead of a real console.
         """
         self.SmartFade = None
+        self.journal = None
+
+        # Held by every method changing the console state, see journaled
+        self.lock = threading.RLock()
 
         for smartfade in SmartFade().smartfades:
             if smartfade.series != series and series != None:
@@ -37,17 +48,72 @@ class SmarterSoft():
 
             sf = smartfade()
 
+            if emulate:
+                self.SmartFade = sf
+                self.SmartFade.attach_emulator()
+                self.SmartFade.on_connect()
+                self.reset_state()
+
+                print(f"Emulating a SmartFade {self.SmartFade.series}")
+                return
+
             if sf.find_dev(index):
                 self.SmartFade = sf
                 self.SmartFade.claim_dev()
                 self.SmartFade.find_endpoints()
                 self.SmartFade.on_connect()
+                self.reset_state()
 
                 print(f"Found a SmartFade {self.SmartFade.series}")
                 return
 
+        self.reset_state()
         print("Did not find a SmartFade")
-        
+
+    def reset_state(self):
+        """
+        Forgets the known fader page, levels, bump states, master and
+        crossfader positions, so the next frame sends everything.
+        Toggle buttons are assumed to be off.
+        """
+        numFaders = self.SmartFade.numFaders if self.SmartFade else 0
+
+        self.faderPage = None
+        self.faderLevels = [None] * numFaders
+        self.bumpStates = [None] * numFaders
+        self.masterLevel = None
+        self.crossfaderLevels = [None, None]
+
+        # Toggles can't be resent without flipping them, so they are
+        # assumed to be off rather than forgotten
+        toggles = self.SmartFade.toggleButtons if self.SmartFade else ()
+        self.toggleStates = {name: False for name in toggles}
+
+    def attach_journal(self, path, sync=False):
+        """
+        Keeps the known console state in a crash-safe journal file.
+        If the file holds state from an earlier run, carries on from it,
+        so the next frames only send what differs from the console.
+        Returns True if state was resumed from the journal.
+        """
+        self.journal = StateJournal(path, self.SmartFade, sync=sync)
+
+        state = self.journal.load()
+        if state is None:
+            return False
+
+        for name, value in state.items():
+            setattr(self, name, value)
+        print(f"Resumed console state from {path}")
+        return True
+
+    def show_mode(self, realtime=False, priority=10, cpu=None):
+        """
+        Returns a context manager for running a show with as little jitter
+        as possible. See ShowMode.
+        """
+        return ShowMode(self, realtime=realtime, priority=priority, cpu=cpu)
+
     def __enter__(self):
         """
     
@@ -66,3 +132,7 @@ class SmarterSoft():
         """
         self.SmartFade.on_disconnect()
         self.SmartFade.release_dev()
+
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
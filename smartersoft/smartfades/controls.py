@@ -14,7 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
-from smartersoft.drivers import control_requests
+from smartersoft.drivers import control_requests, settings_requests, send_requests
+from smartersoft import tracing
+import threading
 
 class SmartFadeControl():
     """
@@ -23,17 +25,52 @@ class SmartFadeControl():
     def __init__(self):
         super().__init__()
 
+        # Reused by send_control once preallocate is called, per thread
+        # since each thread packs into its own message and buffer
+        self._preallocated = threading.local()
+
+    def preallocate(self):
+        """
+        Builds the control message, buffer and request header that
+        send_control reuses on the calling thread, so sending a control
+        builds no new messages.
+        """
+        prealloc = self._preallocated
+        prealloc.control = control_requests.ControlInterface(command=0x14, index=0, state=0)
+        prealloc.buf = bytearray(prealloc.control.calc_size())
+        prealloc.header = send_requests.SendRequest(command=0x01, pktSize=len(prealloc.buf)).pack()
+
+        # Packing once builds the cached field structs
+        prealloc.control.pack_into(prealloc.buf)
+
+    def send_control(self, index, state):
+        """
+        Sends a 0x14 command for the given button or fader index.
+        """
+        # SSSS 0014 XXXX YY
+        prealloc = self._preallocated
+        control = getattr(prealloc, "control", None)
+        if control is None:
+            self.send_command(control_requests.ControlInterface(
+                command=0x14,
+                index=index,
+                state=state))
+            return
+
+        control.index = index
+        control.state = state
+        self.send_prepacked(control, prealloc.buf, prealloc.header)
+
+    @tracing.traced("SmartFadeControl.set_fader", "control")
     def set_fader(self, faderNum, level):
         """
         Sets the level of the given fader.
         """
         # SSSS 0014 0000 [00-ff] # Fader 1 intensity
         # SSSS 0014 0017 [00-ff] # Fader 24 intensity
-        self.send_command(control_requests.ControlInterface(
-            command=0x14,
-            index=self.faderMappings["faders"][faderNum],
-            state=level))
+        self.send_control(self.faderMappings["faders"][faderNum], level)
 
+    @tracing.traced("SmartFadeControl.set_bump", "control")
     def set_bump(self, faderNum, state):
         """
         Sets the bump state of the given fader.
@@ -42,21 +79,81 @@ class SmartFadeControl():
         # SSSS 0014 0100 [01-ff]    # bump 1 on
         # SSSS 0014 0117 00         # bump 24 off
         # SSSS 0014 0117 [01-ff]    # bump 24 on
-        self.send_command(control_requests.ControlInterface(
-            command=0x14,
-            index=self.faderMappings["bumps"][faderNum],
-            state=state))
+        self.send_control(self.faderMappings["bumps"][faderNum], state)
 
+    def set_mapped_fader(self, name, level):
+        """
+        Sets the level of a named fader from faderMappings,
+        e.g. master_fader, bump_fader, crossfader_a or crossfader_b.
+        """
+        # SSSS 0014 0030 [00-ff] # master fader
+        # SSSS 0014 0031 [00-ff] # bump fader
+        # SSSS 0014 0032 [00-ff] # crossfader A position
+        # SSSS 0014 0033 [00-ff] # crossfader B position
+        self.send_control(self.faderMappings[name], level)
+
+    @tracing.traced("SmartFadeControl.set_button", "control")
     def set_button(self, btnName, state):
         """
         Sets a buttons state using the mapped name, likely from controlMappings array.
         """
         # SSSS 0014 BBBB 00         # button released
         # SSSS 0014 BBBB [01-ff]    # button pushed
-        self.send_command(control_requests.ControlInterface(
-            command=0x14,
-            index=self.controlMappings[btnName],
-            state=state))
+        self.send_control(self.controlMappings[btnName], state)
+
+    def set_settings(self, **settings):
+        """
+        Sends the whole settings block, any setting not given is sent
+        with its default value.
+        """
+        # SSSS 0029 0064 5a3c 0003 0000 0001 7f00 0100 3200 3200 00 # Defaults
+        self.send_command(settings_requests.SettingsInterface(**settings))
+
+    def set_fader_label(self, faderNum, lines):
+        """
+        Sets the 3 lines of text shown for the given fader.
+        Lines are truncated to 6 characters, missing lines are left blank.
+        """
+        # SSSS 0009 FF03 06TT TT... # FF fader, TT UTF-16 text
+        text = b"".join(
+            line[:6].ljust(6, "\0").encode("utf-16-be")
+            for line in (list(lines) + [""] * 3)[:3])
+
+        self.send_command(settings_requests.FaderDescription(
+            fader=faderNum,
+            text=text))
+
+    def control_names(self):
+        """
+        Returns a dictionary of 0x14 index to control name. Faders and
+        bumps are named by their number on the page, e.g. "fader 0".
+        """
+        names = {index: name for name, index in self.controlMappings.items()}
+        for name, index in self.faderMappings.items():
+            if isinstance(index, int):
+                names[index] = name
+            else:
+                names.update((faderIndex, f"{name[:-1]} {relFaderNum}") for relFaderNum, faderIndex in enumerate(index))
+        return names
+
+    def decode_events(self, events):
+        """
+        Decodes raw event packets into (control name, state) tuples for
+        any 0x14 control changes, the name is the hex index if unmapped.
+        """
+        names = self.control_names()
+
+        control = control_requests.ControlInterface()
+        size = control.calc_size()
+
+        decoded = []
+        for event in events:
+            for offset in range(0, len(event) - size + 1, size):
+                control.unpack(event[offset:offset + size])
+                if control.command == 0x14:
+                    decoded.append((names.get(control.index, hex(control.index)), control.state))
+
+        return decoded
 
     # Additional variations of set_button
     def press_button(self, btnName):
@@ -67,6 +164,7 @@ class SmartFadeControl():
         self.press_button(btnName)
         self.release_button(btnName)
         
+    @tracing.traced("find_fader_page", "page")
     def find_fader_page(self, faderNum):
         """
         Finds the correct fader page given an absolute fader number.
@@ -79,3 +177,13 @@ class SmartFadeControl():
 
         # Determine the actual fader number for the page
         return [page[1], faderNum - ([(0,)] + self.faderPages)[i][0]]
+
+    def page_offset(self, pageName):
+        """
+        Returns the absolute fader number of the first fader on the given page.
+        """
+        for i, page in enumerate(self.faderPages):
+            if page[1] == pageName:
+                return ([(0,)] + self.faderPages)[i][0]
+
+        raise KeyError(f"Unknown fader page {pageName}")
@@ -0,0 +1,120 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from smartersoft.drivers import send_requests, control_requests
+from collections import deque
+import time
+
+class SmartFadeEmulator():
+    """
+    Stands in for a SmartFades data endpoints, for testing and
+    benchmarking without a console.
+
+    Decodes every command written to it, keeping the last state of each
+    0x14 control index in controls. Events queued with add_event are
+    returned to status checks, like a console reporting its own changes.
+    With echo enabled every control received is queued back as an event.
+
+    Given the SmartFade it stands in for, it also follows page changes and
+    the master to keep the output level of every fader, returned to detailed
+    status checks as one byte per output channel.
+    """
+    def __init__(self, latency=0, echo=False, smartfade=None):
+        self.latency = latency
+        self.echo = echo
+        self.smartfade = smartfade
+
+        self.controls = {}
+        self.faders = bytearray(512)
+        self.master = 255
+        self._pageOffset = 0
+        self.packets = []
+        self.commands = 0
+        self.events = deque()
+
+        self._expecting = 0
+        self._response = b""
+
+        self.dataOut = _EmulatedEndpoint(self.write, None)
+        self.dataIn = _EmulatedEndpoint(None, self.read)
+
+    def add_event(self, data):
+        self.events.append(bytes(data))
+
+    def write(self, data, timeout=None):
+        if self.latency:
+            time.sleep(self.latency)
+
+        data = bytes(data)
+        if self._expecting:
+            self._expecting = 0
+            self._receive(data)
+            return len(data)
+
+        request = send_requests.SendRequest()
+        request.unpack(data)
+
+        if request.command == 0x01:
+            self._expecting = request.pktSize
+        elif request.command == 0x02:
+            outputs = bytes(level * self.master // 255 for level in self.faders)
+            response = send_requests.SendRequest(command=0x04, pktSize=len(outputs))
+            self._response += response.pack() + outputs
+        else:
+            # Status checks are answered with the next event, if any
+            event = self.events.popleft() if self.events else b""
+            response = send_requests.SendRequest(command=0x04, pktSize=len(event))
+            self._response += response.pack() + event
+
+        return len(data)
+
+    def _receive(self, data):
+        self.commands += 1
+        if len(self.packets) < 1024:
+            self.packets.append(data)
+
+        control = control_requests.ControlInterface()
+        if len(data) == control.calc_size():
+            control.unpack(data)
+            if control.command == 0x14:
+                self.controls[control.index] = control.state
+                if self.smartfade is not None:
+                    self._output(control.index, control.state)
+                if self.echo:
+                    self.events.append(data)
+
+    def _output(self, index, state):
+        smartfade = self.smartfade
+        faders = smartfade.faderMappings["faders"]
+
+        if index in faders:
+            self.faders[self._pageOffset + faders.index(index)] = state
+        elif index == smartfade.faderMappings["master_fader"]:
+            self.master = state
+        elif not state:
+            # Page buttons change page on release
+            for pageName in (page[1] for page in smartfade.faderPages):
+                if index == smartfade.controlMappings[pageName]:
+                    self._pageOffset = smartfade.page_offset(pageName)
+
+    def read(self, size, timeout=None):
+        data, self._response = self._response[:size], self._response[size:]
+        return data
+
+class _EmulatedEndpoint():
+    def __init__(self, write, read):
+        self.write = write
+        self.read = read
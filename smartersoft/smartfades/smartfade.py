@@ -23,6 +23,9 @@ class SmartFade(SmartFadeUSB, SmartFadeControl):
     """
     idVendor = 0x14d5
 
+    # Buttons that switch a mode on and off with each press
+    toggleButtons = ()
+
     @property
     def smartfades(self):
         """
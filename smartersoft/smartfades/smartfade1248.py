@@ -27,6 +27,8 @@ class SmartFade1248(SmartFade):
     numMems = 24
     numMemPages = 12
 
+    toggleButtons = ("blackout", "solo")
+
     ## Mappings for 0x14 commands.
     # SSSS 0014 XXXX YY
     faderMappings = {
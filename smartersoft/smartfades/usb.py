@@ -15,9 +15,14 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 from smartersoft.drivers import send_requests
+from smartersoft import tracing
 import usb.core
 import usb.util
+import contextlib
 import os
+import struct
+import threading
+import time
 
 class SmartFadeUSB():
     """
@@ -28,13 +33,32 @@ class SmartFadeUSB():
     def __init__(self):
         super().__init__()
         self.usbDev = None
+        self.usbEmulator = None
 
         # In/Out relative to host
         self.usbDataIn = None
         self.usbDataOut = None
 
         self._usbSeqNum = 0
-        
+
+        # Every transfer takes a ticket, and transfers go out in ticket
+        # order, so sequence numbers reach the console in order however
+        # many threads are encoding at once
+        self._seqLock = threading.Lock()
+        self._turn = threading.Condition()
+        self._ticket = 0
+        self._serving = 0
+
+        # Send path metrics
+        self.cmdCount = 0
+        self.byteCount = 0
+        self.writeTime = 0.0
+
+        # Running latency estimates, in seconds
+        self.latencyAlpha = 0.1
+        self.sendLatency = None
+        self.statusRoundTrip = None
+
     @property
     def usbSeqNum(self):
         """
@@ -44,7 +68,65 @@ class SmartFadeUSB():
     
     @usbSeqNum.setter
     def usbSeqNum(self, value):
-        self._usbSeqNum = value % (self.maxSeqNum + 1)
+        with self._seqLock:
+            self._usbSeqNum = value % (self.maxSeqNum + 1)
+
+    def _take_ticket(self, seqCount=0):
+        """
+        Takes the next place in the transmit order along with seqCount
+        sequence numbers. Returns the ticket and the first sequence number.
+        """
+        with self._seqLock:
+            ticket = self._ticket
+            self._ticket += 1
+            seqNum = self._usbSeqNum
+            self._usbSeqNum = (seqNum + seqCount) % (self.maxSeqNum + 1)
+        return ticket, seqNum
+
+    @contextlib.contextmanager
+    def _in_turn(self, ticket):
+        """
+        Waits for every earlier ticket to be transmitted, then lets the
+        next one go once the block exits.
+        """
+        with self._turn:
+            while self._serving != ticket:
+                self._turn.wait()
+        try:
+            yield
+        finally:
+            with self._turn:
+                self._serving += 1
+                self._turn.notify_all()
+
+    def _skip_turn(self, ticket):
+        """
+        Gives up a ticket that will not be transmitted, so later ones don't wait on it.
+        """
+        with self._in_turn(ticket):
+            pass
+
+    @property
+    def serial(self):
+        """
+        Serial number string of the connected SmartFade, or None if unavailable.
+        """
+        try:
+            return self.usbDev.serial_number
+        except (AttributeError, ValueError, usb.core.USBError):
+            return None
+
+    @property
+    def latency(self):
+        """
+        Estimated seconds from sending a command to the console acting on it,
+        the time to write a command plus half a status round trip for the
+        console to pick it up. Zero until something has been measured.
+        """
+        return (self.sendLatency or 0.0) + (self.statusRoundTrip or 0.0) / 2
+
+    def _ewma(self, average, value):
+        return value if average is None else average + (value - average) * self.latencyAlpha
 
     def on_connect(self):
         pass
@@ -69,6 +151,14 @@ class SmartFadeUSB():
         self.usbDev = devs[index]
         return True
 
+    # Stands in an emulator for the usb endpoints, nothing is claimed
+    def attach_emulator(self, latency=0, echo=False):
+        from .emulator import SmartFadeEmulator
+
+        self.usbEmulator = SmartFadeEmulator(latency, echo, self)
+        self.usbDataIn = self.usbEmulator.dataIn
+        self.usbDataOut = self.usbEmulator.dataOut
+
     # Claim useful interfaces from the kernel
     # Returns True on success, False on failure or if os is Windows
     def claim_dev(self):
@@ -91,8 +181,8 @@ class SmartFadeUSB():
     # Relase useful interfaces back to the kernel
     # Returns True on success, False on failure or if os is Windows
     def release_dev(self):
-        # Return early if running on Windows
-        if os.name == 'nt':
+        # Return early if running on Windows or emulated
+        if os.name == 'nt' or self.usbDev is None:
             return False
 
         for cfg in self.usbDev:
@@ -135,23 +225,141 @@ class SmartFadeUSB():
         return usb.util.find_descriptor(dataIntf, bEndpointAddress=0x04)
 
     def send_command(self, data):
-        self.usbDataOut.write(send_requests.SendRequest(command=0x01, pktSize=data.calc_size()).pack())
+        """
+        Sends a message after its SendRequest header. Safe to call from
+        many threads, messages are encoded before waiting their turn and
+        transmitted in the order their sequence numbers were taken.
+        """
+        start = time.perf_counter()
+        ticket, seqNum = self._take_ticket(1)
 
-        data.SendHeader.seqNum = self.usbSeqNum
-        self.usbDataOut.write(data.pack())
+        try:
+            request = send_requests.SendRequest(command=0x01, pktSize=data.calc_size())
+            header = request.pack()
+            data.SendHeader.seqNum = seqNum
+            payload = data.pack()
+        except BaseException:
+            self._skip_turn(ticket)
+            raise
 
-        self.usbSeqNum += 1
+        with self._in_turn(ticket):
+            with tracing.span("write SendRequest", "usb"):
+                self.usbDataOut.write(header)
+            with tracing.span("write payload", "usb"):
+                self.usbDataOut.write(payload)
 
-    def _empty_buffer(self):
-        while True:
-            cmd = send_requests.SendRequest(command=0x00, pktSize=0)
-            self.usbDataOut.write(cmd.pack())
+            elapsed = time.perf_counter() - start
+            self.cmdCount += 1
+            self.byteCount += len(header) + len(payload)
+            self.writeTime += elapsed
+            self.sendLatency = self._ewma(self.sendLatency, elapsed)
+
+    def send_prepacked(self, data, buf, header):
+        """
+        Sends a message by packing it into a preallocated buffer,
+        after an already packed SendRequest header.
+        The message and buffer must only be used by the calling thread.
+        """
+        start = time.perf_counter()
+        ticket, seqNum = self._take_ticket(1)
+
+        try:
+            data.SendHeader.seqNum = seqNum
+            data.pack_into(buf)
+        except BaseException:
+            self._skip_turn(ticket)
+            raise
+
+        with self._in_turn(ticket):
+            with tracing.span("write SendRequest", "usb"):
+                self.usbDataOut.write(header)
+            with tracing.span("write payload", "usb"):
+                self.usbDataOut.write(buf)
+
+            elapsed = time.perf_counter() - start
+            self.cmdCount += 1
+            self.byteCount += len(header) + len(buf)
+            self.writeTime += elapsed
+            self.sendLatency = self._ewma(self.sendLatency, elapsed)
+
+    def send_stream(self, buf, pktSize):
+        """
+        Sends a prebuilt stream of back to back messages, each a packed
+        SendRequest header followed by a payload of pktSize bytes.
+        The sequence number at the start of each payload is filled in here,
+        while the stream has its turn, so one stream can be shared between
+        threads.
+        Returns the number of messages sent.
+        """
+        start = time.perf_counter()
+
+        view = memoryview(buf)
+        headerSize = send_requests.SendRequest().calc_size()
+        recordSize = headerSize + pktSize
+        count = len(buf) // recordSize
+
+        ticket, seqNum = self._take_ticket(count)
+        with self._in_turn(ticket), tracing.span("write stream", "usb"):
+            for offset in range(0, count * recordSize, recordSize):
+                self.usbDataOut.write(view[offset:offset + headerSize])
+
+                struct.pack_into("<H", buf, offset + headerSize, seqNum)
+                self.usbDataOut.write(view[offset + headerSize:offset + recordSize])
 
-            data = self.usbDataIn.read(cmd.calc_size())
-            print(data)
-            cmd.unpack(data)
+                seqNum = (seqNum + 1) % (self.maxSeqNum + 1)
 
-            if cmd.pktSize == 0:
-                break
+            elapsed = time.perf_counter() - start
+            self.cmdCount += count
+            self.byteCount += count * recordSize
+            self.writeTime += elapsed
+            if count:
+                self.sendLatency = self._ewma(self.sendLatency, elapsed / count)
 
-            print(self.usbDataIn.read(cmd.pktSize)) 
+        return count
+
+    def read_status(self, command=0x02):
+        """
+        Sends a status request with the given SendRequest command and
+        returns the payload of the response, empty if there is none.
+        Command 2 is the detailed status check.
+        """
+        request = send_requests.SendRequest(command=command, pktSize=0)
+        header = request.pack()
+
+        # The request and response can't have anything sent between them
+        ticket, _ = self._take_ticket()
+        with self._in_turn(ticket):
+            start = time.perf_counter()
+            self.usbDataOut.write(header)
+            request.unpack(bytes(self.usbDataIn.read(request.calc_size())))
+            self.statusRoundTrip = self._ewma(self.statusRoundTrip, time.perf_counter() - start)
+
+            if request.pktSize == 0:
+                return b""
+            return bytes(self.usbDataIn.read(request.pktSize))
+
+    def poll_events(self):
+        """
+        Asks the SmartFade for new events until there are none left.
+        Returns a list of the raw event packets.
+        """
+        events = []
+        while True:
+            event = self.read_status(0x00)
+            if not event:
+                return events
+            events.append(event)
+
+    def measure_latency(self, samples=10):
+        """
+        Times a few status round trips to seed the latency estimate.
+        Any events read along the way are returned.
+        """
+        events = []
+        for _ in range(samples):
+            events += self.poll_events()
+        return events
+
+    def _empty_buffer(self):
+        for event in self.poll_events():
+            print(event)
@@ -0,0 +1,481 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Cues locked to SMPTE timecode, read as LTC audio or MIDI Time Code.
+"""
+
+import json
+import time
+
+import numpy as np
+
+# LTC sync word, bits 64-79 in the order they are sent
+ltcSync = 0b0011111111111101
+
+# Standard rates, and the MTC rate codes for them
+frameRates = (24, 25, 30)
+mtcRates = {0: (24, False), 1: (25, False), 2: (30, True), 3: (30, False)}
+
+def timecode_to_seconds(hours, minutes, seconds, frames, fps, dropFrame=False):
+    """
+    Converts a timecode to seconds. Drop frame timecode is counted at
+    29.97 frames per second, skipping frames 0 and 1 of most minutes.
+    """
+    if dropFrame:
+        totalMinutes = hours * 60 + minutes
+        frameNum = (totalMinutes * 60 + seconds) * 30 + frames - 2 * (totalMinutes - totalMinutes // 10)
+        return frameNum * 1001 / 30000
+
+    return hours * 3600 + minutes * 60 + seconds + frames / fps
+
+def parse_timecode(text, fps, dropFrame=False):
+    """
+    Converts "HH:MM:SS:FF" (or "HH:MM:SS;FF" for drop frame) to seconds.
+    """
+    parts = text.replace(";", ":").split(":")
+    if len(parts) != 4:
+        raise ValueError(f"Timecode {text} is not in HH:MM:SS:FF form")
+
+    hours, minutes, seconds, frames = (int(part) for part in parts)
+    if minutes >= 60 or seconds >= 60 or frames >= fps:
+        raise ValueError(f"Timecode {text} is outside its range")
+
+    return timecode_to_seconds(hours, minutes, seconds, frames, fps, dropFrame or ";" in text)
+
+class LtcDecoder():
+    """
+    Decodes linear timecode from blocks of audio samples.
+
+    LTC is biphase mark coded, every bit starts with a transition and a 1
+    has another one halfway through. Transitions are found with a little
+    hysteresis, and sorted into half or whole bits against a bit period
+    that follows the tape speed. Only forward playback is decoded.
+
+    fps can be given, otherwise it is estimated from the bit rate and
+    snapped to 24, 25 or 30 (29.97 when the drop frame flag is set).
+    """
+    def __init__(self, sampleRate, fps=None, threshold=0.02):
+        self.sampleRate = sampleRate
+        self.fps = fps
+        self.threshold = threshold
+
+        # Start from 25fps, which sorts 24-30fps half and whole bits correctly
+        self.period = sampleRate / ((fps or 25) * 80)
+
+        self.frames = 0
+
+        self._state = False
+        self._lastEdge = None
+        self._samples = 0
+        self._half = False
+        self._bits = 0
+        self._bitCount = 0
+
+    def process(self, block):
+        """
+        Decodes a block of samples.
+        Returns a list of (seconds, samplesAgo) for each complete frame,
+        the time at the end of the frame and how many samples before the
+        end of the block that was.
+        """
+        hi = block > self.threshold
+        lo = block < -self.threshold
+
+        crossings = np.flatnonzero(hi | lo)
+        states = hi[crossings]
+        previous = np.concatenate(([self._state], states[:-1]))
+        edges = (crossings[states != previous] + self._samples).tolist()
+        if len(states):
+            self._state = bool(states[-1])
+
+        self._samples += len(block)
+
+        decoded = []
+        for edge in edges:
+            if self._lastEdge is not None:
+                frame = self._interval(edge - self._lastEdge)
+                if frame is not None:
+                    decoded.append((frame, self._samples - edge))
+            self._lastEdge = edge
+
+        return decoded
+
+    def _interval(self, interval):
+        if interval < 0.75 * self.period:
+            self.period += (2 * interval - self.period) * 0.05
+            if not self._half:
+                self._half = True
+                return None
+            self._half = False
+            bit = 1
+        else:
+            self.period += (interval - self.period) * 0.05
+            self._half = False
+            bit = 0
+
+        self._bits = ((self._bits << 1) | bit) & ((1 << 80) - 1)
+        self._bitCount += 1
+
+        if self._bitCount < 80 or self._bits & 0xffff != ltcSync:
+            return None
+
+        self._bitCount = 0
+        self.frames += 1
+        return self._frame()
+
+    def _field(self, start, length):
+        value = 0
+        for i in range(length):
+            value |= ((self._bits >> (79 - start - i)) & 1) << i
+        return value
+
+    def _frame(self):
+        frames = self._field(0, 4) + 10 * self._field(8, 2)
+        seconds = self._field(16, 4) + 10 * self._field(24, 3)
+        minutes = self._field(32, 4) + 10 * self._field(40, 3)
+        hours = self._field(48, 4) + 10 * self._field(56, 2)
+        dropFrame = bool(self._field(10, 1))
+
+        fps = self.fps
+        if fps is None:
+            measured = self.sampleRate / (80 * self.period)
+            fps = min(frameRates, key=lambda rate: abs(rate - measured))
+
+        # The frame has just finished, so the time is the start of the next
+        start = timecode_to_seconds(hours, minutes, seconds, frames, fps, dropFrame)
+        return start + (1001 / 30000 if dropFrame else 1 / fps)
+
+class MtcDecoder():
+    """
+    Decodes MIDI Time Code from raw MIDI bytes, quarter frame messages
+    and full frame SysEx messages. Any other MIDI data is skipped.
+
+    Quarter frames give the time once all 8 pieces have arrived in order,
+    and every quarter frame after that moves on by a quarter of a frame.
+    """
+    def __init__(self):
+        self.fps = 30
+        self.dropFrame = False
+
+        self._pieces = [0] * 8
+        self._lastPiece = None
+        self._locked = None
+        self._quarters = 0
+
+        self._status = None
+        self._sysex = bytearray()
+
+    def feed(self, data):
+        """
+        Decodes some bytes of MIDI.
+        Returns a list of times in seconds, one for each time decoded.
+        """
+        times = []
+        for byte in data:
+            if byte >= 0xf8:
+                # Real time messages can appear anywhere
+                continue
+
+            if byte & 0x80:
+                self._status = byte
+                if byte == 0xf0:
+                    self._sysex = bytearray()
+                elif byte == 0xf7 and len(self._sysex) == 8:
+                    seconds = self._full_frame(self._sysex)
+                    if seconds is not None:
+                        times.append(seconds)
+                continue
+
+            if self._status == 0xf1:
+                seconds = self._quarter_frame(byte)
+                if seconds is not None:
+                    times.append(seconds)
+                self._status = None
+            elif self._status == 0xf0 and len(self._sysex) < 8:
+                self._sysex.append(byte)
+
+        return times
+
+    def _quarter_frame(self, byte):
+        piece, value = byte >> 4, byte & 0x0f
+        self._pieces[piece] = value
+
+        inOrder = self._lastPiece is not None and piece == (self._lastPiece + 1) % 8
+        self._lastPiece = piece
+        if not inOrder:
+            self._locked = None
+            return None
+
+        if piece == 7:
+            self.fps, self.dropFrame = mtcRates[(self._pieces[7] >> 1) & 0x03]
+            p = self._pieces
+            frames = p[0] | (p[1] & 0x01) << 4
+            seconds = p[2] | (p[3] & 0x03) << 4
+            minutes = p[4] | (p[5] & 0x03) << 4
+            hours = p[6] | (p[7] & 0x01) << 4
+
+            # Piece 0 was sent at the start of that frame, 7 quarters ago
+            self._locked = timecode_to_seconds(hours, minutes, seconds, frames, self.fps, self.dropFrame)
+            self._quarters = 7
+        elif self._locked is None:
+            return None
+        else:
+            self._quarters += 1
+
+        frameTime = 1001 / 30000 if self.dropFrame else 1 / self.fps
+        return self._locked + self._quarters * frameTime / 4
+
+    def _full_frame(self, sysex):
+        # 7F dd 01 01 hh mm ss ff
+        if sysex[0] != 0x7f or sysex[2:4] != b"\x01\x01":
+            return None
+
+        self.fps, self.dropFrame = mtcRates[(sysex[4] >> 5) & 0x03]
+        self._locked = None
+        self._lastPiece = None
+        return timecode_to_seconds(sysex[4] & 0x1f, sysex[5], sysex[6], sysex[7], self.fps, self.dropFrame)
+
+class Cue():
+    """
+    A change to some faders and memories at a point in time.
+
+    faders:
+        Dictionary of absolute fader number to level.
+
+    memories:
+        Dictionary of (memory page, memory number) to level.
+
+    fade:
+        Seconds to fade from the previous state, 0 for a snap.
+    """
+    def __init__(self, time, faders=None, memories=None, fade=0.0, name=None):
+        self.time = time
+        self.faders = dict(faders or {})
+        self.memories = dict(memories or {})
+        self.fade = fade
+        self.name = name
+
+class CueTimeline():
+    """
+    Cues sorted by time, with the full state after every cue stored so any
+    point in the show is found with one binary search.
+
+    A state holds a level per fader then per (memory page, memory), with
+    -1 for anything no cue so far has set. Cues only track the controls
+    they name, everything else carries on from the cues before. cued marks
+    the controls any cue sets.
+    """
+    def __init__(self, cues, numFaders, numMems=0, numMemPages=0):
+        self.cues = sorted(cues, key=lambda cue: cue.time)
+        self.numFaders = numFaders
+        self.numMems = numMems
+        self.numMemPages = numMemPages
+
+        width = numFaders + numMems * numMemPages
+        self.empty = np.full(width, -1, dtype=np.int16)
+        self.times = np.array([cue.time for cue in self.cues], dtype=np.float64)
+        self.fades = np.array([cue.fade for cue in self.cues], dtype=np.float64)
+        self.states = np.empty((len(self.cues), width), dtype=np.int16)
+
+        state = self.empty.copy()
+        for i, cue in enumerate(self.cues):
+            for faderNum, level in cue.faders.items():
+                if not 0 <= faderNum < numFaders:
+                    raise IndexError("Attempted to cue a fader number that does not exist")
+                state[faderNum] = self._level(level)
+
+            for (memPage, memNum), level in cue.memories.items():
+                if not (0 <= memPage < numMemPages and 0 <= memNum < numMems):
+                    raise IndexError("Attempted to cue a memory that does not exist")
+                state[numFaders + memPage * numMems + memNum] = self._level(level)
+
+            self.states[i] = state
+
+        self.cued = state >= 0
+
+    def _level(self, level):
+        if not 0 <= level <= 255:
+            raise ValueError("Attempted to cue a level outside its range")
+        return level
+
+    def index(self, seconds):
+        """
+        Returns the index of the last cue at or before the given time,
+        or -1 before the first cue.
+        """
+        return int(np.searchsorted(self.times, seconds, side="right")) - 1
+
+    def state(self, seconds):
+        """
+        Returns the state at the given time, part way through any fade.
+        """
+        i = self.index(seconds)
+        if i < 0:
+            return self.empty
+
+        state = self.states[i]
+        progress = (seconds - self.times[i]) / self.fades[i] if self.fades[i] else 1
+        if progress >= 1:
+            return state
+
+        previous = self.states[i - 1] if i else self.empty
+        faded = np.rint(previous + (state - previous) * progress).astype(np.int16)
+
+        # Anything not set before the cue snaps straight to its level
+        return np.where(previous < 0, state, faded)
+
+    @classmethod
+    def from_dict(cls, data, smartfade):
+        """
+        Builds a timeline from a dictionary, as read from JSON:
+
+            {"fps": 25, "cues": [
+                {"time": "00:00:10:00", "fade": 2,
+                 "faders": {"0": 255}, "memories": [[page, memory, level]]}]}
+
+        Times are seconds or HH:MM:SS:FF timecode at the given fps.
+        """
+        fps = data.get("fps", 30)
+        cues = []
+        for cue in data["cues"]:
+            cueTime = cue["time"]
+            if isinstance(cueTime, str):
+                cueTime = parse_timecode(cueTime, fps, data.get("dropFrame", False))
+
+            cues.append(Cue(
+                cueTime,
+                {int(faderNum): level for faderNum, level in cue.get("faders", {}).items()},
+                {(memPage, memNum): level for memPage, memNum, level in cue.get("memories", [])},
+                cue.get("fade", 0.0),
+                cue.get("name")))
+
+        return cls(cues, smartfade.numFaders, smartfade.numMems, smartfade.numMemPages)
+
+    @classmethod
+    def load(cls, path, smartfade):
+        """
+        Reads a timeline from a JSON file.
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f), smartfade)
+
+class TimecodeChase():
+    """
+    Follows timecode through a CueTimeline, sending the state at each time.
+
+    Every time is a fresh lookup, so jumps, rewinds and relocking after a
+    dropout land on the right state straight away. Faders go through
+    set_faders, and memories are diffed against the last levels sent, so
+    only changes reach the console.
+
+    Controls the timeline cues are sent at default before their first cue,
+    so rewinding past it takes them back down. Controls no cue sets are
+    left alone, as they are with a default of None.
+    """
+    def __init__(self, smartersoft, timeline, default=0):
+        self.smartersoft = smartersoft
+        self.timeline = timeline
+        self.default = default
+
+        self.memPage = None
+        self.position = None
+        self.cue = -1
+
+        self.locates = 0
+        self.sent = 0
+
+        self._state = None
+        self._memories = np.full(timeline.numMems * timeline.numMemPages, -1, dtype=np.int16)
+
+    def locate(self, seconds):
+        """
+        Sends the state at the given time.
+        Returns the number of faders and memories sent.
+        """
+        self.position = seconds
+        self.cue = self.timeline.index(seconds)
+        self.locates += 1
+
+        state = self.timeline.state(seconds)
+        if self.default is not None:
+            unset = (state < 0) & self.timeline.cued
+            if unset.any():
+                state = np.where(unset, self.default, state).astype(np.int16)
+        if state is self._state or (self._state is not None and np.array_equal(state, self._state)):
+            return 0
+        self._state = state
+
+        numFaders = self.timeline.numFaders
+        sent = self.smartersoft.set_faders([None if level < 0 else level for level in state[:numFaders].tolist()])
+
+        memories = state[numFaders:]
+        changed = np.flatnonzero((memories >= 0) & (memories != self._memories))
+        if len(changed):
+            pages = {}
+            for i in changed.tolist():
+                pages.setdefault(i // self.timeline.numMems, []).append(i)
+
+            # The page being shown goes first, so each page is switched to at most once
+            for memPage in sorted(pages, key=lambda page: page != self.memPage):
+                for i in pages[memPage]:
+                    self.smartersoft.set_memory(i % self.timeline.numMems, int(memories[i]),
+                        memPage=memPage, change_page=memPage != self.memPage)
+                    self.memPage = memPage
+                    self._memories[i] = memories[i]
+                    sent += 1
+
+        self.sent += sent
+        return sent
+
+    def run_ltc(self, blocks, fps=None, realtime=True):
+        """
+        Chases LTC from wav_blocks or pcm_blocks until they run out.
+        With realtime enabled blocks are paced as if the file were playing.
+        """
+        sampleRate, _ = next(blocks)
+        decoder = LtcDecoder(sampleRate, fps)
+
+        start = time.monotonic()
+        played = 0
+        for _, block in blocks:
+            played += len(block)
+            if realtime:
+                delay = start + played / sampleRate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            frames = decoder.process(block)
+            if frames:
+                seconds, samplesAgo = frames[-1]
+                self.locate(seconds + samplesAgo / sampleRate)
+
+        return decoder
+
+    def run_mtc(self, stream):
+        """
+        Chases MTC from a binary stream of raw MIDI, such as a MIDI device
+        file or a pipe, until it ends.
+        """
+        decoder = MtcDecoder()
+        while True:
+            data = stream.read1(256) if hasattr(stream, "read1") else stream.read(1)
+            if not data:
+                return decoder
+
+            times = decoder.feed(data)
+            if times:
+                self.locate(times[-1])
@@ -0,0 +1,168 @@
+# SmarterSoft - Reverse Engineered SmartFade Control Software
+# Copyright (C) 2023 Diesel Thomas
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Opt-in tracing of the command pipeline, dumped as Chrome trace events
+for chrome://tracing or Perfetto.
+
+    tracer = tracing.Tracer(sampleEvery=10).start()
+    ...
+    tracer.stop()
+    tracer.dump("trace.json")
+
+While no tracer is started, traced functions only pay for one check.
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+
+# The tracer spans are recorded to, if any
+_tracer = None
+
+class _NoSpan():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ctx_type, ctx_value, ctx_traceback):
+        return False
+
+_noSpan = _NoSpan()
+
+class _Span():
+    __slots__ = ("tracer", "name", "cat", "sampled", "start")
+
+    def __init__(self, tracer, name, cat, sampled):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.sampled = sampled
+
+    def __enter__(self):
+        self.tracer._local.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, ctx_type, ctx_value, ctx_traceback):
+        end = time.perf_counter_ns()
+        tracer = self.tracer
+        tracer._local.depth -= 1
+
+        if self.sampled:
+            # itertools.count is atomic under the GIL, so threads each get
+            # their own slot without taking a lock.
+            tracer._events[next(tracer._slots) % tracer.capacity] = (
+                self.name, self.cat, self.start, end - self.start, threading.get_ident())
+        return False
+
+class Tracer():
+    """
+    Records spans into a fixed size ring buffer, overwriting the oldest.
+
+    Sampling is decided per top-level call, with sampleEvery=10 only
+    every 10th outermost span (and everything inside it) is recorded.
+    """
+    def __init__(self, capacity=65536, sampleEvery=1):
+        self.capacity = capacity
+        self.sampleEvery = sampleEvery
+
+        self._events = [None] * capacity
+        self._slots = itertools.count()
+        self._calls = itertools.count()
+        self._local = threading.local()
+
+    def span(self, name, cat="smartersoft"):
+        local = self._local
+        if not hasattr(local, "depth"):
+            local.depth = 0
+            local.sampled = False
+
+        # Nested spans follow the decision made for the outermost one
+        if local.depth == 0:
+            local.sampled = next(self._calls) % self.sampleEvery == 0
+
+        return _Span(self, name, cat, local.sampled)
+
+    def start(self):
+        """
+        Starts recording spans from every thread.
+        """
+        global _tracer
+        _tracer = self
+        return self
+
+    def stop(self):
+        global _tracer
+        if _tracer is self:
+            _tracer = None
+
+    def clear(self):
+        self._events = [None] * self.capacity
+        self._slots = itertools.count()
+
+    def events(self):
+        """
+        Returns the recorded spans, oldest first, as Chrome trace events.
+        """
+        pid = os.getpid()
+        spans = sorted((event for event in self._events if event is not None), key=lambda event: event[2])
+
+        return [{
+            "name": name, "cat": cat, "ph": "X",
+            "ts": start / 1000, "dur": duration / 1000,
+            "pid": pid, "tid": tid
+        } for name, cat, start, duration, tid in spans]
+
+    def dump(self, path):
+        """
+        Writes the recorded spans as a Chrome trace-event JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, ctx_type, ctx_value, ctx_traceback):
+        self.stop()
+
+def span(name, cat="smartersoft"):
+    """
+    Context manager recording a span if a tracer is started.
+    """
+    # Read once, another thread may stop the tracer in between
+    tracer = _tracer
+    if tracer is None:
+        return _noSpan
+    return tracer.span(name, cat)
+
+def traced(name, cat="smartersoft"):
+    """
+    Decorator recording a span for each call if a tracer is started.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate